@@ -0,0 +1,257 @@
+'''
+Golden goal path corpus: seeded layouts with the top k paths of `reference_paths`,
+and the cost of the next path, which tells whether the k-th path is tied.
+Solvers are replayed against the corpus across a process pool and every
+result is diffed within a float tolerance, with per-layout timings.
+
+The reference shares no code with PassGraph beyond the interception model:
+it is the exhaustive recursive search and line/rectangle collision test of
+the original policy, so the corpus also catches bugs present when it was generated.
+
+Generate with: python -m soccer_agent.Bench.golden generate --out tests/golden/goal_paths.json
+Verify with:   python -m soccer_agent.Bench.golden verify --corpus tests/golden/goal_paths.json --solver dp
+'''
+import argparse
+import json
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from math import log
+from typing import Callable, Dict, List, Optional, Tuple
+
+from soccer_agent.Bench.solvers import random_layout
+from soccer_agent.Math.geometry import Line, Point, Rectangle
+from soccer_agent.Math.pass_graph import AnytimeSearch, InterceptionModel, Layout, PassGraph, pass_success
+
+VERSION = 2
+
+# (cost, length, node indices) per path, cheapest first
+Paths = List[Tuple[float, float, Tuple[int, ...]]]
+
+
+def reference_paths(layout: Layout, model: Optional[InterceptionModel], k: int) -> Paths:
+    '''
+    Returns the k cheapest goal paths with at least one pass between teammates
+    by listing every path, as the original recursive policy did.
+    '''
+    points = list(layout.passers) + [layout.goal]
+    goal = len(layout.passers)
+    players = layout.passers + layout.defenders
+    r = layout.radius
+    weight = model.risk_weight if model else 0.0
+
+    def connects(p1: Point, p2: Point) -> bool:
+        line = Line(p1, p2)
+        ray_rect = Rectangle.enclosing_points([p1, p2])
+        ray_rect.top_left -= r
+        ray_rect.bottom_right += r
+        for p in players:
+            if p != p1 and p != p2 and line.dist_of_point(p) <= r and ray_rect.contains_point(p):
+                return False
+        return True
+
+    def edge(i: int, j: int) -> Optional[Tuple[float, float]]:
+        p1, p2 = points[i], points[j]
+        length = (p2 - p1).magnitude
+        if length == 0 or not connects(p1, p2):
+            return None
+        d = p2 - p1
+        success = pass_success(p1, d.x, d.y, length, r, model, layout.defenders)
+        if success <= 0:
+            return None
+        return length - weight*log(success), length
+
+    edges = {(i, j): edge(i, j) for i in range(goal)
+             for j in range(goal + 1) if i != j}
+    found = []
+    trace = [layout.kicker]
+
+    def explore(cost: float, length: float):
+        i = trace[-1]
+        shot = edges[(i, goal)]
+        if len(trace) > 1 and shot is not None:
+            found.append((cost + shot[0], length + shot[1], tuple(trace) + (goal,)))
+        for j in range(goal):
+            e = edges.get((i, j))
+            if e is not None and j not in trace:
+                trace.append(j)
+                explore(cost + e[0], length + e[1])
+                trace.pop()
+    explore(0.0, 0.0)
+    found.sort(key=lambda p: p[0])
+    return found[:k]
+
+
+def graph_solver(solve: Callable[[PassGraph, int], list]) -> Callable[[Layout, Optional[InterceptionModel], int], Paths]:
+    def solve_layout(layout: Layout, model: Optional[InterceptionModel], k: int) -> Paths:
+        graph = PassGraph.from_layout(layout, interception=model)
+        return [(c, graph.path_length(p), p) for c, p in solve(graph, k)]
+    return solve_layout
+
+
+SOLVERS = {
+    'reference': reference_paths,
+    'dfs': graph_solver(lambda g, k: g.top_paths(k=k)),
+    'dp': graph_solver(lambda g, k: g.top_paths_subset_dp(k=k)),
+    'anytime': graph_solver(lambda g, k: AnytimeSearch(g, k=k).run()[0]),
+}
+
+
+def layout_to_json(layout: Layout) -> Dict:
+    return {
+        'passers': [(p.x, p.y) for p in layout.passers],
+        'defenders': [(p.x, p.y) for p in layout.defenders],
+        'goal': (layout.goal.x, layout.goal.y),
+        'radius': layout.radius,
+        'kicker': layout.kicker,
+    }
+
+
+def layout_from_json(data: Dict) -> Layout:
+    return Layout(
+        passers=tuple(Point(*p) for p in data['passers']),
+        defenders=tuple(Point(*p) for p in data['defenders']),
+        goal=Point(*data['goal']),
+        radius=data['radius'],
+        kicker=data['kicker'],
+    )
+
+
+def solve_entry(entry: Dict, solver: str = 'dfs', k: Optional[int] = None) -> Tuple[List[Dict], float]:
+    '''
+    Solves a corpus entry for its k paths, or `k` if given, returns the paths and the solve time in seconds.
+    '''
+    layout = layout_from_json(entry['layout'])
+    model = InterceptionModel() if entry['interception'] else None
+    start = time.perf_counter()
+    paths = SOLVERS[solver](layout, model, entry['k'] if k is None else k)
+    seconds = time.perf_counter() - start
+    return [{'path': list(p), 'cost': c, 'length': l} for c, l, p in paths], seconds
+
+
+def generate_corpus(count: int, seed: int = 0, k: int = 4) -> Dict:
+    '''
+    Returns a corpus of `count` seeded layouts of mixed sizes, solved with `reference_paths`.
+    Every other layout ranks paths with the default InterceptionModel.
+    '''
+    entries = []
+    for i in range(count):
+        s = seed + i
+        entry = {
+            'seed': s,
+            'k': k,
+            'interception': i % 2 == 0,
+            'layout': layout_to_json(random_layout(s, passers=3 + s % 8, defenders=2 + s % 4)),
+        }
+        paths, _ = solve_entry(entry, 'reference', k=k + 1)
+        entry['paths'] = paths[:k]
+        # Cost of the (k+1)-th path, None if there are at most k paths
+        entry['next_cost'] = paths[k]['cost'] if len(paths) > k else None
+        entries.append(entry)
+    return {'version': VERSION, 'entries': entries}
+
+
+def diff_result(expected: List[Dict], actual: List[Dict], tol: float, next_cost: Optional[float] = None) -> Optional[str]:
+    '''
+    Returns a description of the first difference, or None if the results match.
+    Paths with costs within `tol` of each other may come in any order. If
+    `next_cost`, the cost of the path after the expected ones, ties the last
+    expected cost, the last group of tied paths may be broken by other paths.
+    '''
+    if len(expected) != len(actual):
+        return f'{len(actual)} paths instead of {len(expected)}'
+    for i, (e, a) in enumerate(zip(expected, actual)):
+        for key in ('cost', 'length'):
+            if abs(e[key] - a[key]) > tol * max(1.0, abs(e[key])):
+                return f'path {i} {key} {a[key]} instead of {e[key]}'
+    def tied(a: float, b: float) -> bool:
+        return abs(a - b) <= tol * max(1.0, abs(a))
+    # Compare paths per group of tied costs
+    i = 0
+    while i < len(expected):
+        j = i + 1
+        while j < len(expected) and tied(expected[i]['cost'], expected[j]['cost']):
+            j += 1
+        if j < len(expected) or next_cost is None or not tied(expected[i]['cost'], next_cost):
+            want = sorted(tuple(p['path']) for p in expected[i:j])
+            got = sorted(tuple(p['path']) for p in actual[i:j])
+            if want != got:
+                return f'paths {i}..{j-1} are {got} instead of {want}'
+        i = j
+    return None
+
+
+def _verify_entry(args) -> Tuple[int, Optional[str], float]:
+    index, entry, solver, tol = args
+    actual, seconds = solve_entry(entry, solver)
+    return index, diff_result(entry['paths'], actual, tol, entry['next_cost']), seconds
+
+
+def verify(corpus: Dict, solver: str = 'dfs', workers: Optional[int] = None, tol: float = 1e-6) -> Dict:
+    '''
+    Replays every entry of `corpus` with `solver` on a pool of `workers` processes.
+    Returns the failures as (seed, difference) pairs and the per-layout timings.
+    '''
+    if corpus.get('version') != VERSION:
+        raise Exception(
+            f'Corpus version `{corpus.get("version")}` is not supported.')
+    entries = corpus['entries']
+    jobs = [(i, e, solver, tol) for i, e in enumerate(entries)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_verify_entry, jobs, chunksize=16))
+    wall = time.perf_counter() - start
+    timings = [(entries[i]['seed'], len(entries[i]['layout']['passers']), s)
+               for i, _, s in results]
+    return {
+        'solver': solver,
+        'layouts': len(entries),
+        'failures': [(entries[i]['seed'], d) for i, d, _ in results if d is not None],
+        'timings': timings,
+        'wall_seconds': wall,
+    }
+
+
+def print_report(report: Dict, slowest: int = 5):
+    times = sorted(s for _, _, s in report['timings'])
+    n = len(times)
+    print(f'{report["solver"]}: {n} layouts, {len(report["failures"])} failures, '
+          f'{report["wall_seconds"]:.2f}s wall')
+    if n:
+        print(f'solve ms: mean {sum(times)/n*1e3:.3f}, p50 {times[n//2]*1e3:.3f}, '
+              f'p95 {times[min(n-1, int(n*0.95))]*1e3:.3f}, max {times[-1]*1e3:.3f}')
+    print(f'{"seed":>6} {"passers":>8} {"ms":>10}')
+    for seed, passers, s in sorted(report['timings'], key=lambda t: -t[2])[:slowest]:
+        print(f'{seed:>6} {passers:>8} {s*1e3:>10.3f}')
+    for seed, diff in report['failures']:
+        print(f'FAIL seed {seed}: {diff}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Golden goal path corpus.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    gen = sub.add_parser('generate')
+    gen.add_argument('--out', type=pathlib.Path, required=True)
+    gen.add_argument('--count', type=int, default=200)
+    gen.add_argument('--seed', type=int, default=0)
+    gen.add_argument('-k', type=int, default=4)
+    ver = sub.add_parser('verify')
+    ver.add_argument('--corpus', type=pathlib.Path, required=True)
+    ver.add_argument('--solver', choices=list(SOLVERS), default='dfs')
+    ver.add_argument('--workers', type=int, default=None)
+    ver.add_argument('--tol', type=float, default=1e-6)
+    args = parser.parse_args()
+    if args.command == 'generate':
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(
+            generate_corpus(args.count, args.seed, args.k), indent=None))
+        print(f'Wrote {args.count} layouts to {args.out}')
+    else:
+        report = verify(json.loads(args.corpus.read_text()),
+                        args.solver, args.workers, args.tol)
+        print_report(report)
+        raise SystemExit(1 if report['failures'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+'''
+Load test of the interactive path: keybind dispatch, relocation, solving and
+rendering together. Runs the full simulator of `main` under the headless SDL
+`dummy` video driver and posts synthetic key presses at fixed rates, recording
+frame times, goal path solve latencies, dropped ticks and memory growth.
+
+Run with: python -m soccer_agent.Bench.load --duration 60 --rate x=20 --rate b=5
+Arguments after `--` go to the simulator, e.g. `-- --matches 4`.
+'''
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence
+
+import pygame
+from soccer_agent.main import App, create_app
+from ..__init__ import LOG
+
+# Keys that can be pressed, see the keybinds in `main`
+KEYS = {
+    'x': pygame.K_x,
+    'b': pygame.K_b,
+    'r': pygame.K_r,
+    'h': pygame.K_h,
+}
+
+
+def parse_rate(value: str):
+    key, _, rate = value.partition('=')
+    if key not in KEYS:
+        raise argparse.ArgumentTypeError(
+            f'unknown key `{key}`, use one of {sorted(KEYS)}')
+    try:
+        hz = float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid rate `{rate}`')
+    if hz <= 0:
+        raise argparse.ArgumentTypeError(f'rate must be positive, not {hz}')
+    return key, hz
+
+
+def percentiles(values: Sequence[float], ps=(50, 90, 99)) -> Dict[str, float]:
+    '''
+    Returns the given percentiles and the max of `values`, NaN if empty.
+    '''
+    if not values:
+        return {**{f'p{p}': float('nan') for p in ps}, 'max': float('nan')}
+    values = sorted(values)
+    result = {f'p{p}': values[min(int(len(values)*p/100), len(values) - 1)]
+              for p in ps}
+    result['max'] = values[-1]
+    return result
+
+
+class LoadRecorder:
+    '''
+    Times the ticks of a window and the goal path solves of a policy.
+    Its listeners are registered last, so frame times include the rendering.
+    '''
+
+    def __init__(self, app: App):
+        self.app = app
+        self.window = app.context.window
+        self.frame_ms: List[float] = []
+        self.interval_ms: List[float] = []
+        self.solve_ms: List[float] = []
+        self._tick_start: Optional[float] = None
+        self._unbind_start = self.window.register_tick_listener(
+            self._on_tick_start, stage='tick_start')
+        self._unbind_end = self.window.register_tick_listener(
+            self._on_tick_end, stage='tick_end')
+        self._goal_path = app.policy.goal_path
+        app.policy.goal_path = self._timed(self._goal_path)
+
+    def _timed(self, fn: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.solve_ms.append((time.perf_counter() - start)*1e3)
+        return timed
+
+    def _on_tick_start(self, window):
+        now = time.perf_counter()
+        if self._tick_start is not None:
+            self.interval_ms.append((now - self._tick_start)*1e3)
+        self._tick_start = now
+
+    def _on_tick_end(self, window):
+        self.frame_ms.append((time.perf_counter() - self._tick_start)*1e3)
+
+    def dropped_ticks(self) -> int:
+        '''
+        No. of ticks missed because a tick, or anything else on the loop,
+        ran past the tick period.
+        '''
+        period = 1000/self.window.tick_rate
+        return sum(max(round(ms/period) - 1, 0) for ms in self.interval_ms)
+
+    def close(self):
+        self._unbind_start()
+        self._unbind_end()
+        self.app.policy.goal_path = self._goal_path
+
+
+async def press_keys(window, key: str, hz: float, end: float, posted: Dict[str, int]):
+    '''
+    Posts a key press every 1/`hz` seconds until `end` or the window closes.
+    Presses are scheduled on a fixed clock, so a stalled loop posts them in a burst.
+    '''
+    code = KEYS[key]
+    at = time.perf_counter()
+    while window.running and at < end:
+        for kind in (pygame.KEYDOWN, pygame.KEYUP):
+            pygame.event.post(pygame.event.Event(
+                kind, key=code, mod=pygame.KMOD_NONE))
+        posted[key] += 1
+        at += 1/hz
+        await asyncio.sleep(max(at - time.perf_counter(), 0))
+
+
+async def sample_memory(window, every: float, samples: List[int]):
+    while window.running:
+        samples.append(tracemalloc.get_traced_memory()[0])
+        await asyncio.sleep(every)
+
+
+async def load_test(
+    argv: Sequence[str] = (),
+    rates: Optional[Dict[str, float]] = None,
+    duration: float = 10.0,
+    warmup: float = 1.0,
+    trace_memory: bool = True,
+    memory_every: float = 1.0,
+) -> Dict:
+    '''
+    Runs the simulator built from `argv` for `warmup` + `duration` seconds,
+    pressing each key of `rates` that many times per second.
+    Ticks and solves are only recorded after the warmup, and the window
+    never idles so every tick period is expected to tick.
+    Returns a report, see `print_report`.
+    '''
+    rates = {'x': 10.0, 'b': 5.0} if rates is None else rates
+    app = create_app(list(argv))
+    window = app.context.window
+    window.idle_timeout_ms = None
+    listeners = {stage: len(l) for stage, l in window.tick_listeners.items()}
+    redraw_checks = len(window.redraw_checks)
+    posted = {key: 0 for key in rates}
+    memory: List[int] = []
+    report = dict()
+
+    async def drive():
+        await asyncio.sleep(warmup)
+        recorder = LoadRecorder(app)
+        if trace_memory:
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            sampler = asyncio.ensure_future(
+                sample_memory(window, memory_every, memory))
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            press_keys(window, key, hz, start + duration, posted)
+            for key, hz in rates.items()))
+        elapsed = time.perf_counter() - start
+        recorder.close()
+        report.update(
+            seconds=elapsed,
+            posted=dict(posted),
+            ticks=len(recorder.frame_ms),
+            expected_ticks=int(elapsed*window.tick_rate),
+            dropped_ticks=recorder.dropped_ticks(),
+            frame_ms=percentiles(recorder.frame_ms),
+            interval_ms=percentiles(recorder.interval_ms),
+            solves=len(recorder.solve_ms),
+            solve_ms=percentiles(recorder.solve_ms),
+            # Grows if anything registers without unbinding
+            tick_listeners={stage: len(l) - listeners[stage]
+                            for stage, l in window.tick_listeners.items()},
+            redraw_checks=len(window.redraw_checks) - redraw_checks,
+        )
+        if trace_memory:
+            sampler.cancel()
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            report.update(
+                memory_kib=[b/1024 for b in memory],
+                top_growth=[str(s) for s in after.compare_to(
+                    before, 'lineno')[:5] if s.size_diff > 0],
+            )
+        window.running = False
+
+    await asyncio.gather(window.event_loop(), drive())
+    return report
+
+
+def print_report(report: Dict):
+    def row(name, stats):
+        print(f'{name:<12} ' + ' '.join(f'{k} {v:>8.2f}' for k, v in stats.items()))
+    presses = ', '.join(f'{k}: {v}' for k, v in report['posted'].items())
+    print(f'{report["seconds"]:.1f}s, key presses {presses}')
+    print(f'ticks {report["ticks"]} of {report["expected_ticks"]}, '
+          f'dropped {report["dropped_ticks"]}')
+    row('frame ms', report['frame_ms'])
+    row('interval ms', report['interval_ms'])
+    print(f'solves {report["solves"]}')
+    row('solve ms', report['solve_ms'])
+    print(f'tick listener growth {report["tick_listeners"]}, '
+          f'redraw check growth {report["redraw_checks"]}')
+    if 'memory_kib' in report:
+        kib = report['memory_kib']
+        if kib:
+            print(f'traced memory {kib[0]:.0f} KiB -> {kib[-1]:.0f} KiB '
+                  f'(peak {max(kib):.0f} KiB, {len(kib)} samples)')
+        for line in report['top_growth']:
+            print(f'  {line}')
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if '--' in argv:
+        idx = argv.index('--')
+        argv, app_argv = argv[:idx], argv[idx + 1:]
+    else:
+        app_argv = []
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='Seconds of recorded load.')
+    parser.add_argument('--warmup', type=float, default=1.0,
+                        help='Seconds to run before recording.')
+    parser.add_argument('--rate', type=parse_rate, action='append', default=None,
+                        metavar='KEY=HZ', help=f'Presses per second of a key, one of {sorted(KEYS)}. Default x=10 b=5.')
+    parser.add_argument('--no-trace-memory', dest='trace_memory', action='store_false',
+                        help='Skip tracemalloc, which slows every allocation down.')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+    # Headless unless another driver is asked for
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    LOG.remove()
+    LOG.add(sys.stderr, level=args.log_level)
+    report = asyncio.run(load_test(
+        app_argv,
+        rates=dict(args.rate) if args.rate else None,
+        duration=args.duration,
+        warmup=args.warmup,
+        trace_memory=args.trace_memory,
+    ))
+    print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+'''
+Benchmarks the goal path solvers against each other on identical layouts.
+Run with: python -m soccer_agent.Bench.solvers --passers 4 8 12 16
+Add --all-sources to time the search of every kicker at once instead.
+'''
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from soccer_agent.Math.geometry import Point
+from soccer_agent.Math.pass_graph import InterceptionModel, Layout, PassGraph
+
+
+def random_layout(seed: int, passers: int, defenders: int) -> Layout:
+    '''
+    Returns a seeded random layout in the upper half of the field.
+    Dimensions match the bundled field asset with players scaled to 0.5.
+    '''
+    rng = random.Random(seed)
+    pts = [Point(rng.randint(26, 544), rng.randint(50, 390))
+           for _ in range(passers + defenders)]
+    # Kicker sits on the centre spot
+    pts[0] = Point(289, 395)
+    return Layout(
+        passers=tuple(pts[:passers]),
+        defenders=tuple(pts[passers:]),
+        goal=Point(289, 16),
+        radius=32,
+        kicker=0,
+    )
+
+
+def time_solver(solve: Callable[[PassGraph], list], graphs: List[PassGraph]):
+    '''
+    Returns (seconds per layout, results) for the given solver.
+    '''
+    start = time.perf_counter()
+    results = [solve(g) for g in graphs]
+    return (time.perf_counter() - start) / len(graphs), results
+
+
+def per_kicker_paths(graph: PassGraph, k: int) -> list:
+    result = []
+    for kicker in range(graph.n):
+        graph.kicker = kicker
+        result.append(graph.top_paths(k=k))
+    graph.kicker = 0
+    return result
+
+
+def bench_all_sources(args, model: InterceptionModel):
+    print(f'{"passers":>8} {"per kicker ms":>14} {"all ms":>10} {"match":>6}')
+    for n in args.passers:
+        graphs = [PassGraph.from_layout(random_layout(s, n, args.defenders), model)
+                  for s in range(args.layouts)]
+        each_t, each = time_solver(
+            lambda g: per_kicker_paths(g, args.k), graphs)
+        all_t, every = time_solver(
+            lambda g: g.top_paths_all_sources(k=args.k), graphs)
+        match = all(
+            [round(c, 6) for c, _ in a] == [round(c, 6) for c, _ in b]
+            for x, y in zip(each, every)
+            for a, b in zip(x, y)
+        )
+        print(f'{n:>8} {each_t*1e3:>14.3f} {all_t*1e3:>10.3f} {str(match):>6}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--passers', type=int, nargs='+', default=[4, 8, 12])
+    parser.add_argument('--defenders', type=int, default=3)
+    parser.add_argument('--layouts', type=int, default=20)
+    parser.add_argument('-k', type=int, default=4)
+    parser.add_argument('--all-sources', action='store_true',
+                        help='Compare one search per kicker with the all sources search.')
+    args = parser.parse_args()
+    model = InterceptionModel()
+    if args.all_sources:
+        bench_all_sources(args, model)
+        return
+    print(f'{"passers":>8} {"dfs ms":>10} {"dp ms":>10} {"dp MiB":>8} {"match":>6}')
+    for n in args.passers:
+        graphs = [PassGraph.from_layout(random_layout(s, n, args.defenders), model)
+                  for s in range(args.layouts)]
+        dfs_t, dfs = time_solver(lambda g: g.top_paths(k=args.k), graphs)
+        dp_t, dp = time_solver(
+            lambda g: g.top_paths_subset_dp(k=args.k), graphs)
+        match = all(
+            [round(c, 6) for c, _ in a] == [round(c, 6) for c, _ in b]
+            for a, b in zip(dfs, dp)
+        )
+        mib = PassGraph.subset_dp_bytes(n, args.k) / 2**20
+        print(f'{n:>8} {dfs_t*1e3:>10.3f} {dp_t*1e3:>10.3f} {mib:>8.2f} {str(match):>6}')
+
+
+if __name__ == '__main__':
+    main()
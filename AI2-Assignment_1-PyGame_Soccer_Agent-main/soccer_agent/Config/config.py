@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
 from soccer_agent.Sprites.entity import Entity
 
 import pygame
@@ -8,10 +8,35 @@ from soccer_agent.GUI.window import PyGame_Window
 
 @dataclass(eq=True, repr=True)
 class Config:
-    field_bb_color: pygame.Color
-    player_bb_color: pygame.Color
+    '''
+    Can be loaded from a TOML file, see `Config/loader.py`.
+    '''
+    field_bb_color: pygame.Color = field(
+        default_factory=lambda: pygame.Color(255, 0, 0))
+    player_bb_color: pygame.Color = field(
+        default_factory=lambda: pygame.Color(255, 0, 255))
     # Simulation config
-    top_path_colors: List[pygame.Color]
+    # One color per goal path, their count is the k of the top k paths
+    top_path_colors: List[pygame.Color] = field(default_factory=lambda: [
+        pygame.Color(255, 0, 0),
+        pygame.Color(0, 255, 0),
+        pygame.Color(0, 0, 255),
+        pygame.Color(0, 0, 0),
+    ])
+    # No. of players per team
+    red_players: int = 3
+    blue_players: int = 4
+    # Latency budget of a goal path solve, None solves to optimality
+    solve_budget_ms: Optional[float] = 5.0
+    # Budget per tick to refine provisional goal paths
+    refine_budget_ms: float = 5.0
+    # Longest the window sleeps between event polls while nothing changes, None always ticks
+    idle_timeout_ms: Optional[int] = 250
+    # Window config, the simulator resizes the window to fit the field
+    window_size: Tuple[int, int] = (300, 300)
+    tick_rate: int = 20
+    # Threads running async keybind actions and other blocking work of the window
+    executor_workers: int = 2
 
 @dataclass(frozen=True)
 class Context:
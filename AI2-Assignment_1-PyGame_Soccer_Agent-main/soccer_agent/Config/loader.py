@@ -0,0 +1,197 @@
+'''
+Loads Config from TOML files and reloads it when the file changes.
+
+Keys are the Config field names at the top level of the file, keys left
+out keep their defaults. Colors are names, "#rrggbb(aa)" strings or
+[r, g, b(, a)] arrays. TOML has no null, so optional settings are
+disabled with `false`, e.g. `solve_budget_ms = false` solves to optimality.
+'''
+import dataclasses
+import pathlib
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import pygame
+from soccer_agent.Config.config import Config
+from soccer_agent.GUI.window import PyGame_Window
+from ..__init__ import LOG
+
+try:
+    import tomllib
+except ImportError:
+    # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+
+def _color(value: Any) -> pygame.Color:
+    try:
+        if isinstance(value, str):
+            return pygame.Color(value)
+        if (isinstance(value, list) and len(value) in (3, 4)
+                and all(isinstance(v, int) and not isinstance(v, bool) for v in value)):
+            return pygame.Color(*value)
+    except ValueError:
+        pass
+    raise ValueError(
+        f'must be a color name, "#rrggbb" or [r, g, b(, a)], not {value!r}')
+
+
+def _colors(value: Any) -> List[pygame.Color]:
+    if not isinstance(value, list) or len(value) == 0:
+        raise ValueError(f'must be a non empty array of colors, not {value!r}')
+    return [_color(v) for v in value]
+
+
+def _number(minimum: float, integer: bool = False) -> Callable[[Any], float]:
+    kind = int if integer else (int, float)
+
+    def parse(value: Any):
+        if isinstance(value, bool) or not isinstance(value, kind):
+            raise ValueError(
+                f'must be {"an integer" if integer else "a number"}, not {value!r}')
+        if value < minimum:
+            raise ValueError(f'must be at least {minimum}, not {value!r}')
+        return value
+    return parse
+
+
+def _optional(parse: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def parse_optional(value: Any):
+        return None if value is False else parse(value)
+    return parse_optional
+
+
+def _size(value: Any):
+    if not isinstance(value, list) or len(value) != 2:
+        raise ValueError(f'must be a [width, height] array, not {value!r}')
+    return tuple(_number(1, integer=True)(v) for v in value)
+
+
+# Parser of every Config field, raising ValueError on invalid values
+SCHEMA: Dict[str, Callable[[Any], Any]] = {
+    'field_bb_color': _color,
+    'player_bb_color': _color,
+    'top_path_colors': _colors,
+    # BasicPolicy.relocate_players takes a kicker and a goal box player from
+    # the kicking team (blue), and a goal box player from red
+    'red_players': _number(1, integer=True),
+    'blue_players': _number(2, integer=True),
+    'solve_budget_ms': _optional(_number(0)),
+    'refine_budget_ms': _number(0),
+    'idle_timeout_ms': _optional(_number(1, integer=True)),
+    'window_size': _size,
+    'tick_rate': _number(1, integer=True),
+    'executor_workers': _number(1, integer=True),
+}
+
+
+def parse_config(data: Dict[str, Any]) -> Config:
+    '''
+    Validates the values of a parsed config file against SCHEMA.
+    Raises listing every invalid or unknown key.
+    '''
+    values, errors = dict(), []
+    for key, value in data.items():
+        if key not in SCHEMA:
+            errors.append(f'unknown key `{key}`')
+            continue
+        try:
+            values[key] = SCHEMA[key](value)
+        except ValueError as e:
+            errors.append(f'`{key}` {e}')
+    if errors:
+        raise Exception(f'Invalid config: {"; ".join(errors)}.')
+    return Config(**values)
+
+
+def load_config(path: pathlib.Path) -> Config:
+    '''
+    Reads and validates the TOML config file at `path`.
+    '''
+    if tomllib is None:
+        raise Exception(
+            'Reading config files needs Python 3.11+ or the `tomli` package.')
+    with open(path, 'rb') as f:
+        try:
+            data = tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise Exception(f'Invalid config `{path}`: {e}.')
+    return parse_config(data)
+
+
+def config_diff(old: Config, new: Config) -> Set[str]:
+    '''
+    Returns the names of the fields that differ between two configs.
+    '''
+    return {f.name for f in dataclasses.fields(Config)
+            if getattr(old, f.name) != getattr(new, f.name)}
+
+
+class ConfigWatcher:
+    '''
+    Reloads a config file when its modification time changes.
+    The file is stat-ed at most every `poll_ms`, also while the window is
+    idle, and reloaded at the start of the next tick. An invalid file is
+    logged and skipped, so the running config stays in place until it is fixed.
+    The same goes for a config that `on_change` fails to apply.
+    '''
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        window: PyGame_Window,
+        on_change: Callable[[Config], None],
+        poll_ms: float = 500,
+    ):
+        self.LOG = LOG.bind(tag='ConfigWatcher')
+        self.path = pathlib.Path(path)
+        self.on_change = on_change
+        self.poll_ms = poll_ms
+        self._mtime = self._stat()
+        self._next_poll = 0.0
+        self._changed = False
+        self._unbind_redraw = window.register_redraw_check(self.poll)
+        self._unbind_tick = window.register_tick_listener(
+            self._on_tick, stage='tick_start')
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def poll(self) -> bool:
+        '''
+        Returns True if the file changed since it was last loaded.
+        '''
+        now = time.monotonic()
+        if not self._changed and now >= self._next_poll:
+            self._next_poll = now + self.poll_ms / 1000
+            mtime = self._stat()
+            if mtime != self._mtime:
+                self._mtime = mtime
+                self._changed = True
+        return self._changed
+
+    def _on_tick(self, window: PyGame_Window):
+        if not self.poll():
+            return
+        self._changed = False
+        try:
+            config = load_config(self.path)
+        except Exception as e:
+            self.LOG.error(f'Keeping the current config: {e}')
+            return
+        self.LOG.info(f'Reloaded <y>{self.path}</>.')
+        try:
+            self.on_change(config)
+        except Exception as e:
+            self.LOG.opt(exception=e).error(
+                f'Keeping the current config, applying <y>{self.path}</> failed: {e}')
+
+    def close(self):
+        self._unbind_redraw()
+        self._unbind_tick()
@@ -0,0 +1,151 @@
+import cProfile
+import io
+import pathlib
+import pstats
+import sys
+import time
+import tracemalloc
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+from soccer_agent.GUI.window import PyGame_Window
+from ..__init__ import LOG
+
+
+class Profiler:
+    '''
+    Captures cProfile and tracemalloc stats of a running window.
+    Once armed, it profiles either the next `ticks` window ticks or the next
+    call of a wrapped function (see `wrap`), then dumps a report to `output_dir`.
+    While capturing ticks, it also records per-frame counters: frame time,
+    allocated memory blocks and any counter added with `add_counter`.
+    Modes:
+        - ticks
+        - call
+    '''
+
+    def __init__(
+        self,
+        window: PyGame_Window,
+        output_dir: pathlib.Path = pathlib.Path('profiles'),
+        ticks: int = 60,
+        top: int = 25,
+    ):
+        self.LOG = LOG.bind(tag='Profiler')
+        self.output_dir = pathlib.Path(output_dir)
+        self.ticks = ticks
+        self.top = top
+        self.mode = None
+        self.counters: Dict[str, Callable[[], int]] = dict()
+        self._profile: Optional[cProfile.Profile] = None
+        self._ticks_left = 0
+        self._frames: List[Dict[str, float]] = []
+        self._frame_start = None
+        self._started_tracemalloc = False
+        window.register_tick_listener(self._on_tick_start, stage='tick_start')
+        # Sampled after the flip, so frames include every render listener
+        window.register_tick_listener(self._on_frame_end, stage='frame_end')
+        # Keep an idle window ticking until the capture is done
+        window.register_redraw_check(lambda: self.mode == 'ticks' or self.capturing)
+
+    @property
+    def capturing(self) -> bool:
+        return self._profile is not None
+
+    def arm(self, mode: str = 'ticks', ticks: Optional[int] = None):
+        '''
+        Profiles the next `ticks` ticks, or the next wrapped call if mode is 'call'.
+        '''
+        if mode not in ('ticks', 'call',):
+            raise Exception(f'Invalid argument `{mode}` passed for profiler mode.')
+        if self.mode is not None or self.capturing:
+            self.LOG.warning('Profiler already armed, ignoring.')
+            return
+        self.mode = mode
+        self._ticks_left = ticks or self.ticks
+        what = f'next {self._ticks_left} ticks' if mode == 'ticks' else 'next call'
+        self.LOG.info(f'Profiler armed for <y>{what}</>.')
+
+    def add_counter(self, name: str, counter: Callable[[], int]):
+        '''
+        Samples `counter` at the end of every captured tick.
+        '''
+        self.counters[name] = counter
+
+    def wrap(self, fn: Callable) -> Callable:
+        '''
+        Returns `fn` wrapped so that it is profiled when armed with mode 'call'.
+        '''
+        @wraps(fn)
+        def wrapped(*args, **kwargs):
+            if self.mode != 'call' or self.capturing:
+                return fn(*args, **kwargs)
+            self._start()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._stop(label=fn.__name__)
+        return wrapped
+
+    def _start(self):
+        self._frames = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def _stop(self, label: str):
+        self._profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        path = self._dump(label, self._profile, snapshot)
+        self._profile = None
+        self.mode = None
+        self.LOG.info(f'Profile written to <y>{path}</>.')
+
+    def _on_tick_start(self, window: PyGame_Window):
+        if self.mode == 'ticks' and not self.capturing:
+            self._start()
+        if self.capturing and self.mode == 'ticks':
+            self._frame_start = (time.perf_counter(), sys.getallocatedblocks())
+
+    def _on_frame_end(self, window: PyGame_Window):
+        if not (self.capturing and self.mode == 'ticks'):
+            return
+        start, blocks = self._frame_start
+        frame = {
+            'frame_ms': (time.perf_counter() - start) * 1e3,
+            'alloc_blocks': sys.getallocatedblocks() - blocks,
+        }
+        for name, counter in self.counters.items():
+            frame[name] = counter()
+        self._frames.append(frame)
+        self._ticks_left -= 1
+        if self._ticks_left <= 0:
+            self._stop(label='ticks')
+
+    def _dump(self, label: str, profile: cProfile.Profile, snapshot: tracemalloc.Snapshot) -> pathlib.Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = self.output_dir / \
+            f'profile-{label}-{time.strftime("%Y%m%d-%H%M%S")}'
+        profile.dump_stats(stem.with_suffix('.prof'))
+        out = io.StringIO()
+        out.write(f'# cProfile, top {self.top} by cumulative time\n')
+        pstats.Stats(profile, stream=out).sort_stats(
+            'cumulative').print_stats(self.top)
+        out.write(f'\n# tracemalloc, top {self.top} allocations by line\n')
+        for stat in snapshot.statistics('lineno')[:self.top]:
+            out.write(f'{stat}\n')
+        if self._frames:
+            names = list(self._frames[0].keys())
+            out.write('\n# per-frame counters\n')
+            out.write('frame ' + ' '.join(names) + '\n')
+            for i, f in enumerate(self._frames):
+                out.write(f'{i} ' + ' '.join(f'{f[n]:.3f}' if isinstance(
+                    f[n], float) else str(f[n]) for n in names) + '\n')
+        path = stem.with_suffix('.txt')
+        path.write_text(out.getvalue())
+        return path
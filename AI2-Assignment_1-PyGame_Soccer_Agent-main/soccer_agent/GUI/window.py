@@ -1,5 +1,7 @@
 from asyncio.events import AbstractEventLoop
-from typing import Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+from time import perf_counter
+from typing import Callable, List, Optional
 
 from pygame.constants import VIDEORESIZE
 from soccer_agent.IO.pygame_io import KeybindHost
@@ -8,9 +10,18 @@ import asyncio
 from ..__init__ import LOG
 
 from pygame.locals import (
+    ACTIVEEVENT,
+    KEYDOWN,
+    KEYUP,
     QUIT,
+    VIDEOEXPOSE,
 )
 
+# Events always let through to the event queue, see `PyGame_Window.filter_events`.
+# pygame 2 reports most window changes as WINDOW* events, SDL needs them too.
+WINDOW_EVENT_TYPES = [QUIT, VIDEORESIZE, VIDEOEXPOSE, ACTIVEEVENT, KEYDOWN, KEYUP] + [
+    getattr(pygame, name) for name in dir(pygame) if name.startswith('WINDOW')]
+
 
 class PyGame_Dependent:
     '''
@@ -36,22 +47,61 @@ class PyGame_Window(PyGame_Dependent, KeybindHost):
         width: int,
         height: int,
         tick_rate: int = 20,
-        event_loop: AbstractEventLoop = asyncio.get_event_loop()
+        event_loop: Optional[AbstractEventLoop] = None,
+        idle_timeout_ms: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        max_workers: int = 2,
     ):
+        '''
+        The window runs while the `event_loop` coroutine is awaited, on any
+        running asyncio loop. It never blocks that loop between ticks, so
+        other tasks, e.g. network I/O, run alongside it.
+        If `event_loop` is given, the coroutine is scheduled on it right away.
+
+        If `idle_timeout_ms` is given, ticks are skipped while no input arrives
+        and no redraw check (see `register_redraw_check`) reports a change.
+        The window then sleeps on the loop between event polls, starting at
+        one tick and doubling up to `idle_timeout_ms`, so input soon after a
+        change is handled within a tick and a long idle window rarely wakes up.
+
+        Async keybind actions and `run_in_executor` use `executor`, by
+        default a thread pool of `max_workers` threads owned by the window.
+        '''
         super().__init__()
         # create a window
         self.title = title
         self.window = pygame.display.set_mode([width, height])
         self.tick_rate = tick_rate
-        self.tick_clock = pygame.time.Clock()
+        self.running = False
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='window')
         self.tick_listeners = {
             'tick_start': [],
             'tick_end': [],
+            'frame_end': [],
         }
+        self.idle_timeout_ms = idle_timeout_ms
+        self.redraw_checks: List[Callable[[], bool]] = []
+        # No. of idle sleeps that ended without any event
+        self.idle_timeouts = 0
         pygame.display.set_caption(title)
-        # init. data structures
+        self.filter_events()
         # run async window event loop
-        event_loop.create_task(self.event_loop())
+        if event_loop is not None:
+            event_loop.create_task(self.event_loop())
+
+    def filter_events(self):
+        '''
+        Only lets window events, key presses and event types with a keybind into the event queue.
+        Everything else, e.g. mouse motion, is dropped by pygame before it is queued.
+        '''
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(WINDOW_EVENT_TYPES + list(self.bound_event_types))
+
+    def register_keybind(self, key, action_key: str):
+        super().register_keybind(key, action_key)
+        self.filter_events()
 
     def register_tick_listener(self, listener: Callable[['PyGame_Window'], None], stage='tick_end'):
         '''
@@ -59,43 +109,116 @@ class PyGame_Window(PyGame_Dependent, KeybindHost):
         Allowed stages:
             - tick_start
             - tick_end 
+            - frame_end, after every tick_end listener drew and the display flipped
         
         Returns: A callback to delete this listener.
         '''
-        if not (stage in ('tick_start', 'tick_end',)):
+        if not (stage in ('tick_start', 'tick_end', 'frame_end',)):
             raise Exception(f'Invalid argument `{stage}` passed for stage in register tick listener.')
-        def remove(x=listener):
-            del x
-        self.tick_listeners[stage].append(listener)
+        listeners = self.tick_listeners[stage]
+        listeners.append(listener)
+
+        def remove():
+            if listener in listeners:
+                listeners.remove(listener)
         return remove
 
+    def set_mode(self, size, scaled: bool = True) -> pygame.Surface:
+        '''
+        Resizes the window. If `scaled`, its contents scale with the window
+        when the video driver has a renderer for it, headless drivers such
+        as `dummy` get an unscaled window instead.
+        '''
+        try:
+            self.window = pygame.display.set_mode(
+                size, flags=pygame.SCALED if scaled else 0)
+        except pygame.error as e:
+            if not scaled:
+                raise
+            LOG.warning(f'Scaled window unavailable ({e}), using an unscaled one.')
+            self.window = pygame.display.set_mode(size)
+        return self.window
+
+    def register_redraw_check(self, check: Callable[[], bool]):
+        '''
+        Register a function that returns True while its part of the scene needs ticks,
+        e.g. because it changed since the last draw or is animating.
+
+        Returns: A callback to delete this check.
+        '''
+        self.redraw_checks.append(check)
+
+        def remove():
+            if check in self.redraw_checks:
+                self.redraw_checks.remove(check)
+        return remove
+
+    def needs_redraw(self) -> bool:
+        return any(check() for check in self.redraw_checks)
+
+    async def run_in_executor(self, fn: Callable, *args):
+        '''
+        Runs `fn(*args)` in the executor of this window without blocking the event loop.
+        '''
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def wait_for_change(self) -> List[pygame.event.Event]:
+        '''
+        Returns the pending events. In idle mode, sleeps until an event arrives
+        while nothing needs a redraw, so idle windows do no work.
+        SDL events are only read from the thread running the window, so the
+        queue is polled after every sleep rather than waited on in an executor.
+        '''
+        events = pygame.event.get()
+        delay = 1 / self.tick_rate
+        while (not events and self.idle_timeout_ms is not None
+               and not self.needs_redraw()):
+            await asyncio.sleep(min(delay, self.idle_timeout_ms / 1000))
+            events = pygame.event.get()
+            if not events:
+                self.idle_timeouts += 1
+                delay *= 2
+        return events
+
     async def event_loop(self, ):
         '''
-        The asynchronous event loop for this window.
+        The asynchronous event loop for this window, returns once it is closed.
         '''
         with LOG.contextualize(tag=self.title):
             self.running = True
-            while self.running:
-                # tick listeners
-                for l in self.tick_listeners['tick_start']:
-                    l(self)
-                # Process events
-                events = pygame.event.get()
-                for event in events:
-                    # Handle keybinds
-                    self.handle_key_event(event)
-                    # Handle window events
-                    if event.type == QUIT:
-                        LOG.info('<r>Quit</> signal recieved, closing window.')
-                        self.running = False
-                    elif event.type == VIDEORESIZE:
-                        LOG.info('<y>Resize</> signal recieved, resizing window.')
-                        pygame.display._resize_event(event)
-                # tick listeners
-                for l in self.tick_listeners['tick_end']:
-                    l(self)
-                # Update the display
-                pygame.display.flip()
-                # wait for next game tick
-                self.tick_clock.tick(self.tick_rate)
-            pygame.display.quit()
+            try:
+                await self._run_ticks()
+            finally:
+                self.running = False
+                if self._owns_executor:
+                    self.executor.shutdown(wait=False)
+                pygame.display.quit()
+
+    async def _run_ticks(self):
+        while self.running:
+            # Sleeps while idle
+            events = await self.wait_for_change()
+            start = perf_counter()
+            # tick listeners
+            for l in self.tick_listeners['tick_start']:
+                l(self)
+            # Process events
+            for event in events:
+                # Handle keybinds
+                self.handle_key_event(event)
+                # Handle window events
+                if event.type == QUIT:
+                    LOG.info('<r>Quit</> signal recieved, closing window.')
+                    self.running = False
+                elif event.type == VIDEORESIZE:
+                    LOG.info('<y>Resize</> signal recieved, resizing window.')
+                    pygame.display._resize_event(event)
+            # tick listeners
+            for l in self.tick_listeners['tick_end']:
+                l(self)
+            # Update the display
+            pygame.display.flip()
+            for l in self.tick_listeners['frame_end']:
+                l(self)
+            # wait for next game tick, yielding to other tasks
+            await asyncio.sleep(max(1/self.tick_rate - (perf_counter() - start), 0))
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
 from typing import Callable, Optional
 from dataclasses import dataclass, field
 from ..__init__ import LOG
@@ -12,17 +13,20 @@ class KeybindAction(ABC):
     Extend this class to implement the `run()` function which is automatically called.
     Init. args:
         - description [str]: A description of this action.
-        - is_async [bool]: If True, the action is performed using asyncio.create_task.
-        - event_loop [asyncio.AbstractEventLoop]: If provided, uses this loop.
+        - is_async [bool]: If True, the action runs in an executor without blocking the event loop.
+        - event_loop [asyncio.AbstractEventLoop]: If provided, uses this loop, else the running loop.
+        - executor [Executor]: If provided, uses this executor, else the one of the keybind host.
     '''
 
     def __init__(
         self,
         is_async=False,
-        event_loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        event_loop: Optional[asyncio.AbstractEventLoop] = None,
+        executor: Optional[Executor] = None,
     ):
         self.is_async = is_async
         self.loop = event_loop
+        self.executor = executor
 
     @property
     @abstractmethod
@@ -36,11 +40,23 @@ class KeybindAction(ABC):
     def run(self,):
         raise NotImplementedError()
 
-    def _perform(self):
-        if self.is_async:
-            self.loop.run_in_executor(None, self.run)
-        else:
+    def _perform(self, executor: Optional[Executor] = None) -> Optional[asyncio.Future]:
+        '''
+        Runs the action, async actions run in `self.executor` or else `executor`.
+        Returns the future of an async action.
+        '''
+        if not self.is_async:
             self.run()
+            return None
+        loop = self.loop or asyncio.get_running_loop()
+        fut = loop.run_in_executor(self.executor or executor, self.run)
+        fut.add_done_callback(self._log_error)
+        return fut
+
+    def _log_error(self, fut: asyncio.Future):
+        if not fut.cancelled() and fut.exception() is not None:
+            LOG.opt(exception=fut.exception()).error(
+                f'Keybind action "{self.description}" failed.')
 
 
 class KeybindAction_Callable(KeybindAction):
@@ -49,8 +65,9 @@ class KeybindAction_Callable(KeybindAction):
     Extend this class to implement the `run()` function which is automatically called.
     Init. args:
         - description [str]: A description of this action.
-        - is_async [bool]: If True, the action is performed using asyncio.create_task.
-        - event_loop [asyncio.AbstractEventLoop]: If provided, uses this loop.
+        - is_async [bool]: If True, the action runs in an executor without blocking the event loop.
+        - event_loop [asyncio.AbstractEventLoop]: If provided, uses this loop, else the running loop.
+        - executor [Executor]: If provided, uses this executor, else the one of the keybind host.
     '''
 
     def __init__(
@@ -58,9 +75,10 @@ class KeybindAction_Callable(KeybindAction):
         callable: Callable,
         description: str,
         is_async=False,
-        event_loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
+        event_loop: Optional[asyncio.AbstractEventLoop] = None,
+        executor: Optional[Executor] = None,
     ):
-        super().__init__(is_async=is_async, event_loop=event_loop)
+        super().__init__(is_async=is_async, event_loop=event_loop, executor=executor)
         self.callable = callable
         self.desc = description
 
@@ -75,11 +93,42 @@ class KeybindAction_Callable(KeybindAction):
         return f"KeybindAction_Callable(is_async={self.is_async}, description='{self.desc}')"
 
 
+# Modifier groups, left and right keys are treated the same
+MODIFIER_GROUPS = (pygame.KMOD_SHIFT, pygame.KMOD_CTRL,
+                   pygame.KMOD_ALT, pygame.KMOD_META)
+
+
+def normalize_mod(mod: int) -> int:
+    '''
+    Reduces a pygame modifier mask to the modifier groups in MODIFIER_GROUPS.
+    Lock keys (caps, num) are ignored.
+    '''
+    out = 0
+    for group in MODIFIER_GROUPS:
+        if mod & group:
+            out |= group
+    return out
+
+
 @dataclass(eq=True, frozen=True)
 class KeybindKey:
     key_code: int
     on_keydown: bool = field(default=False)
     is_mouse: bool = field(default=False)
+    # Modifiers that must be held, e.g. pygame.KMOD_CTRL | pygame.KMOD_SHIFT
+    mod: int = field(default=pygame.KMOD_NONE)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'mod', normalize_mod(self.mod))
+
+    @property
+    def event_type(self) -> int:
+        '''
+        The pygame event type that triggers this keybind.
+        '''
+        if self.is_mouse:
+            return pygame.MOUSEBUTTONDOWN if self.on_keydown else pygame.MOUSEBUTTONUP
+        return pygame.KEYDOWN if self.on_keydown else pygame.KEYUP
 
     @staticmethod
     def from_pyGame_event(event: pygame.event.Event) -> Optional['KeybindKey']:
@@ -91,37 +140,67 @@ class KeybindKey:
             return None
         is_mouse = event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
         on_down = event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN)
-        mod = event.mod if not is_mouse else pygame.KMOD_NONE
+        mod = event.mod if not is_mouse else pygame.key.get_mods()
         code = event.button if is_mouse else event.key
-        return KeybindKey(key_code=code, on_keydown=on_down, is_mouse=is_mouse)
+        return KeybindKey(key_code=code, on_keydown=on_down, is_mouse=is_mouse, mod=mod)
 
     def is_active(self, event: pygame.event.Event):
         '''
         Returns true if the keybind is active in the given event.
+        Keybinds without modifiers are active whatever modifiers are held.
         '''
-        bind = KeybindKey.from_pyGame_event(event=event)
-        return bind != None and self == bind
+        if event.type != self.event_type:
+            return False
+        code = event.button if self.is_mouse else event.key
+        mod = pygame.key.get_mods() if self.is_mouse else event.mod
+        return code == self.key_code and self.mod in (normalize_mod(mod), pygame.KMOD_NONE)
 
 
 class KeybindHost:
     '''
     Mixin to handle configurable keybinds and I/O.
+    Keybinds are dispatched through a table of event type -> code -> modifiers -> action key,
+    so handling an event only costs a few dict lookups.
+    If no keybind matches the held modifiers, the keybind without modifiers runs.
     '''
 
     def __init__(self, log_name='KeybindHost'):
         super().__init__()
         self.actions = dict()
         self.bindings = dict()
+        self._dispatch = dict()
+        # Runs async actions, None uses the default executor of the event loop
+        self.executor: Optional[Executor] = None
         self.LOG = LOG.bind(tag=log_name)
 
+    @property
+    def bound_event_types(self):
+        '''
+        Returns the pygame event types that have at least one keybind.
+        '''
+        return set(self._dispatch.keys())
+
     def handle_key_event(self, event: pygame.event.Event):
-        keybind = KeybindKey.from_pyGame_event(event)
-        if keybind != None and keybind in self.bindings:
-            # Call binded action
-            action_key = self.bindings[keybind]
-            action = self.actions[action_key]
-            self.LOG.debug(f'Executing keybind action <r>"{action_key}"</> for: "<y>{keybind}</>".')
-            action._perform()
+        by_code = self._dispatch.get(event.type)
+        if by_code is None:
+            return
+        if event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
+            by_mod = by_code.get(event.key)
+            mod = event.mod
+        else:
+            by_mod = by_code.get(event.button)
+            mod = pygame.key.get_mods()
+        if by_mod is None:
+            return
+        action_key = by_mod.get(normalize_mod(mod))
+        if action_key is None:
+            action_key = by_mod.get(pygame.KMOD_NONE)
+        if action_key is None:
+            return
+        # Call binded action
+        action = self.actions[action_key]
+        self.LOG.debug(f'Executing keybind action <r>"{action_key}"</>.')
+        action._perform(self.executor)
 
     def register_keybind(self, key: KeybindKey, action_key: str):
         '''
@@ -132,6 +211,8 @@ class KeybindHost:
             raise Exception(
                 f'Invalid action key `{action_key}` provided to register keybind function.')
         self.bindings[key] = action_key
+        self._dispatch.setdefault(key.event_type, dict()).setdefault(
+            key.key_code, dict())[key.mod] = action_key
         self.LOG.info(
             f'Registered keybind "<y>{key}</>" for action "<r>{action_key}</>".')
 
@@ -0,0 +1,239 @@
+'''
+Columnar storage of goal path solves.
+
+A results file is a FILE_HEADER followed by chunks. Every chunk is a
+CHUNK_HEADER, a directory of COLUMN_HEADER entries and then the raw column
+values in directory order, so readers can seek past columns they do not need.
+Columns are flat arrays, one value per row, path or point:
+    - kicker, goal_x, goal_y:            one per row
+    - passer_offsets, defender_offsets:  rows + 1 offsets into passer_xy / defender_xy, in points
+    - passer_xy, defender_xy:            x, y pairs
+    - path_offsets:                      rows + 1 offsets into the path columns
+    - path_color, path_length:           one per path, colors packed as 0xRRGGBBAA
+    - path_success:                      one per path, nan if not scored
+    - point_offsets:                     paths + 1 offsets into point_xy, in points
+    - point_xy:                          x, y pairs of every path
+Offsets start at 0 in every chunk, `ColumnarReader.read` rebases them when concatenating.
+Column types are standard size struct codes, so files read the same on every
+platform, the directory also records the item size of every column.
+'''
+import pathlib
+import struct
+import sys
+from array import array
+from math import nan
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from soccer_agent.Math.pass_graph import Layout
+from ..__init__ import LOG
+
+# magic, byte order ('l' or 'b')
+FILE_HEADER = struct.Struct('<6sc')
+MAGIC = b'SACOL2'
+# magic, no. of rows, no. of columns
+CHUNK_HEADER = struct.Struct('<4sII')
+CHUNK_MAGIC = b'CHNK'
+# name, struct code, item size, no. of bytes
+COLUMN_HEADER = struct.Struct('<16scBQ')
+
+# Struct codes of standard size, 'H' 2 bytes, 'I' 4 bytes and 'd' 8 bytes
+SCHEMA: Tuple[Tuple[str, str], ...] = (
+    ('kicker', 'H'),
+    ('goal_x', 'd'),
+    ('goal_y', 'd'),
+    ('passer_offsets', 'I'),
+    ('passer_xy', 'd'),
+    ('defender_offsets', 'I'),
+    ('defender_xy', 'd'),
+    ('path_offsets', 'I'),
+    ('path_color', 'I'),
+    ('path_length', 'd'),
+    ('path_success', 'd'),
+    ('point_offsets', 'I'),
+    ('point_xy', 'd'),
+)
+COLUMNS = tuple(name for name, _ in SCHEMA)
+
+
+def array_typecode(code: str) -> str:
+    '''
+    Returns the array typecode holding the standard size struct `code`.
+    Array items use the C sizes of the platform, so the typecode is picked by item size.
+    '''
+    size = struct.calcsize('<' + code)
+    if code in 'efd':
+        candidates = 'fd'
+    else:
+        candidates = 'bhilq' if code.islower() else 'BHILQ'
+    for typecode in candidates:
+        if array(typecode).itemsize == size:
+            return typecode
+    raise Exception(f'No array typecode of {size} bytes for `{code}`.')
+
+
+def pack_color(color) -> int:
+    r, g, b, *a = tuple(color)
+    return (r << 24) | (g << 16) | (b << 8) | (a[0] if a else 255)
+
+
+def unpack_color(value: int) -> Tuple[int, int, int, int]:
+    return (value >> 24) & 0xFF, (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
+class ColumnarWriter:
+    '''
+    Buffers solves and writes them as chunks of `chunk_rows` rows.
+    Use as a context manager, or call `close` to write the last chunk.
+    '''
+
+    def __init__(self, path: pathlib.Path, chunk_rows: int = 4096):
+        self.LOG = LOG.bind(tag='ColumnarWriter')
+        self.path = pathlib.Path(path)
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._file = open(self.path, 'wb')
+        self._file.write(FILE_HEADER.pack(MAGIC, sys.byteorder[:1].encode()))
+        self._reset()
+
+    def _reset(self):
+        self._columns: Dict[str, array] = {
+            name: array(array_typecode(code)) for name, code in SCHEMA}
+        for name in ('passer_offsets', 'defender_offsets', 'path_offsets', 'point_offsets'):
+            self._columns[name].append(0)
+        self._chunk_rows = 0
+
+    def append(self, layout: Layout, paths: Sequence[Tuple[object, List[Tuple[float, float]], float]], success: Optional[Sequence[float]] = None):
+        '''
+        Adds one solve, `paths` as returned by `Policy.goal_path`, with the success probability of each path if known.
+        '''
+        c = self._columns
+        c['kicker'].append(layout.kicker)
+        c['goal_x'].append(layout.goal.x)
+        c['goal_y'].append(layout.goal.y)
+        for prefix, points in (('passer', layout.passers), ('defender', layout.defenders)):
+            xy = c[f'{prefix}_xy']
+            for p in points:
+                xy.append(p.x)
+                xy.append(p.y)
+            c[f'{prefix}_offsets'].append(len(xy) // 2)
+        for i, (color, points, length) in enumerate(paths):
+            c['path_color'].append(pack_color(color))
+            c['path_length'].append(length)
+            c['path_success'].append(success[i] if success is not None else nan)
+            for x, y in points:
+                c['point_xy'].append(x)
+                c['point_xy'].append(y)
+            c['point_offsets'].append(len(c['point_xy']) // 2)
+        c['path_offsets'].append(len(c['path_length']))
+        self._chunk_rows += 1
+        self.rows += 1
+        if self._chunk_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        '''
+        Writes the buffered rows as a chunk.
+        '''
+        if not self._chunk_rows:
+            return
+        cols = [(name, code, self._columns[name]) for name, code in SCHEMA]
+        self._file.write(CHUNK_HEADER.pack(
+            CHUNK_MAGIC, self._chunk_rows, len(cols)))
+        for name, code, values in cols:
+            self._file.write(COLUMN_HEADER.pack(
+                name.encode(), code.encode(), values.itemsize, len(values) * values.itemsize))
+        for _, _, values in cols:
+            values.tofile(self._file)
+        self.LOG.debug(f'Wrote chunk of <y>{self._chunk_rows}</> rows.')
+        self._reset()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> 'ColumnarWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ColumnarReader:
+    '''
+    Reads results files written by ColumnarWriter.
+    Only the requested columns are read from disk.
+    '''
+
+    def __init__(self, path: pathlib.Path):
+        self.path = pathlib.Path(path)
+        with open(self.path, 'rb') as f:
+            magic, order = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+        if magic != MAGIC:
+            raise Exception(f'`{self.path}` is not a results file.')
+        self._swap = order.decode() != sys.byteorder[:1]
+
+    def iter_chunks(self, columns: Optional[Sequence[str]] = None) -> Iterator[Tuple[int, Dict[str, array]]]:
+        '''
+        Yields (rows, columns) per chunk, offsets are relative to the chunk.
+        '''
+        wanted = set(COLUMNS if columns is None else columns)
+        unknown = wanted.difference(COLUMNS)
+        if unknown:
+            raise Exception(f'Unknown columns `{sorted(unknown)}` requested.')
+        with open(self.path, 'rb') as f:
+            f.seek(FILE_HEADER.size)
+            while True:
+                head = f.read(CHUNK_HEADER.size)
+                if not head:
+                    return
+                magic, rows, count = CHUNK_HEADER.unpack(head)
+                if magic != CHUNK_MAGIC:
+                    raise Exception(f'Corrupt chunk in `{self.path}`.')
+                directory = [COLUMN_HEADER.unpack(f.read(COLUMN_HEADER.size))
+                             for _ in range(count)]
+                chunk = dict()
+                for name, code, itemsize, size in directory:
+                    name = name.rstrip(b'\0').decode()
+                    if name not in wanted:
+                        f.seek(size, 1)
+                        continue
+                    code = code.decode()
+                    if struct.calcsize('<' + code) != itemsize:
+                        raise Exception(
+                            f'Column `{name}` of `{self.path}` has {itemsize} byte items, expected `{code}`.')
+                    values = array(array_typecode(code))
+                    values.frombytes(f.read(size))
+                    if self._swap:
+                        values.byteswap()
+                    chunk[name] = values
+                yield rows, chunk
+
+    def read(self, columns: Optional[Sequence[str]] = None) -> Dict[str, array]:
+        '''
+        Returns the requested columns (all if None) of every chunk concatenated.
+        '''
+        table: Dict[str, array] = dict()
+        for _, chunk in self.iter_chunks(columns):
+            for name, values in chunk.items():
+                if name not in table:
+                    table[name] = values
+                elif name.endswith('_offsets'):
+                    # Drop the leading 0 and shift past the previous chunks
+                    base = table[name][-1]
+                    table[name].extend(base + v for v in values[1:])
+                else:
+                    table[name].extend(values)
+        return table
+
+
+def decode_paths(table: Dict[str, array], row: int) -> List[Tuple[Tuple[int, int, int, int], List[Tuple[float, float]], float]]:
+    '''
+    Returns the (color, points, length) paths of a row of a table read with
+    at least the path_offsets, path_color, path_length, point_offsets and point_xy columns.
+    '''
+    offsets, points, xy = table['path_offsets'], table['point_offsets'], table['point_xy']
+    paths = []
+    for i in range(offsets[row], offsets[row+1]):
+        pts = [(xy[2*j], xy[2*j+1]) for j in range(points[i], points[i+1])]
+        paths.append((unpack_color(table['path_color'][i]), pts, table['path_length'][i]))
+    return paths
@@ -0,0 +1,226 @@
+'''
+Layouts and field zones in a `multiprocessing.shared_memory` block.
+
+The creating process packs every layout once. Worker processes receive a
+SharedLayoutsHandle, a few bytes to pickle, and attach to the block,
+reading positions in place instead of unpickling their own copy.
+
+Block layout, every section starts 8 byte aligned:
+    - HEADER
+    - passer_offsets, defender_offsets: int32, layouts + 1 offsets in points
+    - kicker: int32 per layout
+    - meta: float64 (goal x, goal y, radius) per layout
+    - points: float64 x, y pairs, passers of all layouts then defenders of all layouts
+    - zones: float64 (left, top, right, bottom) per zone, named in the handle
+'''
+import struct
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from soccer_agent.Math.geometry import Point
+from soccer_agent.Math.pass_graph import Layout
+from ..__init__ import LOG
+
+# magic, no. of layouts, no. of passers, no. of defenders, no. of zones
+HEADER = struct.Struct('<8sIIII')
+MAGIC = b'SALAYOUT'
+
+
+def _aligned(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def field_zones(field) -> Dict[str, Tuple[float, float, float, float]]:
+    '''
+    Returns the (left, top, right, bottom) of every zone of a SoccerField.
+    '''
+    names = ('upper', 'upper_small', 'center', 'lower',
+             'upper_goal', 'lower_small', 'lower_goal')
+    zones = dict()
+    for name in names:
+        bb = getattr(field, f'bb_{name}')
+        zones[name] = (bb.left, bb.top, bb.right, bb.bottom)
+    return zones
+
+
+@dataclass(frozen=True)
+class SharedLayoutsHandle:
+    '''
+    Everything a worker needs to attach to a SharedLayouts block.
+    '''
+    name: str
+    layouts: int
+    passers: int
+    defenders: int
+    zone_names: Tuple[str, ...]
+
+
+class SharedLayouts:
+    '''
+    Read only view of layouts packed in a shared memory block.
+    Create with `create` in the owning process, attach with `attach` in workers.
+    Views returned by the accessors point into the block and are only valid until `close`.
+    '''
+
+    def __init__(self, shm: shared_memory.SharedMemory, handle: SharedLayoutsHandle, owner: bool):
+        self.LOG = LOG.bind(tag='SharedLayouts')
+        self.shm = shm
+        self.handle = handle
+        self.owner = owner
+        n, p, d, z = handle.layouts, handle.passers, handle.defenders, len(
+            handle.zone_names)
+        buf = shm.buf
+        off = _aligned(HEADER.size)
+        sections = dict()
+        for name, code, count in (
+            ('passer_offsets', 'i', n + 1),
+            ('defender_offsets', 'i', n + 1),
+            ('kicker', 'i', n),
+            ('meta', 'd', 3*n),
+            ('points', 'd', 2*(p + d)),
+            ('zones', 'd', 4*z),
+        ):
+            size = count * struct.calcsize(code)
+            sections[name] = buf[off:off + size].cast(code)
+            off = _aligned(off + size)
+        self._sections = sections
+        self.passer_offsets = sections['passer_offsets']
+        self.defender_offsets = sections['defender_offsets']
+        self.kicker = sections['kicker']
+        self.meta = sections['meta']
+        self.points = sections['points']
+        self._zones = sections['zones']
+
+    @staticmethod
+    def nbytes(layouts: int, passers: int, defenders: int, zones: int) -> int:
+        '''
+        Returns the size of a block holding the given totals.
+        '''
+        size = _aligned(HEADER.size)
+        for b in (4*(layouts + 1), 4*(layouts + 1), 4*layouts, 8*3*layouts, 8*2*(passers + defenders), 8*4*zones):
+            size += _aligned(b)
+        return size
+
+    @staticmethod
+    def create(layouts: Sequence[Layout], zones: Optional[Dict[str, Tuple[float, float, float, float]]] = None) -> 'SharedLayouts':
+        '''
+        Packs `layouts` and the optional named `zones`, see `field_zones`, into a new block.
+        '''
+        zones = zones or dict()
+        passers = sum(len(l.passers) for l in layouts)
+        defenders = sum(len(l.defenders) for l in layouts)
+        size = SharedLayouts.nbytes(
+            len(layouts), passers, defenders, len(zones))
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        shm.buf[:HEADER.size] = HEADER.pack(
+            MAGIC, len(layouts), passers, defenders, len(zones))
+        handle = SharedLayoutsHandle(
+            name=shm.name,
+            layouts=len(layouts),
+            passers=passers,
+            defenders=defenders,
+            zone_names=tuple(zones),
+        )
+        shared = SharedLayouts(shm, handle, owner=True)
+        pts = shared.points
+        # Defender points come after the passers of every layout
+        p_off, d_off = 0, passers
+        shared.passer_offsets[0] = shared.defender_offsets[0] = 0
+        for i, l in enumerate(layouts):
+            for p in l.passers:
+                pts[2*p_off], pts[2*p_off + 1] = p.x, p.y
+                p_off += 1
+            for p in l.defenders:
+                pts[2*d_off], pts[2*d_off + 1] = p.x, p.y
+                d_off += 1
+            shared.passer_offsets[i + 1] = p_off
+            shared.defender_offsets[i + 1] = d_off - passers
+            shared.kicker[i] = l.kicker
+            shared.meta[3*i] = l.goal.x
+            shared.meta[3*i + 1] = l.goal.y
+            shared.meta[3*i + 2] = l.radius
+        for i, bounds in enumerate(zones.values()):
+            for j, v in enumerate(bounds):
+                shared._zones[4*i + j] = v
+        shared.LOG.debug(
+            f'Packed <y>{len(layouts)}</> layouts into <y>{size}</> bytes.')
+        return shared
+
+    @staticmethod
+    def attach(handle: SharedLayoutsHandle) -> 'SharedLayouts':
+        '''
+        Attaches to the block of `handle` without copying it.
+        '''
+        shm = shared_memory.SharedMemory(name=handle.name)
+        magic, *counts = HEADER.unpack_from(shm.buf)
+        expected = [handle.layouts, handle.passers,
+                    handle.defenders, len(handle.zone_names)]
+        if magic != MAGIC or counts != expected:
+            shm.close()
+            raise Exception(
+                f'Shared memory `{handle.name}` does not match its handle.')
+        return SharedLayouts(shm, handle, owner=False)
+
+    def __len__(self) -> int:
+        return self.handle.layouts
+
+    def passer_xy(self, i: int) -> memoryview:
+        '''
+        Returns the x, y pairs of the passers of layout `i`, in place.
+        '''
+        return self.points[2*self.passer_offsets[i]:2*self.passer_offsets[i + 1]]
+
+    def defender_xy(self, i: int) -> memoryview:
+        '''
+        Returns the x, y pairs of the defenders of layout `i`, in place.
+        '''
+        base = 2*self.handle.passers
+        return self.points[base + 2*self.defender_offsets[i]:base + 2*self.defender_offsets[i + 1]]
+
+    def layout(self, i: int) -> Layout:
+        '''
+        Builds the Layout object of layout `i`.
+        '''
+        def points(xy):
+            return tuple(Point(xy[j], xy[j + 1]) for j in range(0, len(xy), 2))
+        gx, gy, radius = self.meta[3*i:3*i + 3]
+        return Layout(
+            passers=points(self.passer_xy(i)),
+            defenders=points(self.defender_xy(i)),
+            goal=Point(gx, gy),
+            radius=radius,
+            kicker=self.kicker[i],
+        )
+
+    def zones(self) -> Dict[str, Tuple[float, float, float, float]]:
+        z = self._zones
+        return {name: tuple(z[4*i:4*i + 4]) for i, name in enumerate(self.handle.zone_names)}
+
+    def close(self):
+        '''
+        Releases the views and detaches, the owner also frees the block.
+        '''
+        for view in self._sections.values():
+            view.release()
+        self._sections.clear()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self) -> 'SharedLayouts':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def solve_shared(handle: SharedLayoutsHandle, start: int, stop: int, k: int, interception=None) -> List[List[Tuple[float, Tuple[int, ...]]]]:
+    '''
+    Worker entry point: solves layouts `start..stop` of a shared block.
+    Returns the top k (cost, path) pairs of every layout.
+    '''
+    from soccer_agent.Math.pass_graph import PassGraph
+    with SharedLayouts.attach(handle) as shared:
+        return [PassGraph.from_layout(shared.layout(i), interception).top_paths(k=k)
+                for i in range(start, stop)]
@@ -0,0 +1,383 @@
+'''
+Serves goal path solves over a local socket.
+
+Every message is framed as a 4 byte big-endian length followed by the payload.
+The first payload byte is the message type:
+    - b'S' solve request:  SOLVE_HEADER, then (x, y) floats for passers then defenders
+    - b'R' solve response: RESULT_HEADER, then per path PATH_HEADER and its node indices
+    - b'H' health request: no body
+    - b'M' health response: JSON encoded metrics
+Node indices refer to the passers of the request, index `len(passers)` is the goal.
+
+Run with: python -m soccer_agent.IO.solve_server --port 8765
+'''
+import argparse
+import asyncio
+import json
+import struct
+import time
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Tuple, Union
+
+from soccer_agent.Math.geometry import Point
+from soccer_agent.Math.pass_graph import InterceptionModel, Layout, PassGraph
+from ..__init__ import LOG
+
+FRAME = struct.Struct('!I')
+# type, request id, k, kicker, no. of passers, no. of defenders, radius, goal x, goal y
+SOLVE_HEADER = struct.Struct('!cIBHHHfff')
+# type, request id, status, no. of paths
+RESULT_HEADER = struct.Struct('!cIBB')
+# cost, length, no. of nodes
+PATH_HEADER = struct.Struct('!ffH')
+STATUS_OK = 0
+STATUS_ERROR = 1
+MAX_FRAME = 1 << 20
+
+Paths = List[Tuple[float, float, Tuple[int, ...]]]
+
+
+class InvalidRequest(ValueError):
+    '''
+    A solve request that cannot be solved, answered with STATUS_ERROR.
+    '''
+
+    def __init__(self, request_id: int, message: str):
+        super().__init__(message)
+        self.request_id = request_id
+
+
+def encode_solve_request(request_id: int, layout: Layout, k: int) -> bytes:
+    body = SOLVE_HEADER.pack(
+        b'S', request_id, k, layout.kicker, len(layout.passers), len(layout.defenders),
+        layout.radius, layout.goal.x, layout.goal.y)
+    pts = layout.passers + layout.defenders
+    coords = struct.pack(f'!{2*len(pts)}f', *(c for p in pts for c in (p.x, p.y)))
+    return body + coords
+
+
+def decode_solve_request(payload: bytes) -> Tuple[int, Layout, int]:
+    '''
+    Raises InvalidRequest if the payload size or header values do not describe a solvable layout.
+    '''
+    if len(payload) < SOLVE_HEADER.size:
+        # The request id is known if the payload gets that far
+        rid = struct.unpack_from('!I', payload, 1)[0] if len(payload) >= 5 else 0
+        raise InvalidRequest(rid, f'Payload of {len(payload)} bytes, shorter than the header.')
+    _, rid, k, kicker, n_pass, n_def, radius, gx, gy = SOLVE_HEADER.unpack_from(
+        payload)
+    n = n_pass + n_def
+    size = SOLVE_HEADER.size + 8*n
+    if len(payload) != size:
+        raise InvalidRequest(rid, f'Payload of {len(payload)} bytes, expected {size}.')
+    if n_pass < 1:
+        raise InvalidRequest(rid, 'No passers.')
+    if not 0 <= kicker < n_pass:
+        raise InvalidRequest(rid, f'Kicker {kicker} out of range for {n_pass} passers.')
+    if k < 1:
+        raise InvalidRequest(rid, f'Invalid no. of paths {k}.')
+    coords = struct.unpack_from(f'!{2*n}f', payload, SOLVE_HEADER.size)
+    pts = tuple(Point(coords[2*i], coords[2*i+1]) for i in range(n))
+    layout = Layout(passers=pts[:n_pass], defenders=pts[n_pass:],
+                    goal=Point(gx, gy), radius=radius, kicker=kicker)
+    return rid, layout, k
+
+
+def encode_solve_response(request_id: int, status: int, paths: Paths) -> bytes:
+    parts = [RESULT_HEADER.pack(b'R', request_id, status, len(paths))]
+    for cost, length, nodes in paths:
+        parts.append(PATH_HEADER.pack(cost, length, len(nodes)))
+        parts.append(struct.pack(f'!{len(nodes)}H', *nodes))
+    return b''.join(parts)
+
+
+def decode_solve_response(payload: bytes) -> Tuple[int, int, Paths]:
+    _, rid, status, count = RESULT_HEADER.unpack_from(payload)
+    offset = RESULT_HEADER.size
+    paths = []
+    for _ in range(count):
+        cost, length, n = PATH_HEADER.unpack_from(payload, offset)
+        offset += PATH_HEADER.size
+        nodes = struct.unpack_from(f'!{n}H', payload, offset)
+        offset += 2*n
+        paths.append((cost, length, nodes))
+    return rid, status, paths
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    size, = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if size > MAX_FRAME:
+        raise ValueError(f'Frame of {size} bytes exceeds limit.')
+    return await reader.readexactly(size)
+
+
+def write_frame(writer: asyncio.StreamWriter, payload: bytes):
+    writer.write(FRAME.pack(len(payload)) + payload)
+
+
+def solve_batch(batch: List[Tuple[Layout, int]], interception: Optional[InterceptionModel]) -> List[Union[Paths, Exception]]:
+    '''
+    Solves a batch of layouts in one call, so executor overhead is paid once per batch.
+    A layout that fails to solve gets its exception as result, the others are unaffected.
+    '''
+    results = []
+    for layout, k in batch:
+        try:
+            graph = PassGraph.from_layout(layout, interception=interception)
+            results.append([(c, graph.path_length(p), p)
+                            for c, p in graph.top_paths(k=k)])
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+class SolveServer:
+    '''
+    Asyncio server that micro-batches concurrent solve requests.
+    Requests wait in a bounded queue, connections stop being read while
+    it is full, which pushes back on clients through the socket buffers.
+    '''
+
+    def __init__(
+        self,
+        interception: Optional[InterceptionModel] = None,
+        max_batch: int = 64,
+        batch_window: float = 0.002,
+        max_pending: int = 1024,
+        executor: Optional[Executor] = None,
+    ):
+        self.LOG = LOG.bind(tag='SolveServer')
+        self.interception = interception
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.executor = executor
+        self.metrics = {
+            'requests': 0,
+            'errors': 0,
+            'batches': 0,
+            'connections': 0,
+            'solve_seconds': 0.0,
+        }
+        self._started = time.monotonic()
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0, path: Optional[str] = None):
+        '''
+        Starts listening on TCP `host:port` or on the unix socket `path` if given.
+        '''
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._batcher = asyncio.get_running_loop().create_task(self._run_batches())
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host=host, port=port)
+        self.LOG.info(f'Listening on <y>{self.address}</>.')
+        return self
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+
+    def health(self) -> Dict:
+        m = dict(self.metrics)
+        m['status'] = 'ok'
+        m['uptime'] = time.monotonic() - self._started
+        m['pending'] = self._queue.qsize()
+        m['mean_batch'] = m['requests'] / m['batches'] if m['batches'] else 0.0
+        return m
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.metrics['connections'] += 1
+        loop = asyncio.get_running_loop()
+        replies = set()
+        # Concurrent drain() calls on one writer fail before Python 3.10
+        drain_lock = asyncio.Lock()
+        try:
+            while True:
+                try:
+                    payload = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                kind = payload[:1]
+                if kind == b'H':
+                    write_frame(writer, b'M' + json.dumps(self.health()).encode())
+                elif kind == b'S':
+                    try:
+                        rid, layout, k = decode_solve_request(payload)
+                    except InvalidRequest as e:
+                        self.LOG.warning(f'Invalid request {e.request_id}: <r>{e}</>')
+                        self.metrics['errors'] += 1
+                        write_frame(writer, encode_solve_response(
+                            e.request_id, STATUS_ERROR, []))
+                    else:
+                        fut = loop.create_future()
+                        # Blocks reading from this client while the queue is full
+                        await self._queue.put((layout, k, fut))
+                        task = loop.create_task(
+                            self._reply(writer, drain_lock, rid, fut))
+                        replies.add(task)
+                        task.add_done_callback(replies.discard)
+                else:
+                    raise ValueError(f'Unknown message type `{kind}`.')
+                async with drain_lock:
+                    await writer.drain()
+        except Exception as e:
+            self.LOG.warning(f'Closing connection: <r>{e}</>')
+        finally:
+            if replies:
+                await asyncio.gather(*replies, return_exceptions=True)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _reply(self, writer: asyncio.StreamWriter, drain_lock: asyncio.Lock, rid: int, fut: asyncio.Future):
+        try:
+            paths = await fut
+            status = STATUS_OK
+        except Exception:
+            paths, status = [], STATUS_ERROR
+        write_frame(writer, encode_solve_response(rid, status, paths))
+        async with drain_lock:
+            await writer.drain()
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Collect whatever else arrives within the batch window. Sleeping
+            # rather than wait_for(get()), which can lose an item that arrives
+            # as it times out before Python 3.12.
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    await asyncio.sleep(timeout)
+                else:
+                    batch.append(self._queue.get_nowait())
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, solve_batch, [(l, k) for l, k, _ in batch], self.interception)
+            except Exception as e:
+                self.LOG.error(f'Batch solve failed: <r>{e}</>')
+                self.metrics['errors'] += len(batch)
+                for _, _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            self.metrics['solve_seconds'] += time.perf_counter() - start
+            self.metrics['batches'] += 1
+            self.metrics['requests'] += len(batch)
+            for (_, _, fut), paths in zip(batch, results):
+                if fut.done():
+                    continue
+                if isinstance(paths, Exception):
+                    self.LOG.warning(f'Solve failed: <r>{paths}</>')
+                    self.metrics['errors'] += 1
+                    fut.set_exception(paths)
+                else:
+                    fut.set_result(paths)
+
+
+class SolveClient:
+    '''
+    Client for SolveServer, requests on one connection are pipelined.
+    '''
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = dict()
+        self._health: List[asyncio.Future] = []
+        self._drain_lock = asyncio.Lock()
+        self._receiver = asyncio.get_running_loop().create_task(self._receive())
+
+    @staticmethod
+    async def connect(host: str = '127.0.0.1', port: int = 0, path: Optional[str] = None) -> 'SolveClient':
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return SolveClient(reader, writer)
+
+    async def solve(self, layout: Layout, k: int) -> Paths:
+        '''
+        Returns up to k (cost, length, node indices) paths, cheapest first.
+        '''
+        rid = self._next_id
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[rid] = fut
+        write_frame(self.writer, encode_solve_request(rid, layout, k))
+        async with self._drain_lock:
+            await self.writer.drain()
+        return await fut
+
+    async def health(self) -> Dict:
+        fut = asyncio.get_running_loop().create_future()
+        self._health.append(fut)
+        write_frame(self.writer, b'H')
+        async with self._drain_lock:
+            await self.writer.drain()
+        return await fut
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self._receiver.cancel()
+
+    async def _receive(self):
+        try:
+            while True:
+                payload = await read_frame(self.reader)
+                if payload[:1] == b'M':
+                    self._health.pop(0).set_result(json.loads(payload[1:]))
+                    continue
+                rid, status, paths = decode_solve_response(payload)
+                fut = self._pending.pop(rid)
+                if status == STATUS_OK:
+                    fut.set_result(paths)
+                else:
+                    fut.set_exception(RuntimeError(f'Solve {rid} failed on server.'))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            for fut in list(self._pending.values()) + self._health:
+                if not fut.done():
+                    fut.set_exception(ConnectionError('Connection closed.'))
+
+
+async def serve(host: str, port: int, path: Optional[str]):
+    server = await SolveServer(interception=InterceptionModel()).start(host, port, path)
+    await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Goal path solve server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='Unix socket path, overrides host and port.')
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.unix))
+
+
+if __name__ == '__main__':
+    main()
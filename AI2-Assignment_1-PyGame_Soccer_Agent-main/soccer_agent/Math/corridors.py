@@ -0,0 +1,139 @@
+from math import sqrt
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+from soccer_agent.Math.geometry import Point
+
+
+# (dx, dy, length, inv_length, bounds) of the pass from one point to
+# another, `(dx, dy)` is the pass vector and `bounds` the (left, top, right,
+# bottom) of the rectangle enclosing both points, padded by the radius.
+# Plain tuples, they are built for every pair of points.
+Corridor = Tuple[float, float, float, float, Tuple[float, float, float, float]]
+
+
+class CorridorCache:
+    '''
+    Pass geometry between every pair of points, e.g. the passers and goal of
+    a layout. `update` only recomputes the corridors of points that moved,
+    so solving the same layout again, or after moving a few players, reuses
+    every other corridor.
+
+    `edges[i][j]` caches the (visible, success) of the pass from `i` to `j`
+    tested against the blockers given to `update`, None until tested.
+    A pass only depends on the blockers inside its corridor, so only the
+    passes of moved points, or whose corridor a moved blocker entered or
+    left, are tested again. The success of every pass depends on all
+    defenders, it is None until computed again when `interception` changes.
+    '''
+
+    def __init__(self, radius: float = 0.0):
+        self.radius = radius
+        self.points: List[Point] = []
+        self.corridors: List[List[Optional[Corridor]]] = []
+        self.edges: List[List[Optional[Tuple[bool, Optional[float]]]]] = []
+        self._blockers: Optional[Tuple[Point, ...]] = None
+        self._interception = None
+        # No. of corridors computed
+        self.computed = 0
+        # No. of passes tested against the blockers, counted by the users of `edges`
+        self.tested = 0
+
+    def update(self, points: Sequence[Point], radius: Optional[float] = None, blockers: Optional[Sequence[Point]] = None, interception: Hashable = None) -> int:
+        '''
+        Sets the current points, returns how many of them moved.
+        A new `radius` or number of points recomputes every corridor.
+        `edges` are kept for the passes that no moved point or blocker
+        touches, a new `interception` key, e.g. the defenders and the
+        interception model, drops the success of every pass.
+        '''
+        points = list(points)
+        m = len(points)
+        if (radius is not None and radius != self.radius) or m != len(self.points):
+            if radius is not None:
+                self.radius = radius
+            self.corridors = [[None]*m for _ in range(m)]
+            moved = list(range(m))
+        else:
+            moved = [i for i, (p, q) in enumerate(zip(points, self.points)) if p != q]
+        if moved:
+            self.points = points
+            self._fill(moved)
+        blockers = None if blockers is None else tuple(blockers)
+        old = self._blockers
+        if len(moved) == m or blockers is None or old is None or len(blockers) != len(old):
+            self.edges = [[None]*m for _ in range(m)]
+        else:
+            self._drop_edges(moved, [p for q, p_old in zip(blockers, old)
+                                     if q != p_old for p in (q, p_old)])
+            if interception != self._interception:
+                self._drop_success()
+        self._blockers = blockers
+        self._interception = interception
+        return len(moved)
+
+    def _drop_edges(self, moved: Sequence[int], positions: Sequence[Point]):
+        '''
+        Drops the edges from and to `moved` points, and of the corridors holding any of `positions`.
+        '''
+        edges = self.edges
+        for i in moved:
+            row = edges[i]
+            for j in range(len(row)):
+                row[j] = edges[j][i] = None
+        if not positions:
+            return
+        rows = self.corridors
+        for i in range(len(rows)):
+            row, edge_row = rows[i], edges[i]
+            for j in range(i + 1, len(row)):
+                c = row[j]
+                if c is None or (edge_row[j] is None and edges[j][i] is None):
+                    continue
+                left, top, right, bottom = c[4]
+                for p in positions:
+                    if left <= p.x <= right and top <= p.y <= bottom:
+                        edge_row[j] = edges[j][i] = None
+                        break
+
+    def _drop_success(self):
+        for row in self.edges:
+            for j, e in enumerate(row):
+                if e is not None and e[0]:
+                    row[j] = (True, None)
+
+    def _fill(self, moved: Sequence[int]):
+        pts, rows, r = self.points, self.corridors, self.radius
+        done = set()
+        for i in moved:
+            p1 = pts[i]
+            x1, y1 = p1.x, p1.y
+            row = rows[i]
+            for j, p2 in enumerate(pts):
+                if j == i or j in done:
+                    continue
+                dx, dy = p2.x - x1, p2.y - y1
+                length = sqrt(dx*dx + dy*dy)
+                if length == 0:
+                    row[j] = rows[j][i] = None
+                    continue
+                bounds = (min(x1, p2.x) - r, min(y1, p2.y) - r,
+                          max(x1, p2.x) + r, max(y1, p2.y) + r)
+                inv = 1/length
+                row[j] = (dx, dy, length, inv, bounds)
+                # Same length and bounds, reversed direction
+                rows[j][i] = (-dx, -dy, length, inv, bounds)
+                self.computed += 1
+            done.add(i)
+
+    def get(self, i: int, j: int) -> Optional[Corridor]:
+        '''
+        Returns the corridor from point `i` to point `j`, None if they coincide.
+        '''
+        return self.corridors[i][j]
+
+    def clear(self):
+        self.points = []
+        self.corridors = []
+        self.edges = []
+        self._blockers = None
+        self._interception = None
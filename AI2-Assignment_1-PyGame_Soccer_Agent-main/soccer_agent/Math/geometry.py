@@ -189,7 +189,7 @@ class Rectangle:
 
     @property
     def right(self):
-        return self.top_left.x+self.bottom_right.x
+        return self.bottom_right.x
 
     @property
     def top(self):
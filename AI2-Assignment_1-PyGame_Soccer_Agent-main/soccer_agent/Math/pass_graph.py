@@ -0,0 +1,900 @@
+import heapq
+import random
+from array import array
+from dataclasses import dataclass
+from math import ceil, exp, floor, inf, log, sqrt
+from time import perf_counter
+from typing import List, Optional, Sequence, Tuple
+from soccer_agent.Math.corridors import CorridorCache
+from soccer_agent.Math.geometry import Point
+
+
+@dataclass(frozen=True, repr=True)
+class InterceptionModel:
+    '''
+    Models the chance of a defender reaching the ball while a pass is in flight.
+    Speeds are in pixels per second and times are in seconds.
+    '''
+    pass_speed: float = 300.0
+    defender_speed: float = 90.0
+    reaction_time: float = 0.2
+    # Spread of the logistic curve that maps time margins to probabilities
+    sharpness: float = 0.15
+    # Path length charged per unit of -ln(success) when ranking paths
+    risk_weight: float = 200.0
+
+    def intercept_probability(self, ball_time: float, reach_time: float) -> float:
+        '''
+        Returns the probability that a defender arriving at `reach_time` beats a ball arriving at `ball_time`.
+        '''
+        margin = (reach_time - ball_time) / self.sharpness
+        if margin > 50:
+            return 0.0
+        if margin < -50:
+            return 1.0
+        return 1 / (1 + exp(margin))
+
+
+def segment_blocked(p1: Point, p2: Point, dx: float, dy: float, inv_len: float, radius: float, blockers: Sequence[Point], bounds: Optional[Tuple[float, float, float, float]] = None) -> bool:
+    '''
+    Static collision test of the pass p1 -> p2 against every blocker.
+    A blocker collides if its center is within `radius` of the line through
+    p1, p2, i.e. |cross(p2 - p1, p1 - blocker)| / |p2 - p1| <= radius, and
+    inside the rectangle enclosing both points padded by `radius`, which
+    stands in for the segment ends. Blockers at p1 or p2 are the passer and
+    receiver themselves and never collide.
+    `(dx, dy)` is p2 - p1 and `inv_len` its inverse length, `bounds` the
+    (left, top, right, bottom) of the padded rectangle if already known.
+    '''
+    r = radius
+    if bounds is None:
+        left, right = min(p1.x, p2.x) - r, max(p1.x, p2.x) + r
+        top, bottom = min(p1.y, p2.y) - r, max(p1.y, p2.y) + r
+    else:
+        left, top, right, bottom = bounds
+    for p in blockers:
+        if p == p1 or p == p2:
+            continue
+        if not (left <= p.x <= right and top <= p.y <= bottom):
+            continue
+        lx, ly = p1.x - p.x, p1.y - p.y
+        if abs(dx*ly - lx*dy) * inv_len <= r:
+            return True
+    return False
+
+
+def pass_success(p1: Point, dx: float, dy: float, length: float, radius: float, model: Optional[InterceptionModel], defenders: Sequence[Point]) -> float:
+    '''
+    Probability that no defender intercepts the pass p1 -> p1 + (dx, dy).
+    Each defender runs for the closest point of the pass line.
+    '''
+    if model is None:
+        return 1.0
+    ux, uy = dx / length, dy / length
+    s = 1.0
+    for d in defenders:
+        wx, wy = d.x - p1.x, d.y - p1.y
+        along = min(max(wx*ux + wy*uy, 0.0), length)
+        cx, cy = wx - ux*along, wy - uy*along
+        reach = max(sqrt(cx*cx + cy*cy) - radius, 0.0) / model.defender_speed
+        s *= 1 - model.intercept_probability(
+            ball_time=along / model.pass_speed,
+            reach_time=reach + model.reaction_time
+        )
+    return s
+
+
+@dataclass(frozen=True, repr=True)
+class Layout:
+    '''
+    Player positions of a single layout, independent of any sprites.
+    Passers belong to the kicking team, defenders to the other team.
+    '''
+    passers: Tuple[Point, ...]
+    defenders: Tuple[Point, ...]
+    goal: Point
+    radius: float
+    kicker: int = 0
+
+    @staticmethod
+    def from_environment(environment) -> 'Layout':
+        '''
+        Returns the layout of the kicking team of the given environment.
+        Without a kicker, e.g. before the players are relocated, the first passer kicks.
+        '''
+        # Imported here since the policy module depends on this one
+        from soccer_agent.Sprites.player import Team
+        env = environment
+        if env.kick_team == Team.RED:
+            team, opponents = env.red_players, env.blue_players
+        else:
+            team, opponents = env.blue_players, env.red_players
+        return Layout(
+            passers=tuple(Point(*p.rect.center) for p in team),
+            defenders=tuple(Point(*p.rect.center) for p in opponents),
+            goal=Point(*env.field.bb_upper_goal.to_pygame().center),
+            radius=team[0].radius,
+            kicker=next((i for i, p in enumerate(team) if p is env.kicker), 0),
+        )
+
+
+def encode_path(path: Sequence[int]) -> bytes:
+    '''
+    Packs the node indices of a path into one byte each.
+    '''
+    return bytes(path)
+
+
+def sorted_top(best: list) -> List[Tuple[float, Tuple[int, ...]]]:
+    '''
+    Converts a max-heap of (-cost, -order, path) to (cost, path) pairs, cheapest first.
+    '''
+    return [(-c, tuple(p)) for c, _, p in sorted(best, reverse=True)]
+
+
+class PassGraph:
+    '''
+    Precomputed pass visibility between the players of a single layout.
+    Nodes `0..n-1` are the passers of the kicking team and node `n` is the goal.
+    For every ordered pair the graph stores the pass length, its success
+    probability and the ranking cost, all computed in one sweep over the edges.
+    '''
+
+    def __init__(
+        self,
+        passers: Sequence[Point],
+        blockers: Sequence[Point],
+        defenders: Sequence[Point],
+        goal: Point,
+        radius: float,
+        kicker: int,
+        interception: Optional[InterceptionModel] = None,
+        corridors: Optional[CorridorCache] = None,
+    ):
+        '''
+        `corridors` reuses the pass geometry of earlier graphs of the same
+        points, it is updated to the passers and goal of this graph.
+        '''
+        self._alloc(passers, goal, radius, kicker, interception)
+        self._build(list(blockers), list(defenders), corridors)
+
+    def _alloc(self, passers: Sequence[Point], goal: Point, radius: float, kicker: int, interception: Optional[InterceptionModel]):
+        if len(passers) > 254:
+            raise Exception(f'Too many passers ({len(passers)}), paths are encoded one byte per node.')
+        self.points = list(passers) + [goal]
+        self.n = len(passers)
+        self.goal = self.n
+        self.kicker = kicker
+        self.radius = radius
+        self.interception = interception
+        size = self.n + 1
+        self.length = [[inf]*size for _ in range(size)]
+        self.success = [[0.0]*size for _ in range(size)]
+        self.cost = [[inf]*size for _ in range(size)]
+        # Static visibility, ignoring interception
+        self.visible = [[False]*size for _ in range(size)]
+        # Feasible successors of every node, in index order
+        self.neighbours = [[] for _ in range(size)]
+
+    @staticmethod
+    def empty(
+        passers: Sequence[Point],
+        goal: Point,
+        radius: float,
+        kicker: int,
+        interception: Optional[InterceptionModel] = None,
+    ) -> 'PassGraph':
+        '''
+        Returns a graph without any edges, to be filled with `add_edge`.
+        '''
+        graph = PassGraph.__new__(PassGraph)
+        graph._alloc(passers, goal, radius, kicker, interception)
+        return graph
+
+    def add_edge(self, i: int, j: int, length: float, success: float):
+        '''
+        Adds the statically visible pass i -> j, edges must be added in index order of j.
+        Passes that are certain to be intercepted stay unconnected.
+        '''
+        self.visible[i][j] = True
+        if success <= 0:
+            return
+        weight = self.interception.risk_weight if self.interception else 0.0
+        self.length[i][j] = length
+        self.success[i][j] = success
+        self.cost[i][j] = length - weight*log(success)
+        self.neighbours[i].append(j)
+
+    @staticmethod
+    def from_layout(layout: Layout, interception: Optional[InterceptionModel] = None, corridors: Optional[CorridorCache] = None) -> 'PassGraph':
+        '''
+        Builds the pass graph of the given layout, every player blocks passes.
+        '''
+        return PassGraph(
+            passers=layout.passers,
+            blockers=layout.passers + layout.defenders,
+            defenders=layout.defenders,
+            goal=layout.goal,
+            radius=layout.radius,
+            kicker=layout.kicker,
+            interception=interception,
+            corridors=corridors,
+        )
+
+    @staticmethod
+    def from_environment(environment, interception: Optional[InterceptionModel] = None) -> 'PassGraph':
+        '''
+        Builds the pass graph for the kicking team of the given environment.
+        Reuses the corridor cache of the environment, see `Environment.corridors`.
+        '''
+        return PassGraph.from_layout(Layout.from_environment(environment), interception=interception,
+                                     corridors=getattr(environment, 'corridors', None))
+
+    def connects(self, i: int, j: int) -> bool:
+        '''
+        Returns True if a pass from node `i` to node `j` is not blocked by any player.
+        '''
+        return self.cost[i][j] < inf
+
+    def path_length(self, path: Sequence[int]) -> float:
+        return sum(self.length[a][b] for a, b in zip(path, path[1:]))
+
+    def path_success(self, path: Sequence[int]) -> float:
+        s = 1.0
+        for a, b in zip(path, path[1:]):
+            s *= self.success[a][b]
+        return s
+
+    def path_cost(self, path: Sequence[int]) -> float:
+        return sum(self.cost[a][b] for a, b in zip(path, path[1:]))
+
+    def path_points(self, path: Sequence[int]) -> List[Point]:
+        return [self.points[i] for i in path]
+
+    def top_paths(self, k: int, min_passes: int = 1) -> List[Tuple[float, Tuple[int, ...]]]:
+        '''
+        Returns up to k (cost, path) pairs from the kicker to the goal, cheapest first.
+        Paths are tuples of node indices with at least `min_passes` passes between teammates.
+
+        The search is an iterative DFS: visited nodes are an integer bitmask and
+        the current path is kept as parent pointers, so a path is only copied
+        out, one byte per node, when it enters the top k. Edge costs are
+        non-negative, so branches costing more than the current k-th best path are pruned.
+        '''
+        best = []
+        for _ in self._dfs_steps(k, min_passes, best):
+            pass
+        return sorted_top(best)
+
+    def _dfs_steps(self, k: int, min_passes: int, best: list, slice_steps: int = 256):
+        '''
+        Generator running the DFS of `top_paths`, it yields every `slice_steps` expansions.
+        `best` is a max-heap of (-cost, -order, path) that is updated in place,
+        it may be seeded with known encoded paths to tighten pruning from the start.
+        '''
+        if k <= 0:
+            return
+        goal = self.goal
+        cost = self.cost
+        can_goal = [self.connects(i, goal) for i in range(self.n)]
+        adj = [[j for j in self.neighbours[i] if j != goal]
+               for i in range(self.n)]
+        # Per depth frames of the DFS stack
+        node_at = [0]*self.n
+        cost_at = [0.0]*self.n
+        next_at = [0]*self.n
+        parent = [-1]*self.n
+        # Paths in `best`, only needed to skip seeded paths found again
+        seen = set(p for _, _, p in best)
+        found = len(best)
+        # Once full, the heap only takes paths cheaper than its most expensive one
+        full = len(best) >= k
+        bound = -best[0][0] if full else inf
+        node_at[0] = self.kicker
+        mask = 1 << self.kicker
+        depth = 0
+        steps = 0
+        while depth >= 0:
+            steps += 1
+            if steps == slice_steps:
+                steps = 0
+                yield
+            i = node_at[depth]
+            c = cost_at[depth]
+            idx = next_at[depth]
+            if idx == 0 and depth >= min_passes and can_goal[i]:
+                total = c + cost[i][goal]
+                if total < bound:
+                    # Materialize the path from parent pointers
+                    path = [goal]
+                    p = i
+                    while p != -1:
+                        path.append(p)
+                        p = parent[p]
+                    path = bytes(reversed(path))
+                    if path not in seen:
+                        item = (-total, -found, path)
+                        found += 1
+                        seen.add(path)
+                        if not full:
+                            heapq.heappush(best, item)
+                        else:
+                            seen.discard(heapq.heapreplace(best, item)[2])
+                        if len(best) >= k:
+                            full = True
+                            bound = -best[0][0]
+            nbrs = adj[i]
+            while idx < len(nbrs):
+                j = nbrs[idx]
+                idx += 1
+                if (mask >> j) & 1:
+                    continue
+                cj = c + cost[i][j]
+                if cj >= bound:
+                    continue
+                # Descend into j
+                next_at[depth] = idx
+                parent[j] = i
+                mask |= 1 << j
+                depth += 1
+                node_at[depth] = j
+                cost_at[depth] = cj
+                next_at[depth] = 0
+                break
+            else:
+                # All neighbours explored, backtrack
+                mask &= ~(1 << i)
+                parent[i] = -1
+                depth -= 1
+
+    def top_paths_all_sources(self, k: int, min_passes: int = 1) -> List[List[Tuple[float, Tuple[int, ...]]]]:
+        '''
+        Returns, for every passer as the kicker, up to k (cost, path) pairs to the goal, cheapest first.
+        Per passer, the result matches `top_paths` on a graph with that kicker, up to the order of tied paths.
+
+        A single DFS runs backwards from the goal over incoming passes, so a
+        partial path is a suffix shared by every kicker that can reach it,
+        and the suffix starting at a passer is a candidate for that passer's
+        top k. Extending a suffix back to kicker u costs at least the
+        cheapest u -> suffix cost, precomputed for all pairs, so a branch is
+        pruned once that bound reaches the k-th best path of every passer not on it.
+        '''
+        n = self.n
+        best = [[] for _ in range(n)]
+        if k <= 0:
+            return [[] for _ in range(n)]
+        goal = self.goal
+        cost = self.cost
+        # Incoming passes between teammates
+        into = [[] for _ in range(n)]
+        for i in range(n):
+            for j in self.neighbours[i]:
+                if j != goal:
+                    into[j].append(i)
+        # to[j][u], cheapest cost of any walk u -> j, by Floyd-Warshall
+        to = [[0.0 if u == j else cost[u][j] for u in range(n)] for j in range(n)]
+        for m in range(n):
+            via = to[m]
+            for j in range(n):
+                row = to[j]
+                mj = row[m]
+                if mj == inf:
+                    continue
+                for u in range(n):
+                    if via[u] + mj < row[u]:
+                        row[u] = via[u] + mj
+        # k-th best cost per kicker once its heap is full
+        bound = [inf]*n
+        found = 0
+        # Per depth frames of the DFS stack, depth 0 is the passer shooting on goal
+        node_at = [0]*n
+        cost_at = [0.0]*n
+        next_at = [0]*n
+        for shooter in range(n):
+            if not self.connects(shooter, goal):
+                continue
+            node_at[0] = shooter
+            cost_at[0] = cost[shooter][goal]
+            next_at[0] = 0
+            mask = 1 << shooter
+            depth = 0
+            while depth >= 0:
+                i = node_at[depth]
+                c = cost_at[depth]
+                idx = next_at[depth]
+                if idx == 0 and depth >= min_passes and c < bound[i]:
+                    path = bytes(node_at[depth::-1]) + bytes((goal,))
+                    heap = best[i]
+                    item = (-c, -found, path)
+                    found += 1
+                    if len(heap) < k:
+                        heapq.heappush(heap, item)
+                    else:
+                        heapq.heapreplace(heap, item)
+                    if len(heap) >= k:
+                        bound[i] = -heap[0][0]
+                # Only kickers not on the suffix yet can extend it
+                free = [u for u in range(n) if not (mask >> u) & 1]
+                nbrs = into[i]
+                while idx < len(nbrs):
+                    j = nbrs[idx]
+                    idx += 1
+                    if (mask >> j) & 1:
+                        continue
+                    cj = c + cost[j][i]
+                    reach = to[j]
+                    if all(cj + reach[u] >= bound[u] for u in free):
+                        continue
+                    # Extend the suffix back to j
+                    next_at[depth] = idx
+                    mask |= 1 << j
+                    depth += 1
+                    node_at[depth] = j
+                    cost_at[depth] = cj
+                    next_at[depth] = 0
+                    break
+                else:
+                    # All passers into i explored, backtrack
+                    mask &= ~(1 << i)
+                    depth -= 1
+        return [sorted_top(b) for b in best]
+
+    def beam_paths(self, k: int, width: int, min_passes: int = 1) -> List[Tuple[float, Tuple[int, ...]]]:
+        '''
+        Returns up to k (cost, path) pairs found by a beam search, cheapest first.
+        Only the `width` cheapest partial paths are extended at every depth,
+        so the result is fast but not guaranteed to be optimal.
+        '''
+        goal = self.goal
+        cost = self.cost
+        beam = [(0.0, self.kicker, 1 << self.kicker, (self.kicker,))]
+        found = []
+        depth = 0
+        while beam:
+            if depth >= min_passes:
+                for c, i, _, path in beam:
+                    if self.connects(i, goal):
+                        found.append((c + cost[i][goal], path + (goal,)))
+            nxt = [
+                (c + cost[i][j], j, mask | (1 << j), path + (j,))
+                for c, i, mask, path in beam
+                for j in self.neighbours[i]
+                if j != goal and not (mask >> j) & 1
+            ]
+            beam = heapq.nsmallest(width, nxt, key=lambda x: x[0])
+            depth += 1
+        found.sort(key=lambda x: x[0])
+        return found[:k]
+
+    @staticmethod
+    def subset_dp_bytes(n: int, k: int) -> int:
+        '''
+        Returns the size in bytes of the table used by `top_paths_subset_dp` for n passers.
+        '''
+        m = max(n - 1, 0)
+        # One double for the cost and one int for the back pointer per entry
+        return (1 << m) * m * k * (8 + 4)
+
+    def top_paths_subset_dp(self, k: int) -> List[Tuple[float, Tuple[int, ...]]]:
+        '''
+        Exact top k paths using a Held-Karp style DP over (visited bitmask, last player).
+        Same result as `top_paths` with `min_passes=1`.
+
+        Every state keeps its k cheapest prefixes, which is enough since two
+        paths ending in the same state share every possible completion.
+        Runs in O(2^n * n^2 * k) time, see `subset_dp_bytes` for memory.
+        '''
+        if k <= 0 or self.n < 2:
+            return []
+        goal = self.goal
+        cost = self.cost
+        # Bit positions for every passer other than the kicker
+        others = [i for i in range(self.n) if i != self.kicker]
+        m = len(others)
+        bit_of = {p: b for b, p in enumerate(others)}
+        adj = [[bit_of[j] for j in self.neighbours[p] if j != goal and j != self.kicker]
+               for p in others]
+        step = [[cost[p][others[b]] for b in range(m)] for p in others]
+        # table[((mask*m)+last)*k + rank], back pointers hold last*k+rank of the prefix
+        size = (1 << m) * m * k
+        table = array('d', [inf]) * size
+        back = array('i', [-1]) * size
+
+        def insert(o, v, b):
+            if v >= table[o + k - 1]:
+                return
+            r = o + k - 1
+            while r > o and table[r - 1] > v:
+                table[r] = table[r - 1]
+                back[r] = back[r - 1]
+                r -= 1
+            table[r] = v
+            back[r] = b
+
+        for j in self.neighbours[self.kicker]:
+            if j != goal:
+                b = bit_of[j]
+                insert(((1 << b)*m + b)*k, cost[self.kicker][j], -1)
+        # Supersets always have larger masks, so increasing order is topological
+        for mask in range(1, 1 << m):
+            for last in range(m):
+                o = (mask*m + last)*k
+                if not (mask >> last) & 1 or table[o] == inf:
+                    continue
+                row = step[last]
+                for b in adj[last]:
+                    if (mask >> b) & 1:
+                        continue
+                    no = ((mask | (1 << b))*m + b)*k
+                    c = row[b]
+                    for r in range(k):
+                        v = table[o + r]
+                        if v == inf or v + c >= table[no + k - 1]:
+                            break
+                        insert(no, v + c, last*k + r)
+        # Close every state with a shot on goal
+        best = []
+        for last in range(m):
+            p = others[last]
+            if not self.connects(p, goal):
+                continue
+            c = cost[p][goal]
+            for mask in range(1, 1 << m):
+                o = (mask*m + last)*k
+                for r in range(k):
+                    v = table[o + r]
+                    if v == inf:
+                        break
+                    best.append((v + c, mask, last, r))
+        best.sort()
+        result = []
+        for total, mask, last, r in best[:k]:
+            path = [goal]
+            while True:
+                path.append(others[last])
+                b = back[(mask*m + last)*k + r]
+                if b == -1:
+                    break
+                mask &= ~(1 << last)
+                last, r = divmod(b, k)
+            path.append(self.kicker)
+            result.append((total, tuple(reversed(path))))
+        return result
+
+    def _build(self, blockers: List[Point], defenders: List[Point], corridors: Optional[CorridorCache] = None):
+        if corridors is not None:
+            return self._build_cached(blockers, defenders, corridors)
+        pts = self.points
+        for i in range(self.n):
+            p1 = pts[i]
+            for j in range(self.n + 1):
+                if i == j:
+                    continue
+                p2 = pts[j]
+                dx, dy = p2.x - p1.x, p2.y - p1.y
+                length = sqrt(dx*dx + dy*dy)
+                if length == 0:
+                    continue
+                # Static blocking is symmetric, reuse the reverse pass if known
+                if j < self.n and j < i:
+                    visible = self.visible[j][i]
+                else:
+                    visible = not segment_blocked(
+                        p1, p2, dx, dy, 1/length, self.radius, blockers)
+                if visible:
+                    self.add_edge(i, j, length, pass_success(
+                        p1, dx, dy, length, self.radius, self.interception, defenders))
+
+    def _build_cached(self, blockers: List[Point], defenders: List[Point], corridors: CorridorCache):
+        '''
+        Same as `_build`, but only tests the passes that `corridors` has no edge for.
+        '''
+        pts = self.points
+        corridors.update(pts, radius=self.radius, blockers=blockers, interception=(
+            tuple(defenders), self.interception) if self.interception else None)
+        tested = 0
+        for i in range(self.n):
+            p1 = pts[i]
+            row, edges = corridors.corridors[i], corridors.edges[i]
+            for j in range(self.n + 1):
+                c = row[j]
+                if c is None:
+                    continue
+                known = edges[j]
+                if known is None or known[1] is None:
+                    dx, dy, length, inv_len, bounds = c
+                    if known is not None:
+                        visible = True
+                    elif j < self.n and j < i:
+                        visible = self.visible[j][i]
+                    else:
+                        visible = not segment_blocked(
+                            p1, pts[j], dx, dy, inv_len, self.radius, blockers, bounds)
+                        tested += 1
+                    success = pass_success(
+                        p1, dx, dy, length, self.radius, self.interception, defenders) if visible else 0.0
+                    edges[j] = known = (visible, success)
+                if known[0]:
+                    self.add_edge(i, j, c[2], known[1])
+        corridors.tested += tested
+
+
+class MatchGraph:
+    '''
+    Pass visibility of both teams towards their teammates and every goal of one layout.
+    Each collision and interception test is done once and shared by all the
+    PassGraph views returned by `view`, one per (team, goal, kicker).
+    '''
+
+    def __init__(
+        self,
+        teams: Sequence[Sequence[Point]],
+        goals: Sequence[Point],
+        radius: float,
+        interception: Optional[InterceptionModel] = None,
+    ):
+        self.teams = [list(t) for t in teams]
+        self.goals = list(goals)
+        self.radius = radius
+        self.interception = interception
+        blockers = [p for t in self.teams for p in t]
+        # Per team, `edges[t][i][j]` holds (length, success) of visible passes, goals come after teammates
+        self.edges = []
+        for t, team in enumerate(self.teams):
+            defenders = [p for o, other in enumerate(self.teams)
+                         if o != t for p in other]
+            targets = team + self.goals
+            n = len(team)
+            edges = [[None]*len(targets) for _ in range(n)]
+            for i, p1 in enumerate(team):
+                for j, p2 in enumerate(targets):
+                    if i == j:
+                        continue
+                    dx, dy = p2.x - p1.x, p2.y - p1.y
+                    length = sqrt(dx*dx + dy*dy)
+                    if length == 0:
+                        continue
+                    if j < n and j < i:
+                        visible = edges[j][i] is not None
+                    else:
+                        visible = not segment_blocked(
+                            p1, p2, dx, dy, 1/length, radius, blockers)
+                    if visible:
+                        edges[i][j] = (length, pass_success(
+                            p1, dx, dy, length, radius, interception, defenders))
+            self.edges.append(edges)
+
+    def view(self, team: int, goal: int, kicker: int) -> PassGraph:
+        '''
+        Returns the pass graph of `team` towards `goal`, starting from the teammate `kicker`.
+        '''
+        passers = self.teams[team]
+        n = len(passers)
+        graph = PassGraph.empty(
+            passers, self.goals[goal], self.radius, kicker, self.interception)
+        edges = self.edges[team]
+        for i in range(n):
+            row = edges[i]
+            for j in range(n):
+                if row[j] is not None:
+                    graph.add_edge(i, j, *row[j])
+            if row[n + goal] is not None:
+                graph.add_edge(i, n, *row[n + goal])
+        return graph
+
+
+class AnytimeSearch:
+    '''
+    Resumable top k goal path search on a PassGraph with a latency budget.
+    A beam search gives good paths right away, then the exact DFS of
+    `PassGraph.top_paths` runs in slices, pruned by the best paths so far.
+    The result is proven optimal once the DFS completes.
+    '''
+
+    def __init__(self, graph: PassGraph, k: int, min_passes: int = 1, beam_width: int = 8):
+        self.graph = graph
+        self.k = k
+        self._best = [(-c, -i, encode_path(p)) for i, (c, p) in enumerate(
+            graph.beam_paths(k, width=beam_width, min_passes=min_passes))]
+        heapq.heapify(self._best)
+        self._steps = graph._dfs_steps(k, min_passes, self._best)
+        self.optimal = False
+
+    @property
+    def paths(self) -> List[Tuple[float, Tuple[int, ...]]]:
+        '''
+        The best (cost, path) pairs found so far, cheapest first.
+        '''
+        return sorted_top(self._best)
+
+    def run(self, budget_ms: Optional[float] = None) -> Tuple[List[Tuple[float, Tuple[int, ...]]], bool]:
+        '''
+        Continues the search for up to `budget_ms`, or until done if None.
+        Returns (paths, optimal).
+        '''
+        if not self.optimal:
+            deadline = inf if budget_ms is None else perf_counter() + budget_ms/1e3
+            for _ in self._steps:
+                if perf_counter() >= deadline:
+                    break
+            else:
+                self.optimal = True
+        return self.paths, self.optimal
+
+
+class ReceiverHeatmap:
+    '''
+    Best goal path cost of a layout with one extra receiver at each cell of a grid.
+    The passes of the base layout are tested once. A base pass is then
+    rasterized onto the cells that would block it, so per cell only the
+    passes to and from the new receiver need collision and interception tests.
+    Cells within `radius` of a player are skipped and hold nan.
+    '''
+
+    def __init__(
+        self,
+        layout: Layout,
+        area: Tuple[float, float, float, float],
+        cell: float,
+        interception: Optional[InterceptionModel] = None,
+        min_passes: int = 1,
+        corridors: Optional[CorridorCache] = None,
+    ):
+        '''
+        `area` is the (left, top, right, bottom) of the grid, cells are `cell` pixels wide.
+        `corridors` reuses the pass geometry of the base layout, see `PassGraph`.
+        '''
+        self.layout = layout
+        self.area = area
+        self.cell = cell
+        left, top, right, bottom = area
+        self.cols = max(int((right - left) // cell), 1)
+        self.rows = max(int((bottom - top) // cell), 1)
+        self.corridors = corridors or CorridorCache(layout.radius)
+        base = PassGraph.from_layout(
+            layout, interception=interception, corridors=self.corridors)
+        self.base = base
+        best = base.top_paths(k=1, min_passes=min_passes)
+        self.base_cost = best[0][0] if best else inf
+        self.base_length = base.path_length(best[0][1]) if best else inf
+        size = self.cols * self.rows
+        # Best cost and its path length per cell, row major
+        self.costs = array('d', [inf]) * size
+        self.lengths = array('d', [inf]) * size
+        blocked = self._blocked_edges()
+        for idx in range(size):
+            self._solve_cell(idx, blocked[idx], min_passes)
+
+    def center(self, idx: int) -> Point:
+        '''
+        Returns the center of the cell with row major index `idx`.
+        '''
+        row, col = divmod(idx, self.cols)
+        return Point(self.area[0] + (col + 0.5)*self.cell, self.area[1] + (row + 0.5)*self.cell)
+
+    def gain(self, idx: int) -> float:
+        '''
+        Returns how much a receiver at the cell lowers the best path cost, nan for skipped cells.
+        '''
+        return self.base_cost - self.costs[idx]
+
+    def improves(self, idx: int) -> bool:
+        return self.costs[idx] < self.base_cost
+
+    def _blocked_edges(self) -> List[List[Tuple[int, int]]]:
+        '''
+        Returns, per cell, the visible base passes a receiver at its center would block.
+        '''
+        base = self.base
+        r = base.radius
+        left, top = self.area[0], self.area[1]
+        blocked = [[] for _ in range(self.cols * self.rows)]
+        pts = base.points
+        for i in range(base.n):
+            p1 = pts[i]
+            for j in range(base.n + 1):
+                if not base.visible[i][j]:
+                    continue
+                p2 = pts[j]
+                dx, dy, _, inv_len, bounds = self.corridors.get(i, j)
+                b_left, b_top, b_right, b_bottom = bounds
+                # Cells with centers inside the padded rectangle of the pass
+                c0 = max(ceil((b_left - left)/self.cell - 0.5), 0)
+                c1 = min(floor((b_right - left)/self.cell - 0.5), self.cols - 1)
+                r0 = max(ceil((b_top - top)/self.cell - 0.5), 0)
+                r1 = min(floor((b_bottom - top)/self.cell - 0.5), self.rows - 1)
+                for row in range(r0, r1 + 1):
+                    for col in range(c0, c1 + 1):
+                        idx = row*self.cols + col
+                        c = self.center(idx)
+                        if segment_blocked(p1, p2, dx, dy, inv_len, r, (c,), bounds):
+                            blocked[idx].append((i, j))
+        return blocked
+
+    def _solve_cell(self, idx: int, blocked: List[Tuple[int, int]], min_passes: int):
+        base = self.base
+        layout = self.layout
+        n = base.n
+        rec = self.center(idx)
+        players = layout.passers + layout.defenders
+        if any((p - rec).magnitude < base.radius for p in players):
+            self.costs[idx] = self.lengths[idx] = float('nan')
+            return
+        # Passes to and from the receiver, static blocking is symmetric
+        to_rec = [None]*n
+        for i, p in enumerate(layout.passers):
+            dx, dy = rec.x - p.x, rec.y - p.y
+            length = sqrt(dx*dx + dy*dy)
+            if not segment_blocked(p, rec, dx, dy, 1/length, base.radius, players):
+                to_rec[i] = length
+        dx, dy = layout.goal.x - rec.x, layout.goal.y - rec.y
+        length = sqrt(dx*dx + dy*dy)
+        to_goal = None
+        if length and not segment_blocked(rec, layout.goal, dx, dy, 1/length, base.radius, players):
+            to_goal = length
+        # The receiver is node n, the goal moves to n + 1
+        graph = PassGraph.empty(
+            layout.passers + (rec,), layout.goal, base.radius, base.kicker, base.interception)
+        skip = set(blocked)
+        for i in range(n):
+            for j in range(n):
+                if base.visible[i][j] and (i, j) not in skip:
+                    graph.add_edge(i, j, base.length[i][j], base.success[i][j])
+            if to_rec[i] is not None:
+                p = layout.passers[i]
+                graph.add_edge(i, n, to_rec[i], pass_success(
+                    p, rec.x - p.x, rec.y - p.y, to_rec[i], base.radius, base.interception, layout.defenders))
+            if base.visible[i][n] and (i, n) not in skip:
+                graph.add_edge(i, n + 1, base.length[i][n], base.success[i][n])
+        for j in range(n):
+            if to_rec[j] is not None:
+                p = layout.passers[j]
+                graph.add_edge(n, j, to_rec[j], pass_success(
+                    rec, p.x - rec.x, p.y - rec.y, to_rec[j], base.radius, base.interception, layout.defenders))
+        if to_goal is not None:
+            graph.add_edge(n, n + 1, to_goal, pass_success(
+                rec, dx, dy, to_goal, base.radius, base.interception, layout.defenders))
+        best = graph.top_paths(k=1, min_passes=min_passes)
+        if best:
+            self.costs[idx] = best[0][0]
+            self.lengths[idx] = graph.path_length(best[0][1])
+
+
+def path_survival(
+    layout: Layout,
+    paths: Sequence[Sequence[int]],
+    samples: int = 32,
+    jitter: float = 3.0,
+    interception: Optional[InterceptionModel] = None,
+    rng=None,
+) -> List[float]:
+    '''
+    Returns, per path, the share of `samples` jittered copies of the layout in which it stays feasible.
+    Every player moves by up to `jitter` pixels along each axis, the goal stays put.
+    A path survives a copy if none of its passes gets blocked or certain to be intercepted.
+
+    Only the distinct passes of `paths` are tested per copy, so the cost
+    grows with the passes of the top k instead of a full search per copy.
+    '''
+    rng = rng or random
+    edges = sorted({(a, b) for p in paths for a, b in zip(p, p[1:])})
+    alive = [0]*len(paths)
+    for _ in range(samples):
+        passers = [Point(p.x + rng.uniform(-jitter, jitter), p.y + rng.uniform(-jitter, jitter))
+                   for p in layout.passers]
+        defenders = [Point(p.x + rng.uniform(-jitter, jitter), p.y + rng.uniform(-jitter, jitter))
+                     for p in layout.defenders]
+        blockers = passers + defenders
+        pts = passers + [layout.goal]
+        feasible = dict()
+        for a, b in edges:
+            p1, p2 = pts[a], pts[b]
+            dx, dy = p2.x - p1.x, p2.y - p1.y
+            length = sqrt(dx*dx + dy*dy)
+            feasible[(a, b)] = length > 0 and not segment_blocked(
+                p1, p2, dx, dy, 1/length, layout.radius, blockers) and pass_success(
+                p1, dx, dy, length, layout.radius, interception, defenders) > 0
+        for i, p in enumerate(paths):
+            if all(feasible[e] for e in zip(p, p[1:])):
+                alive[i] += 1
+    return [a / samples if samples else 0.0 for a in alive]
@@ -0,0 +1,145 @@
+import random
+from math import ceil, floor, sqrt
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from soccer_agent.Math.geometry import Point, Rectangle
+from ..__init__ import LOG
+
+
+class SpatialHash:
+    '''
+    Buckets points into square cells of `cell` pixels.
+    With `cell` equal to the minimum distance, every point closer than it
+    lies in the 3x3 cells around the query.
+    '''
+
+    def __init__(self, cell: float):
+        self.cell = cell
+        self._cells: Dict[Tuple[int, int], List[Point]] = dict()
+
+    def _key(self, p: Point) -> Tuple[int, int]:
+        return floor(p.x / self.cell), floor(p.y / self.cell)
+
+    def add(self, p: Point):
+        self._cells.setdefault(self._key(p), []).append(p)
+
+    def near(self, p: Point, dist: float) -> bool:
+        '''
+        Returns True if a point is closer than `dist` (at most `cell`) to `p`.
+        '''
+        cx, cy = self._key(p)
+        d2 = dist*dist
+        for x in (cx - 1, cx, cx + 1):
+            for y in (cy - 1, cy, cy + 1):
+                for q in self._cells.get((x, y), ()):
+                    dx, dy = q.x - p.x, q.y - p.y
+                    if dx*dx + dy*dy < d2:
+                        return True
+        return False
+
+    def clear(self):
+        self._cells.clear()
+
+
+class PlacementSampler:
+    '''
+    Places non-overlapping discs of `radius` fully inside rectangular zones.
+    Centers are integer points at least 2×radius apart, from each other and
+    from every point placed earlier or added with `add`.
+
+    Poisson-disk style: zones are split into grid cells of side 2×radius/√2,
+    which can hold at most one center, and cells are visited in random
+    order, drawing up to `attempts` candidates each. A spatial hash makes
+    every distance check O(1), so placing n players costs O(n) cell visits
+    until the zones fill up.
+    '''
+
+    def __init__(self, radius: float, rng: Optional[random.Random] = None, attempts: int = 4):
+        self.LOG = LOG.bind(tag='PlacementSampler')
+        self.radius = radius
+        self.min_dist = 2*radius
+        # The random module itself by default, so `random.seed` applies
+        self.rng = rng or random
+        self.attempts = attempts
+        self.hash = SpatialHash(self.min_dist)
+
+    def add(self, p: Point):
+        '''
+        Adds an already placed center that new discs must not overlap.
+        '''
+        self.hash.add(p)
+
+    def clear(self):
+        '''
+        Forgets every placed center, e.g. before sampling the next layout.
+        '''
+        self.hash.clear()
+
+    def place(self, zones: Sequence[Rectangle], count: int) -> List[Point]:
+        '''
+        Returns `count` new centers inside the union of `zones`.
+        Raises if the zones cannot fit that many.
+        '''
+        placed = []
+        if count <= 0:
+            return placed
+        for cell in self._cells(zones):
+            p = self._sample_cell(*cell)
+            if p is None:
+                continue
+            self.hash.add(p)
+            placed.append(p)
+            if len(placed) == count:
+                return placed
+        raise Exception(
+            f'Could only place {len(placed)} of {count} players of radius {self.radius}.')
+
+    def _cells(self, zones: Sequence[Rectangle]) -> Iterator[Tuple[int, int, int, int]]:
+        '''
+        Yields the integer (left, top, right, bottom) center bounds of every grid cell in random order.
+        '''
+        side = self.min_dist / sqrt(2)
+        r = self.radius
+        grids = []
+        for z in zones:
+            # Centers keep the whole disc inside the zone
+            left, top = ceil(z.left + r), ceil(z.top + r)
+            right, bottom = floor(z.bottom_right.x - r), floor(z.bottom_right.y - r)
+            if right < left or bottom < top:
+                continue
+            cols = ceil((right - left + 1) / side)
+            rows = ceil((bottom - top + 1) / side)
+            grids.append((left, top, right, bottom, cols, rows))
+        sizes = [g[4]*g[5] for g in grids]
+        total = sum(sizes)
+        rng = self.rng
+
+        def bounds(idx):
+            for (left, top, right, bottom, cols, rows), size in zip(grids, sizes):
+                if idx < size:
+                    row, col = divmod(idx, cols)
+                    return (
+                        ceil(left + col*side), ceil(top + row*side),
+                        min(ceil(left + (col + 1)*side) - 1, right),
+                        min(ceil(top + (row + 1)*side) - 1, bottom),
+                    )
+                idx -= size
+
+        # Fisher-Yates shuffle of the cell indices, drawn one at a time.
+        # Only swapped indices are stored, so n cells cost O(n) whatever the zone size.
+        swapped: Dict[int, int] = dict()
+        for i in range(total):
+            j = rng.randrange(i, total)
+            idx = swapped.get(j, j)
+            swapped[j] = swapped.pop(i, i)
+            yield bounds(idx)
+
+    def _sample_cell(self, left: int, top: int, right: int, bottom: int) -> Optional[Point]:
+        if right < left or bottom < top:
+            return None
+        rng = self.rng
+        for _ in range(self.attempts):
+            p = Point(rng.randint(left, right), rng.randint(top, bottom))
+            if not self.hash.near(p, self.min_dist):
+                return p
+        return None
@@ -0,0 +1,77 @@
+import pathlib
+from typing import Dict, Optional, Tuple
+
+import pygame
+from ..__init__ import LOG
+
+
+class AssetAtlas:
+    '''
+    Cache of decoded sprite surfaces shared by every entity.
+    Each asset file is decoded once, scaled variants are kept per scale factor,
+    and bounding box overlays are kept per (surface, color, shape).
+    Surfaces returned by the atlas are shared and must not be drawn on.
+    '''
+
+    def __init__(self):
+        self.LOG = LOG.bind(tag='AssetAtlas')
+        # (path, has_alpha, scale) -> surface
+        self._images: Dict[Tuple[pathlib.Path, bool, float], pygame.Surface] = dict()
+        # (id(surface), color, radius) -> surface with bb
+        self._bb_images: Dict[Tuple[int, Tuple[int, ...], Optional[float]], pygame.Surface] = dict()
+        # Ids of surfaces owned by this atlas, they are kept alive by `_images`
+        self._owned = set()
+
+    def image(self, sprite_file: pathlib.Path, has_alpha: bool = False, scale: float = 1.0) -> pygame.Surface:
+        '''
+        Returns the decoded (and scaled) surface for the given asset.
+        '''
+        path = pathlib.Path(sprite_file).resolve()
+        key = (path, has_alpha, scale)
+        im = self._images.get(key)
+        if im is not None:
+            return im
+        if scale == 1.0:
+            self.LOG.debug(f'Decoding asset <y>{path.name}</>...')
+            im = pygame.image.load(path)
+            im = im.convert_alpha() if has_alpha else im.convert()
+        else:
+            base = self.image(path, has_alpha)
+            size = (pygame.math.Vector2(base.get_size()) * scale)
+            self.LOG.debug(
+                f'Scaling asset <y>{path.name}</> by <y>{scale}</>...')
+            im = pygame.transform.scale(base, (round(size.x), round(size.y)))
+        self._images[key] = im
+        self._owned.add(id(im))
+        return im
+
+    def bb_image(self, image: pygame.Surface, color: pygame.Color, radius: Optional[float] = None) -> pygame.Surface:
+        '''
+        Returns a copy of the image with a bounding box drawn on it.
+        A circle of `radius` is drawn if given, else a rectangle.
+        Shared between callers if `image` came from this atlas.
+        '''
+        key = (id(image), tuple(color), radius)
+        if key in self._bb_images:
+            return self._bb_images[key]
+        im = image.copy()
+        if radius is not None:
+            pygame.draw.circle(surface=im, color=color,
+                               center=im.get_rect().center, radius=radius, width=1)
+        else:
+            pygame.draw.rect(im, color, im.get_rect(), width=1)
+        if id(image) in self._owned:
+            self._bb_images[key] = im
+        return im
+
+    def clear(self):
+        '''
+        Drops every cached surface, e.g. after the display is recreated.
+        '''
+        self._images.clear()
+        self._bb_images.clear()
+        self._owned.clear()
+
+
+# GLOBAL atlas
+ATLAS = AssetAtlas()
@@ -3,6 +3,7 @@ import pathlib
 
 from pygame import image
 from soccer_agent.Math.geometry import Point, Rectangle
+from soccer_agent.Sprites.atlas import ATLAS
 import pygame
 import copy
 from ..__init__ import LOG
@@ -22,18 +23,19 @@ class Entity(pygame.sprite.DirtySprite):
         self.is_circular = is_circular
         self._render_bb = False
         self._bb_color = bb_color
+        self._sprite_file = sprite_file
+        self._has_alpha = has_alpha
+        self._scale = 1.0
         # Load sprite and set attributes
         # See: https://www.pygame.org/docs/ref/sprite.html#pygame.sprite.Sprite
         # See image.setter below
-        image = pygame.image.load(sprite_file)
-        if has_alpha:
-            self.image = image.convert_alpha()
-        else:
-            self.image = image.convert()
+        self.image = ATLAS.image(sprite_file, has_alpha=has_alpha)
 
     def copy(self) -> 'Entity':
         # make shallow copy
         cp = copy.copy(self)
+        # Own set of groups, a shallow copy shares them with the original
+        pygame.sprite.Sprite.__init__(cp)
         # change independent params
         cp.rect = cp.rect.copy()
         cp._bb_color = copy.deepcopy(cp._bb_color)
@@ -46,11 +48,20 @@ class Entity(pygame.sprite.DirtySprite):
         Scales the image according to scaling value.
         Retruns self
         '''
-        rect = Rectangle.from_pygame(self.rect)
-        self.image = pygame.transform.scale(
-            self.image, (*(rect.size * scaling).round(),))
+        # Scaled variants are shared through the atlas
+        self._scale *= scaling
+        self.image = ATLAS.image(
+            self._sprite_file, has_alpha=self._has_alpha, scale=self._scale)
         return self
 
+    def scaled_image(self, scaling: float) -> pygame.Surface:
+        '''
+        Returns the clean sprite scaled relative to its current size.
+        The surface is shared through the atlas and must not be drawn on.
+        '''
+        return ATLAS.image(
+            self._sprite_file, has_alpha=self._has_alpha, scale=self._scale*scaling)
+
     @property
     def bb_color(self):
         return self._bb_color
@@ -75,16 +86,10 @@ class Entity(pygame.sprite.DirtySprite):
     def _image_bb(self):
         '''
         Returns the image with bounding box applied.
+        Shared with every entity using the same image and bb color.
         '''
-        self.LOG.debug('Generating <r>bb</> image...')
-        im = self._image.copy()
-        if self.is_circular:
-            pygame.draw.circle(surface=im, color=self.bb_color,
-                               center=im.get_rect().center, radius=self.radius, width=1)
-        else:
-            pygame.draw.rect(im, self.bb_color, im.get_rect(), width=1)
-        self.LOG.debug('<g>bb</> image ready.')
-        return im
+        return ATLAS.bb_image(
+            self._image, self.bb_color, radius=self.radius if self.is_circular else None)
 
     @property
     def image(self):
@@ -56,6 +56,15 @@ class SoccerField(Entity):
         # bb for lower half
         bb_lower = bb_upper.copy().translate(Point(0, center.y - 35))
         self.bb_lower = bb_lower
+        # Lower boxes mirror the upper ones across the halfway line
+        def mirror(bb: Rectangle) -> Rectangle:
+            return Rectangle(
+                Point(bb.left, field_rect.top + field_rect.bottom - bb.bottom),
+                Point(bb.bottom_right.x, field_rect.top + field_rect.bottom - bb.top))
+        # bb for lower small
+        self.bb_lower_small = mirror(bb_upper_small)
+        # bb for lower goal
+        self.bb_lower_goal = mirror(bb_upper_goal)
         # Add bb to list
         self.bb_list.extend([
             self.bb_upper,
@@ -66,13 +75,45 @@ class SoccerField(Entity):
             # self.bb_lower_small,
         ])
 
+    @property
+    def render_bb(self):
+        '''
+        Swaps between the prebuilt clean and bb images.
+        Unlike other entities, the field is not marked dirty, since that would
+        redraw the whole screen. Repaint `bb_strips` instead.
+        '''
+        return self._render_bb
+
+    @render_bb.setter
+    def render_bb(self, value):
+        self._render_bb = value
+
+    @cached_property
+    def bb_strips(self):
+        '''
+        Returns the one pixel wide screen rects covered by the field bb lines.
+        Strips of the same box do not overlap.
+        '''
+        x, y = self.rect.topleft
+        strips = []
+        for r in [self._image.get_rect()] + [bb.to_pygame() for bb in self.bb_list]:
+            r = r.move(x, y)
+            strips.extend([
+                pygame.Rect(r.left, r.top, r.width, 1),
+                pygame.Rect(r.left, r.bottom - 1, r.width, 1),
+                pygame.Rect(r.left, r.top + 1, 1, r.height - 2),
+                pygame.Rect(r.right - 1, r.top + 1, 1, r.height - 2),
+            ])
+        return strips
+
     @cached_property
     def _image_bb(self):
         '''
         Returns the image with bounding box applied.
         Overrides Entity._image_bb
         '''
-        im = super()._image_bb
+        # Copy since the entity bb image is shared through the atlas
+        im = super()._image_bb.copy()
         self.LOG.debug('Generating field sections <r>bb</>...')
         # Render bb
         for bb in self.bb_list:
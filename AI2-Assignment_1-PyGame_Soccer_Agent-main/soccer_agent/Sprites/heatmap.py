@@ -0,0 +1,56 @@
+import math
+
+import pygame
+from soccer_agent.Math.pass_graph import ReceiverHeatmap
+from ..__init__ import LOG
+
+
+class HeatmapOverlay(pygame.sprite.DirtySprite):
+    '''
+    Translucent overlay of a ReceiverHeatmap.
+    Cells where a receiver improves the best goal path are tinted with
+    `color`, more opaque the larger the gain. The surface is rendered once
+    per heatmap and only redrawn by the sprite group when it changes.
+    '''
+
+    def __init__(
+        self,
+        size,
+        color: pygame.Color = pygame.Color(0, 255, 0),
+        max_alpha: int = 160,
+    ) -> None:
+        super().__init__()
+        self.LOG = LOG.bind(tag='HeatmapOverlay')
+        self.color = color
+        self.max_alpha = max_alpha
+        self.heatmap = None
+        self.image = pygame.Surface(size, pygame.SRCALPHA)
+        self.rect = self.image.get_rect()
+        self.visible = 0
+
+    def set_heatmap(self, heatmap: ReceiverHeatmap):
+        '''
+        Renders `heatmap` onto the overlay, None hides it.
+        '''
+        self.heatmap = heatmap
+        self.dirty = 1
+        if heatmap is None:
+            self.visible = 0
+            return
+        self.image.fill((0, 0, 0, 0))
+        size = len(heatmap.costs)
+        gains = [heatmap.gain(i) for i in range(size)]
+        best = max((g for g in gains if g > 0 and not math.isinf(g)), default=0.0)
+        cell = round(heatmap.cell)
+        drawn = 0
+        for i, g in enumerate(gains):
+            if not g > 0:
+                continue
+            # Opening a path where there was none counts as the best gain
+            share = 1.0 if math.isinf(g) or best == 0 else g / best
+            c = heatmap.center(i)
+            rect = pygame.Rect(round(c.x - cell/2), round(c.y - cell/2), cell, cell)
+            self.image.fill((*self.color[:3], round(self.max_alpha*share)), rect)
+            drawn += 1
+        self.LOG.debug(f'Rendered <y>{drawn}</> of <y>{size}</> cells.')
+        self.visible = 1
@@ -1,13 +1,20 @@
 # Common imports
+import argparse
+import dataclasses
 import pathlib
+from dataclasses import dataclass
+from typing import Optional, Set
 from soccer_agent.policy import BasicPolicy, Policy
+from soccer_agent.Math.pass_graph import InterceptionModel, Layout
 from soccer_agent.Sprites.player import Player, Team
-from soccer_agent.simulation import Simulator
+from soccer_agent.simulation import MultiMatchView, Simulator
 from soccer_agent.Config.config import Config, Context
+from soccer_agent.Config.loader import ConfigWatcher, config_diff, load_config
 from soccer_agent.Sprites.field import SoccerField
 import pygame
 from soccer_agent.IO.pygame_io import KeybindAction_Callable, KeybindKey
 from soccer_agent.GUI.window import PyGame_Window
+from soccer_agent.Debug.profiler import Profiler
 from .__init__ import LOG, LogTag
 import asyncio
 
@@ -38,7 +45,22 @@ def setup_logger():
     )
 
 
-def register_keybinds(context: Context, simulator: Simulator, policy: Policy):
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Soccer agent simulator.')
+    parser.add_argument('--config', type=pathlib.Path, default=None,
+                        help='TOML config file, reloaded when it changes. See Config/example.toml.')
+    parser.add_argument('--matches', type=int, default=1,
+                        help='No. of simulations to tile in one window.')
+    parser.add_argument('--profile', choices=['ticks', 'goal_path'], default=None,
+                        help='Profile the first ticks or goal path solve at startup. Press P to profile later.')
+    parser.add_argument('--profile-ticks', type=int, default=60,
+                        help='No. of ticks captured per profile.')
+    parser.add_argument('--profile-dir', type=pathlib.Path, default=pathlib.Path('profiles'),
+                        help='Directory to write profiles to.')
+    return parser.parse_args(argv)
+
+
+def register_exit_keybind(context: Context):
     # Exit keybind
     def ext():
         context.window.running = False
@@ -46,6 +68,72 @@ def register_keybinds(context: Context, simulator: Simulator, policy: Policy):
         'exit', KeybindAction_Callable(callable=ext, description='Exit.'))
     context.window.register_keybind(
         KeybindKey(key_code=pygame.K_ESCAPE), 'exit')
+
+
+def register_profiler_keybind(context: Context, profiler: Profiler, mode: str):
+    # Profiler keybind
+    def profile():
+        profiler.arm(mode=mode)
+    context.window.register_action('profile', KeybindAction_Callable(
+        callable=profile, description=f'Profile the next {"goal path solve" if mode == "call" else "ticks"}.'))
+    context.window.register_keybind(KeybindKey(
+        key_code=pygame.K_p), 'profile')
+
+
+def solve_goal_paths(context: Context, simulator: Simulator, policy: Policy):
+    if simulator.environment.kicker is None:
+        return
+    simulator.goal_paths = policy.goal_path(
+        simulator.environment, top_path_colors=context.config.top_path_colors,
+        budget_ms=context.config.solve_budget_ms)
+
+
+def apply_config(context: Context, config: Config, simulator: Optional[Simulator] = None, policy: Optional[BasicPolicy] = None):
+    '''
+    Updates the live config in place, then rebuilds only what the changed fields affect.
+    If the rebuild fails, e.g. the players do not fit the field, the previous config is restored and the error raised.
+    '''
+    changed = config_diff(context.config, config)
+    if not changed:
+        return
+    LOG.info(f'Config changed: <y>{sorted(changed)}</>')
+    previous = dataclasses.replace(context.config)
+    for name in changed:
+        setattr(context.config, name, getattr(config, name))
+    try:
+        _rebuild(context, changed, simulator, policy)
+    except Exception:
+        apply_config(context, previous, simulator=simulator, policy=policy)
+        raise
+
+
+def _rebuild(context: Context, changed: Set[str], simulator: Optional[Simulator], policy: Optional[BasicPolicy]):
+    config = context.config
+    context.window.tick_rate = config.tick_rate
+    context.window.idle_timeout_ms = config.idle_timeout_ms
+    restart = sorted(changed & {'window_size', 'executor_workers'})
+    if restart:
+        LOG.warning(f'<y>{restart}</> only apply on restart.')
+    if simulator is None:
+        ignored = sorted(changed & {'field_bb_color', 'player_bb_color', 'red_players', 'blue_players'})
+        if ignored:
+            LOG.warning(f'<y>{ignored}</> only apply to a single match, restart to apply them.')
+        return
+    if changed & {'field_bb_color', 'player_bb_color'}:
+        simulator.set_bb_colors(config.field_bb_color, config.player_bb_color)
+    if changed & {'red_players', 'blue_players'}:
+        simulator.set_player_counts(
+            {Team.RED: config.red_players, Team.BLUE: config.blue_players})
+        simulator.environment = policy.relocate_players(
+            environment=simulator.environment)
+        solve_goal_paths(context, simulator, policy)
+    elif changed & {'top_path_colors'}:
+        # Same players, only a new k or path colors
+        solve_goal_paths(context, simulator, policy)
+
+
+def register_keybinds(context: Context, simulator: Simulator, policy: Policy):
+    register_exit_keybind(context)
     # Bounding box keybind
 
     def field_bb_toggle():
@@ -59,37 +147,97 @@ def register_keybinds(context: Context, simulator: Simulator, policy: Policy):
     def relocate_players():
         simulator.environment = policy.relocate_players(
             environment=simulator.environment)
-        simulator.goal_paths = policy.goal_path(
-            simulator.environment, top_path_colors=context.config.top_path_colors)
+        simulator.heatmap = None
+        solve_goal_paths(context, simulator, policy)
     context.window.register_action('relocate_players', KeybindAction_Callable(
         callable=relocate_players, description='Relocate all players.'))
     context.window.register_keybind(KeybindKey(
         key_code=pygame.K_x), 'relocate_players')
+    # Robustness keybind
 
+    def survival_toggle():
+        if simulator.survival is not None:
+            simulator.survival = None
+        elif len(simulator.goal_paths) > 0:
+            simulator.survival = policy.goal_path_survival(
+                simulator.environment, simulator.goal_paths)
+    context.window.register_action('toggle_survival', KeybindAction_Callable(
+        callable=survival_toggle, description='Toggle goal path survival under player jitter.'))
+    context.window.register_keybind(KeybindKey(
+        key_code=pygame.K_r), 'toggle_survival')
+    # Heatmap keybind
+    pending = []
 
-@LOG.catch
-@LogTag(tag='Main')
-def main():
+    async def solve_heatmap():
+        # Solved in the window executor on a snapshot of the players
+        layout = Layout.from_environment(simulator.environment)
+        heatmap = await context.window.run_in_executor(
+            policy.receiver_heatmap, simulator.environment, 16, layout)
+        # Players may have moved while solving
+        if Layout.from_environment(simulator.environment) == layout:
+            simulator.heatmap = heatmap
+
+    def heatmap_solved(task):
+        pending.remove(task)
+        if not task.cancelled() and task.exception() is not None:
+            LOG.opt(exception=task.exception()).error('Heatmap solve failed.')
+
+    def heatmap_toggle():
+        if simulator.heatmap is not None:
+            simulator.heatmap = None
+        elif simulator.environment.kicker is not None and not pending:
+            task = asyncio.get_running_loop().create_task(solve_heatmap())
+            task.add_done_callback(heatmap_solved)
+            pending.append(task)
+    context.window.register_action('toggle_heatmap', KeybindAction_Callable(
+        callable=heatmap_toggle, description='Toggle receiver heatmap.'))
+    context.window.register_keybind(KeybindKey(
+        key_code=pygame.K_h), 'toggle_heatmap')
+
+
+def register_multi_match_keybinds(context: Context, view: MultiMatchView, policy: Policy):
+    register_exit_keybind(context)
+    # Policy keybind
+
+    def relocate_players():
+        view.relocate_players(
+            policy, top_path_colors=context.config.top_path_colors)
+    context.window.register_action('relocate_players', KeybindAction_Callable(
+        callable=relocate_players, description='Relocate players of all matches.'))
+    context.window.register_keybind(KeybindKey(
+        key_code=pygame.K_x), 'relocate_players')
+
+
+@dataclass
+class App:
     '''
-    This is the entry point for this module.
-    It is imported as `main` in init.py
+    The simulator stack built from the command line, see `create_app`.
+    Either `simulator` or, for several matches, `view` is set.
     '''
-    setup_logger()
+    context: Context
+    policy: BasicPolicy
+    profiler: Profiler
+    simulator: Optional[Simulator] = None
+    view: Optional[MultiMatchView] = None
+    watcher: Optional[ConfigWatcher] = None
+
+
+def create_app(argv=None) -> App:
+    '''
+    Builds the window, simulator and policy with their keybinds.
+    The window runs once `app.context.window.event_loop()` is awaited.
+    '''
+    args = parse_args(argv)
     # Create config
-    config = Config(
-        field_bb_color=pygame.Color(255, 0, 0),
-        player_bb_color=pygame.Color(255, 0, 255),
-        top_path_colors=[
-            pygame.Color(255, 0, 0),
-            pygame.Color(0, 255, 0),
-            pygame.Color(0, 0, 255),
-            pygame.Color(0, 0, 0),
-        ]
-    )
+    if args.config is not None:
+        config = load_config(args.config)
+    else:
+        config = Config()
     LOG.info(f'Config set: <y>{config}</>')
     # crete window
     LOG.info('Creating game window...')
-    window = PyGame_Window('Game Window', 300, 300)
+    window = PyGame_Window('Game Window', *config.window_size, tick_rate=config.tick_rate,
+                           idle_timeout_ms=config.idle_timeout_ms, max_workers=config.executor_workers)
     LOG.info(f'Game window created.')
     # Add field
     LOG.info(f'Creating field...')
@@ -104,26 +252,74 @@ def main():
         window=window,
         field=field,
         red_player_model=Player(pathlib.Path(
-            __file__).parent / './assets/red.png').scale(0.5),
+            __file__).parent / './assets/red.png', bb_color=config.player_bb_color).scale(0.5),
         blue_player_model=Player(pathlib.Path(
-            __file__).parent / './assets/blue.png').scale(0.5),
+            __file__).parent / './assets/blue.png', bb_color=config.player_bb_color).scale(0.5),
         config=config
     )
-    # Create simulator
-    simulator = Simulator(
-        context=context,
-        player_counts={
-            Team.RED: 3,
-            Team.BLUE: 4,
-        },
-        kick_team=Team.BLUE
-    )
+    player_counts = {
+        Team.RED: config.red_players,
+        Team.BLUE: config.blue_players,
+    }
     # Create policy
-    policy = BasicPolicy()
-    # Register keybinds
-    register_keybinds(context, simulator, policy)
-    # Await all running tasks to end
-    loop = asyncio.get_event_loop()
-    tasks = asyncio.all_tasks(loop)
+    policy = BasicPolicy(interception=InterceptionModel())
+    # Create profiler
+    profiler = Profiler(window, output_dir=args.profile_dir,
+                        ticks=args.profile_ticks)
+    profile_mode = 'call' if args.profile == 'goal_path' else 'ticks'
+    policy.goal_path = profiler.wrap(policy.goal_path)
+    register_profiler_keybind(context, profiler, profile_mode)
+    if args.profile is not None:
+        profiler.arm(mode=profile_mode)
+    if args.matches > 1:
+        # Create tiled view of many simulations
+        view = MultiMatchView(
+            context=context,
+            player_counts=player_counts,
+            kick_team=Team.BLUE,
+            match_count=args.matches,
+        )
+        register_multi_match_keybinds(context, view, policy)
+        simulator = None
+    else:
+        view = None
+        # Create simulator
+        simulator = Simulator(
+            context=context,
+            player_counts=player_counts,
+            kick_team=Team.BLUE
+        )
+        profiler.add_counter(
+            'sprite_redraws', lambda: simulator.last_redraws)
+        profiler.add_counter(
+            'goal_path_bytes', lambda: getattr(simulator.goal_paths, 'nbytes', 0))
+        # Register keybinds
+        register_keybinds(context, simulator, policy)
+    watcher = None
+    if args.config is not None:
+        # Hot reload the config file
+        watcher = ConfigWatcher(args.config, window, lambda c: apply_config(
+            context, c, simulator=simulator, policy=policy))
+    return App(context=context, policy=policy, profiler=profiler,
+               simulator=simulator, view=view, watcher=watcher)
+
+
+async def run(argv=None):
+    '''
+    Builds the simulator and runs its window until it is closed.
+    Await it on a running event loop to host the simulator next to other tasks.
+    '''
+    app = create_app(argv)
     LOG.info('Game running, waiting for quit...')
-    loop.run_until_complete(asyncio.gather(*tasks))
+    await app.context.window.event_loop()
+
+
+@LOG.catch
+@LogTag(tag='Main')
+def main(argv=None):
+    '''
+    This is the entry point for this module.
+    It is imported as `main` in init.py
+    '''
+    setup_logger()
+    asyncio.run(run(argv))
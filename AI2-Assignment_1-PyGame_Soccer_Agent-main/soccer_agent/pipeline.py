@@ -0,0 +1,242 @@
+'''
+Streaming pipeline for offline scenario analysis: generate -> relocate -> solve -> score -> write.
+Run with: python -m soccer_agent.pipeline --count 10000 --out scenarios.jsonl
+'''
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Union
+
+from .__init__ import LOG
+
+# Marks the end of a stream in a stage queue
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    '''
+    Throughput counters of a single stage.
+    '''
+    items: int = 0
+    # Time spent inside the stage function, summed over workers
+    busy_seconds: float = 0.0
+    # Time workers waited on a full output queue
+    blocked_seconds: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+
+    @property
+    def throughput(self) -> float:
+        '''
+        Items per second of wall time since the stage started.
+        '''
+        end = self.finished or time.perf_counter()
+        return self.items / max(end - self.started, 1e-9)
+
+    def __repr__(self) -> str:
+        return (f'StageStats(items={self.items}, throughput={self.throughput:.1f}/s, '
+                f'busy={self.busy_seconds:.3f}s, blocked={self.blocked_seconds:.3f}s)')
+
+
+@dataclass
+class Stage:
+    '''
+    A pipeline stage applying `fn` to every item with `workers` concurrent workers.
+    If `blocking`, `fn` is run in the pipeline executor, else on the event loop.
+    Returning None drops the item.
+    '''
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+    blocking: bool = True
+
+
+class Pipeline:
+    '''
+    Runs items through stages connected by bounded queues.
+    A stage only takes a new item once its output queue has room, so the
+    number of items in flight, and with it the memory, stays bounded by
+    the queue sizes no matter how long the input stream is.
+    Items may leave the pipeline out of order when a stage has several workers.
+    '''
+
+    def __init__(self, stages: List[Stage], queue_size: int = 64, executor: Optional[Executor] = None):
+        self.LOG = LOG.bind(tag='Pipeline')
+        self.stages = stages
+        self.queue_size = queue_size
+        self.executor = executor
+        self.stats: Dict[str, StageStats] = dict()
+
+    async def run(self, source: Union[Iterable, AsyncIterable]) -> Dict[str, StageStats]:
+        '''
+        Feeds every item of `source` through the stages, returns the stats per stage.
+        '''
+        queues = [asyncio.Queue(maxsize=self.queue_size)
+                  for _ in range(len(self.stages) + 1)]
+        self.stats = {s.name: StageStats() for s in self.stages}
+        tasks = []
+        workers = []
+        for i, stage in enumerate(self.stages):
+            stage_workers = [asyncio.ensure_future(self._work(stage, queues[i], queues[i+1]))
+                             for _ in range(stage.workers)]
+            workers.extend(stage_workers)
+            tasks.append(asyncio.ensure_future(
+                self._close_stage(i, stage_workers, queues[i+1])))
+        tasks.append(asyncio.ensure_future(self._drain(queues[-1])))
+        tasks.append(asyncio.ensure_future(self._feed(source, queues[0])))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # A failing stage would otherwise leave the others blocked on their queues
+            for t in tasks + workers:
+                t.cancel()
+            raise
+        for name, st in self.stats.items():
+            self.LOG.info(f'Stage <y>{name}</>: {st}')
+        return self.stats
+
+    def run_sync(self, source: Union[Iterable, AsyncIterable]) -> Dict[str, StageStats]:
+        return asyncio.run(self.run(source))
+
+    async def _feed(self, source, queue: asyncio.Queue):
+        if hasattr(source, '__aiter__'):
+            async for item in source:
+                await queue.put(item)
+        else:
+            for item in source:
+                await queue.put(item)
+        # One end marker per worker of the first stage
+        for _ in range(self.stages[0].workers if self.stages else 1):
+            await queue.put(_DONE)
+
+    async def _work(self, stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        stats = self.stats[stage.name]
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            start = time.perf_counter()
+            if stage.blocking:
+                out = await loop.run_in_executor(self.executor, stage.fn, item)
+            else:
+                out = stage.fn(item)
+            stats.busy_seconds += time.perf_counter() - start
+            stats.items += 1
+            if out is not None:
+                start = time.perf_counter()
+                await outbox.put(out)
+                stats.blocked_seconds += time.perf_counter() - start
+
+    async def _close_stage(self, idx: int, workers: List[asyncio.Future], outbox: asyncio.Queue):
+        await asyncio.gather(*workers)
+        self.stats[self.stages[idx].name].finished = time.perf_counter()
+        nxt = self.stages[idx+1].workers if idx + 1 < len(self.stages) else 1
+        for _ in range(nxt):
+            await outbox.put(_DONE)
+
+    async def _drain(self, queue: asyncio.Queue):
+        while await queue.get() is not _DONE:
+            pass
+
+
+def scenario_stages(policy, make_environment: Callable[[int], Any], out, top_path_colors, solve_workers: int = 1) -> List[Stage]:
+    '''
+    Returns the generate -> relocate -> solve -> score -> write stages for scenario seeds.
+    `make_environment(seed)` creates a fresh Environment, placed with `Environment.rng`
+    so a seed always gives the same scenario. Results are written as JSON lines
+    to `out`, or appended to it if it is a ColumnarWriter.
+    '''
+    # Imported here to keep the generic pipeline free of pygame
+    from soccer_agent.IO.results import ColumnarWriter
+    from soccer_agent.Math.pass_graph import Layout, PassGraph
+
+    def relocate(env):
+        return policy.relocate_players(environment=env)
+
+    def solve(env):
+        return env, policy.goal_path(env, top_path_colors=top_path_colors)
+
+    def score(item):
+        # Success probability of every path, the product of its pass successes
+        env, paths = item
+        layout = Layout.from_environment(env)
+        graph = PassGraph.from_layout(
+            layout, interception=getattr(policy, 'interception', None))
+        return layout, paths, [graph.path_success(p) for _, p, _ in paths.encoded]
+
+    def record(layout, paths, success):
+        return {
+            'passers': [(p.x, p.y) for p in layout.passers],
+            'defenders': [(p.x, p.y) for p in layout.defenders],
+            'kicker': layout.kicker,
+            'paths': [path for _, path, _ in paths],
+            'lengths': [length for _, _, length in paths],
+            'success': success,
+            'best': paths[0][2] if len(paths) else None,
+            'best_success': success[0] if success else None,
+        }
+
+    def write(item):
+        if isinstance(out, ColumnarWriter):
+            out.append(*item)
+        else:
+            out.write(json.dumps(record(*item)) + '\n')
+
+    return [
+        Stage('generate', make_environment),
+        Stage('relocate', relocate),
+        Stage('solve', solve, workers=solve_workers),
+        Stage('score', score),
+        Stage('write', write, blocking=False),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scenario analysis pipeline.')
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--out', default='scenarios.jsonl')
+    parser.add_argument('--solve-workers', type=int, default=2)
+    parser.add_argument('--queue-size', type=int, default=64)
+    parser.add_argument('--format', choices=['jsonl', 'columnar'], default='jsonl')
+    args = parser.parse_args()
+    import os
+    import pathlib
+    import random
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    from soccer_agent.IO.results import ColumnarWriter
+    from soccer_agent.Math.pass_graph import InterceptionModel
+    from soccer_agent.policy import BasicPolicy, Environment
+    from soccer_agent.Sprites.field import SoccerField
+    from soccer_agent.Sprites.player import Player, Team
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    assets = pathlib.Path(__file__).parent / 'assets'
+    field = SoccerField()
+    red = Player(assets / 'red.png').scale(0.5)
+    blue = Player(assets / 'blue.png').scale(0.5)
+
+    def make_environment(seed):
+        return Environment(
+            red_players=[red.copy() for _ in range(3)],
+            blue_players=[blue.copy() for _ in range(4)],
+            kick_team=Team.BLUE,
+            field=field,
+            rng=random.Random(seed),
+        )
+    colors = [pygame.Color(255, 0, 0), pygame.Color(0, 255, 0),
+              pygame.Color(0, 0, 255), pygame.Color(0, 0, 0)]
+    out = ColumnarWriter(args.out) if args.format == 'columnar' else open(args.out, 'w')
+    with out:
+        stages = scenario_stages(BasicPolicy(interception=InterceptionModel()),
+                                 make_environment, out, colors, solve_workers=args.solve_workers)
+        Pipeline(stages, queue_size=args.queue_size).run_sync(range(args.count))
+
+
+if __name__ == '__main__':
+    main()
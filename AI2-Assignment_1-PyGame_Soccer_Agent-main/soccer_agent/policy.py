@@ -1,10 +1,15 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from sys import getsizeof
 
 import pygame
 from soccer_agent.Sprites.field import SoccerField
-from typing import List
-from soccer_agent.Math.geometry import Line, Point, Rectangle
+from typing import Dict, Iterable, List, Optional, Tuple
+from soccer_agent.Math.corridors import CorridorCache
+from soccer_agent.Math.geometry import Point
+from soccer_agent.Math.placement import PlacementSampler
+from soccer_agent.Math.pass_graph import AnytimeSearch, InterceptionModel, Layout, MatchGraph, PassGraph, ReceiverHeatmap, encode_path, path_survival
 from soccer_agent.Sprites.player import Player, Team
 import random
 from .__init__ import LOG
@@ -20,6 +25,94 @@ class Environment:
     kick_team: Team
     field: SoccerField
     kicker: Player = None
+    # Pass geometry between the kicking team and the goal, reused until players move
+    corridors: CorridorCache = field(
+        default_factory=CorridorCache, repr=False, compare=False)
+    # Random source of player placement, the random module itself if None
+    rng: Optional[random.Random] = field(
+        default=None, repr=False, compare=False)
+
+
+class GoalPaths(Sequence):
+    '''
+    Sequence of (color, List[(x,y)], path length) goal paths.
+    Paths are stored as one byte per node, indexing into `positions`, the
+    (x, y) table of the graph nodes shared by every path. Coordinates are
+    only resolved when a path is accessed, e.g. while rendering.
+    If a solve ran out of budget, `optimal` is False and `refine` continues the search.
+    '''
+
+    def __init__(
+        self,
+        positions: Tuple[Tuple[float, float], ...] = (),
+        paths: Iterable[Tuple[int, bytes, float]] = (),
+        optimal: bool = True,
+        search: AnytimeSearch = None,
+        colors: List[pygame.Color] = (),
+    ):
+        '''
+        `paths` holds (color index, encoded path, length) triples.
+        '''
+        self.positions = positions
+        self.encoded = list(paths)
+        self.optimal = optimal
+        self.search = search
+        self.colors = colors
+
+    @staticmethod
+    def from_graph(graph: PassGraph, paths: List[Tuple[float, Tuple[int, ...]]], colors: List[pygame.Color], **kwargs) -> 'GoalPaths':
+        '''
+        Encodes (cost, path) pairs of `graph`, the i-th path gets the i-th color.
+        '''
+        return GoalPaths(
+            tuple((p.x, p.y) for p in graph.points),
+            [(i, encode_path(p), graph.path_length(p))
+             for i, (_, p) in enumerate(paths)],
+            colors=colors,
+            **kwargs,
+        )
+
+    @staticmethod
+    def from_search(search: AnytimeSearch, colors: List[pygame.Color], budget_ms: float = None) -> 'GoalPaths':
+        paths, optimal = search.run(budget_ms)
+        return GoalPaths.from_graph(
+            search.graph, paths, colors,
+            optimal=optimal,
+            search=None if optimal else search,
+        )
+
+    def refine(self, budget_ms: float) -> 'GoalPaths':
+        '''
+        Continues a provisional solve for up to `budget_ms`, returns the new paths.
+        '''
+        if self.optimal:
+            return self
+        return GoalPaths.from_search(self.search, self.colors, budget_ms)
+
+    def same_paths(self, other) -> bool:
+        '''
+        Returns True if `other` holds the same paths through the same positions.
+        '''
+        return (isinstance(other, GoalPaths) and self.positions == other.positions
+                and self.encoded == other.encoded)
+
+    @property
+    def nbytes(self) -> int:
+        '''
+        Bytes held by the encoded paths, excluding the shared position table.
+        '''
+        return getsizeof(self.encoded) + sum(
+            getsizeof(e) + getsizeof(e[1]) + getsizeof(e[2]) for e in self.encoded)
+
+    def __len__(self) -> int:
+        return len(self.encoded)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(len(self))[i]]
+        c, path, length = self.encoded[i]
+        pos = self.positions
+        return self.colors[c], [pos[n] for n in path], length
 
 
 class Policy(ABC):
@@ -36,10 +129,11 @@ class Policy(ABC):
         pass
 
     @abstractmethod
-    def goal_path(self, environment: Environment, top_k: int) -> List[Player]:
+    def goal_path(self, environment: Environment, top_k: int, budget_ms: Optional[float] = None) -> List[Player]:
         '''
         Returns the top k goal paths in descending order.
         Returns a list of (color, List[(x,y)]) paths.
+        If `budget_ms` is given, may return provisional GoalPaths that are not optimal.
         '''
         pass
 
@@ -49,8 +143,12 @@ class BasicPolicy(Policy):
     Represents a policy that has access to everything in the environment.
     '''
 
-    def __init__(self):
+    def __init__(self, interception: Optional[InterceptionModel] = None):
+        '''
+        If `interception` is given, passes that defenders can reach in flight are ranked lower.
+        '''
         super().__init__()
+        self.interception = interception
 
     def relocate_players(self, environment: Environment) -> Environment:
         '''
@@ -66,31 +164,23 @@ class BasicPolicy(Policy):
         kicker = red.pop() if env.kick_team == Team.RED else blu.pop()
         env.kicker = kicker
         pl_width = kicker.rect.width
-        pl_height = kicker.rect.height
         center = env.field.bb_center.center
         kicker.rect.x = round(center[0]-pl_width/2)
         kicker.rect.y = center[1]
         kicker.dirty = True
+        # Non-overlapping placement around the kicker
+        sampler = PlacementSampler(radius=kicker.radius, rng=env.rng)
+        sampler.add(Point(*kicker.rect.center))
         # Place players in target goal box
-        small_box = env.field.bb_upper_small.to_pygame()
-        x = random.sample(range(small_box.left, small_box.right-pl_width), k=2)
-        y = random.sample(
-            range(small_box.top, small_box.bottom-pl_height), k=2)
-        for i, p in enumerate([red.pop(), blu.pop()]):
-            p.rect.x = x[i]
-            p.rect.y = y[i]
-            p.dirty = True
-        # Place the remaining players
-        outter_boxes = env.field.bb_upper.substract(env.field.bb_upper_small)
-        bx = outter_boxes[0].to_pygame()
+        small_box = env.field.bb_upper_small
+        boxed = [red.pop(), blu.pop()]
+        # Place the remaining players in the rest of the half
+        outter_boxes = env.field.bb_upper.substract(small_box)
         plrs = red + blu
-        x = random.sample(range(bx.left, bx.right-pl_width), k=len(plrs))
-        y = random.sample(range(bx.top, bx.bottom-max(pl_height,
-                          round(env.field.bb_center.height/2))), k=len(plrs))
-        for i, pl in enumerate(plrs):
-            pl.rect.x = round(x[i]-pl_width/2)
-            pl.rect.y = round(y[i]-pl_height/2)
-            pl.dirty = True
+        for players, zones in ((boxed, [small_box]), (plrs, outter_boxes)):
+            for p, c in zip(players, sampler.place(zones, len(players))):
+                p.rect.center = (c.x, c.y)
+                p.dirty = True
         return env
 
     def goal_path(self,
@@ -98,67 +188,138 @@ class BasicPolicy(Policy):
                   top_path_colors: List[pygame.Color] = [
                       pygame.Color(219, 42, 54),
                       pygame.Color(232, 232, 37)
-                  ]
+                  ],
+                  budget_ms: Optional[float] = None,
                   ):
         '''
         Returns the top len(top_path_colors) goal paths in descending order.
+        If `budget_ms` is given, returns the best paths found within it,
+        see GoalPaths.optimal and GoalPaths.refine.
         '''
         env = environment
-        # Get kicker team
-        team = env.red_players.copy() if env.kick_team == Team.RED else env.blue_players.copy()
-        player_pos = [Point(*x.rect.center) for x in team]
-        collide_pos = [Point(*x.rect.center)
-                       for x in (env.red_players+env.blue_players)]
-        pl_radius = env.kicker.radius
-        goal = Point(*env.field.bb_upper_goal.to_pygame().center)
-        paths = []
-        trace = []
-
-        def check_collide_connect(p1: Point, p2: Point):
-            '''
-            Checks if 2 points can be connected without collision with any other players.
-            '''
-            l = Line(p1, p2)
-            for p in collide_pos:
-                if p != p1 and p != p2:
-                    d = l.dist_of_point(p)
-                    ray_rect = Rectangle.enclosing_points([p1, p2])
-                    ray_rect.top_left -= pl_radius
-                    ray_rect.bottom_right += pl_radius
-                    if d <= pl_radius and ray_rect.contains_point(p):
-                        LOG.debug(f'{l} colides with {p} for distance {d}.')
-                        return False
-            return True
-
-        def explore(pos):
-            trace.append(pos)
-            # Check if this position can goal
-            if check_collide_connect(pos, goal):
-                # This position can goal
-                paths.append(trace+[goal])
-            # get neighbours
-            for p in player_pos:
-                if not(p in trace) and check_collide_connect(pos, p):
-                    explore(p)
-            # remove from trace
-            trace.pop()
-            return paths
-        tmp = Point(*env.kicker.rect.center)
-        explore(tmp)
-
-        # sort path lengths
-        def path_length(p):
-            s = p[0]
-            d = 0
-            for x in p[1:]:
-                d += (x-s).magnitude
-                s = x
-            return d
-
+        graph = PassGraph.from_environment(env, interception=self.interception)
+        if budget_ms is not None:
+            return GoalPaths.from_search(
+                AnytimeSearch(graph, k=len(top_path_colors)),
+                top_path_colors, budget_ms)
+        paths = self._solve(graph, k=len(top_path_colors))
         LOG.debug(f'Paths found: {len(paths)}')
 
-        paths = [p for p in paths if len(p) > 2]
-        paths = sorted(paths, key=lambda p: path_length(p))
-        return [
-            (top_path_colors[i], [(x.x, x.y) for x in p], path_length(p)) for i, p in enumerate(paths[:len(top_path_colors)])
-        ]
+        # Ranked by length, penalized by the interception risk of every pass
+        return GoalPaths.from_graph(graph, paths, top_path_colors)
+
+    def goal_paths_all(self,
+                       environment: Environment,
+                       top_path_colors: List[pygame.Color] = [
+                           pygame.Color(219, 42, 54),
+                           pygame.Color(232, 232, 37)
+                       ]
+                       ) -> Dict[Tuple[Team, str], GoalPaths]:
+        '''
+        Returns the top goal paths of both teams towards both goals, keyed by (team, 'upper' | 'lower').
+        All four searches share one MatchGraph, so every pass is only tested once.
+        The kicking team starts from the kicker, the other team from its player nearest to the kicker.
+        '''
+        env = environment
+        teams = [env.red_players, env.blue_players]
+        goals = {
+            'upper': env.field.bb_upper_goal,
+            'lower': env.field.bb_lower_goal,
+        }
+        ball = Point(*env.kicker.rect.center)
+        graph = MatchGraph(
+            teams=[[Point(*p.rect.center) for p in t] for t in teams],
+            goals=[Point(*g.to_pygame().center) for g in goals.values()],
+            radius=env.kicker.radius,
+            interception=self.interception,
+        )
+        result = dict()
+        for t, (team, players) in enumerate(zip((Team.RED, Team.BLUE), teams)):
+            if team == env.kick_team:
+                kicker = next(i for i, p in enumerate(players) if p is env.kicker)
+            else:
+                kicker = min(range(len(players)), key=lambda i: (
+                    graph.teams[t][i] - ball).magnitude)
+            for g, name in enumerate(goals):
+                view = graph.view(team=t, goal=g, kicker=kicker)
+                paths = self._solve(view, k=len(top_path_colors))
+                result[(team, name)] = GoalPaths.from_graph(
+                    view, paths, top_path_colors)
+        return result
+
+    def goal_paths_by_kicker(self,
+                             environment: Environment,
+                             top_path_colors: List[pygame.Color] = [
+                                 pygame.Color(219, 42, 54),
+                                 pygame.Color(232, 232, 37)
+                             ]
+                             ) -> Dict[Player, GoalPaths]:
+        '''
+        Returns the top goal paths of the kicking team as if each of its players was the kicker.
+        One search over a shared PassGraph covers every kicker, see `PassGraph.top_paths_all_sources`.
+        `environment.kicker` is not needed and does not change the result.
+        '''
+        env = environment
+        team = env.red_players if env.kick_team == Team.RED else env.blue_players
+        graph = PassGraph.from_environment(env, interception=self.interception)
+        paths = graph.top_paths_all_sources(k=len(top_path_colors))
+        return {p: GoalPaths.from_graph(graph, paths[i], top_path_colors)
+                for i, p in enumerate(team)}
+
+    def goal_path_survival(self, environment: Environment, goal_paths: GoalPaths, samples: int = 32, jitter: float = 3.0) -> List[float]:
+        '''
+        Returns, per goal path, the share of `samples` copies of the environment
+        with every player jittered by up to `jitter` pixels in which it stays feasible.
+        '''
+        return path_survival(
+            Layout.from_environment(environment),
+            [p for _, p, _ in goal_paths.encoded],
+            samples=samples,
+            jitter=jitter,
+            interception=self.interception,
+        )
+
+    def receiver_heatmap(self, environment: Environment, cell: float = 16, layout: Optional[Layout] = None) -> ReceiverHeatmap:
+        '''
+        Returns the best goal path cost with an extra receiver of the kicking
+        team at every `cell` sized grid cell of the upper field half.
+        `layout` replaces the players of the environment, e.g. a snapshot taken
+        before solving in another thread, the corridor cache of the environment
+        is then left alone.
+        '''
+        bb = environment.field.bb_upper
+        return ReceiverHeatmap(
+            layout or Layout.from_environment(environment),
+            area=(bb.left, bb.top, bb.right, bb.bottom),
+            cell=cell,
+            interception=self.interception,
+            corridors=None if layout else environment.corridors,
+        )
+
+    def _solve(self, graph: PassGraph, k: int):
+        '''
+        Returns the k cheapest (cost, path) pairs of the graph.
+        '''
+        return graph.top_paths(k=k)
+
+
+class SubsetDPPolicy(BasicPolicy):
+    '''
+    Same as BasicPolicy, but solves goal paths exactly with a DP over subsets of passers.
+    Falls back to the DFS of BasicPolicy when the DP table would exceed `max_table_bytes`.
+    '''
+
+    def __init__(self, interception: Optional[InterceptionModel] = None, max_table_bytes: int = 64 * 2**20):
+        super().__init__(interception=interception)
+        self.max_table_bytes = max_table_bytes
+
+    def _solve(self, graph: PassGraph, k: int):
+        '''
+        Returns the k cheapest (cost, path) pairs of the graph.
+        '''
+        table_bytes = PassGraph.subset_dp_bytes(graph.n, k)
+        if table_bytes > self.max_table_bytes:
+            LOG.debug(
+                f'DP table needs {table_bytes} bytes, falling back to <y>DFS</>.')
+            return super()._solve(graph, k)
+        return graph.top_paths_subset_dp(k=k)
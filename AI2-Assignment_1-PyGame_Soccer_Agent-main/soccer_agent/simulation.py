@@ -1,7 +1,9 @@
-from dataclasses import dataclass
-from typing import Mapping
+import math
+from dataclasses import dataclass, field
+from typing import List, Mapping, Optional
+from soccer_agent.Sprites.heatmap import HeatmapOverlay
 from soccer_agent.Sprites.player import Team
-from soccer_agent.policy import Environment
+from soccer_agent.policy import Environment, Policy
 from soccer_agent.Math.geometry import Point, Rectangle
 from soccer_agent.GUI.window import PyGame_Window
 
@@ -31,46 +33,38 @@ class Simulator:
         # Register self with window
         self.LOG.info(f'Attaching to window: {self.context.window}')
         self._unbind = self.context.window.register_tick_listener(self._render)
+        self._unbind_redraw = self.context.window.register_redraw_check(
+            self.needs_redraw)
         self.LOG.info(f'Attaching <g>complete</>.')
         # Resize window and set background
         self.LOG.info(f'Resizing window to fit field...')
-        self.context.window.window = pygame.display.set_mode(
-            [self.context.field.rect.width, self.context.field.rect.height], flags=pygame.SCALED)
+        self.context.window.set_mode(
+            [self.context.field.rect.width, self.context.field.rect.height])
         self.LOG.info(f'Resize <g>complete</>.')
+        # Prebuild the bb layers so toggling them only swaps surfaces
+        for e in (self.context.field, self.context.red_player_model, self.context.blue_player_model):
+            e._image_bb
         # Setup render and other groups
         self.render_group = pygame.sprite.LayeredDirty(self.context.field)
+        # Receiver heatmap, drawn between the field and the players
+        self.heatmap_overlay = HeatmapOverlay(self.context.field.rect.size)
+        self.render_group.add(self.heatmap_overlay, layer=5)
         self.red_group = pygame.sprite.Group()
         self.blue_group = pygame.sprite.Group()
-        # Add player sprites
-        self.LOG.info(f'Setting up player sprites...')
-        red_team = [None]*self.player_counts[Team.RED]
-        blu_team = [None]*self.player_counts[Team.BLUE]
-        for i in range(self.player_counts[Team.RED]):
-            md = self.context.red_player_model.copy()
-            self.render_group.add(md, layer=10)
-            self.red_group.add(md)
-            red_team[i] = md
-        for i in range(self.player_counts[Team.BLUE]):
-            md = self.context.blue_player_model.copy()
-            self.render_group.add(md, layer=10)
-            self.blue_group.add(md)
-            blu_team[i] = md
-        self.LOG.info(f'Player sprites setup <g>complete</>.')
-        # Setup environment
-        self.environment = Environment(
-            red_players=red_team,
-            blue_players=blu_team,
-            kick_team=self.kick_team,
-            field=self.context.field
-        )
-        # Store goal path
+        # Add player sprites and setup environment
+        self._setup_players()
+        # No. of screen areas redrawn in the last tick
+        self.last_redraws = 0
+        # Store goal path and the share of jittered layouts each path survives
         self._goal_paths = []
+        self._survival = None
         self._goal_path_dirty = False
         # Init. text labels
         self.font = pygame.font.Font('freesansbold.ttf', 32)
         self.texts = {
             'no_path': self.font.render('No path found...!', True, (255, 255, 255)),
             'top_paths': self.font.render('Best paths:', True, (255, 255, 255)),
+            'provisional_paths': self.font.render('Provisional:', True, (255, 255, 255)),
         }
 
     @property
@@ -79,19 +73,123 @@ class Simulator:
 
     @goal_paths.setter
     def goal_paths(self, value):
+        # Survival rates belong to the paths they were computed for, refining
+        # provisional paths mostly returns the same ones
+        same = getattr(self._goal_paths, 'same_paths', None)
+        if not (same and same(value)):
+            self._survival = None
         self._goal_path_dirty = True
         self._goal_paths = value
 
+    @property
+    def survival(self):
+        return self._survival
+
+    @survival.setter
+    def survival(self, value):
+        self._goal_path_dirty = True
+        self._survival = value
+
+    @property
+    def heatmap(self):
+        return self.heatmap_overlay.heatmap
+
+    @heatmap.setter
+    def heatmap(self, value):
+        self.heatmap_overlay.set_heatmap(value)
+        # Repaint the whole field in case the overlay got hidden
+        self._goal_path_dirty = True
+
     @property
     def render_bb(self):
         return self._render_bb
 
     @render_bb.setter
     def render_bb(self, value):
+        if value == self._render_bb:
+            return
         self._render_bb = value
-        # update values for all sprites
-        for e in self.render_group:
+        # Players are small and repaint themselves when marked dirty
+        for e in self.red_group:
             e.render_bb = value
+        for e in self.blue_group:
+            e.render_bb = value
+        # Only repaint the field under its bb lines
+        field = self.context.field
+        field.render_bb = value
+        for strip in field.bb_strips:
+            self.render_group.repaint_rect(strip)
+
+    def _setup_players(self):
+        '''
+        Replaces the player sprites with `player_counts` fresh copies of the player models.
+        '''
+        self.LOG.info(f'Setting up player sprites...')
+        for e in (*self.red_group, *self.blue_group):
+            e.kill()
+        red_team = [None]*self.player_counts[Team.RED]
+        blu_team = [None]*self.player_counts[Team.BLUE]
+        for i in range(self.player_counts[Team.RED]):
+            md = self.context.red_player_model.copy()
+            md.render_bb = self._render_bb
+            md.dirty = 1
+            self.render_group.add(md, layer=10)
+            self.red_group.add(md)
+            red_team[i] = md
+        for i in range(self.player_counts[Team.BLUE]):
+            md = self.context.blue_player_model.copy()
+            md.render_bb = self._render_bb
+            md.dirty = 1
+            self.render_group.add(md, layer=10)
+            self.blue_group.add(md)
+            blu_team[i] = md
+        self.LOG.info(f'Player sprites setup <g>complete</>.')
+        self.environment = Environment(
+            red_players=red_team,
+            blue_players=blu_team,
+            kick_team=self.kick_team,
+            field=self.context.field
+        )
+
+    def set_player_counts(self, player_counts: Mapping[Team, int]):
+        '''
+        Changes the no. of players per team, copying the loaded player models.
+        Players are unplaced afterwards, so relocate them before solving.
+        '''
+        if dict(player_counts) == dict(self.player_counts):
+            return
+        self.player_counts = player_counts
+        self._setup_players()
+        self.heatmap = None
+        self.goal_paths = []
+
+    def set_bb_colors(self, field_color: pygame.Color, player_color: pygame.Color):
+        '''
+        Recolors the bounding boxes, only repainting them if they are shown.
+        '''
+        field = self.context.field
+        if field.bb_color != field_color:
+            field.bb_color = field_color
+            if self._render_bb:
+                for strip in field.bb_strips:
+                    self.render_group.repaint_rect(strip)
+        for e in (self.context.red_player_model, self.context.blue_player_model,
+                  *self.red_group, *self.blue_group):
+            if e.bb_color != player_color:
+                e.bb_color = player_color
+                if self._render_bb:
+                    e.dirty = 1
+
+    def needs_redraw(self) -> bool:
+        '''
+        True while the scene changed since the last render, or provisional paths are being refined.
+        '''
+        return (
+            self._goal_path_dirty
+            or not getattr(self.goal_paths, 'optimal', True)
+            or bool(self.render_group.lostsprites)
+            or any(s.dirty for s in self.render_group)
+        )
 
     @staticmethod
     def _get_rect_random_loc(rect: Rectangle, num_points: int = 1):
@@ -110,10 +208,18 @@ class Simulator:
         '''
         Renders everything on screen.
         '''
+        if not getattr(self.goal_paths, 'optimal', True):
+            # Keep improving provisional paths while rendering them
+            self.goal_paths = self.goal_paths.refine(
+                self.context.config.refine_budget_ms)
         if self._goal_path_dirty == True:
             self.render_group.repaint_rect(self.context.field.rect)
             self._goal_path_dirty = False
-        self.render_group.draw(window.window)
+        self.last_redraws = len(self.render_group.draw(window.window))
+        # Full screen draws leave dirty flags set, every sprite is drawn by now
+        for s in self.render_group:
+            if s.dirty == 1:
+                s.dirty = 0
         for color, path, path_len in reversed(self.goal_paths):
             # Render goal paths
             pygame.draw.aalines(window.window, color,
@@ -123,14 +229,18 @@ class Simulator:
         render_rect.top_left += Point(10,
                                       self.context.field.bb_center.height*1.3)
         if len(self.goal_paths) > 0:
+            lbl = self.texts['top_paths'] if getattr(
+                self.goal_paths, 'optimal', True) else self.texts['provisional_paths']
             lbl_rect = Rectangle.from_pygame(
-                self.texts['top_paths'].get_rect())
-            lbl_rect.top_left = render_rect.top_left
-            window.window.blit(self.texts['top_paths'], lbl_rect.to_pygame())
+                lbl.get_rect()).translate(render_rect.top_left)
+            window.window.blit(lbl, lbl_rect.to_pygame())
             # Render best path values
             for i, data in enumerate(self.goal_paths):
                 color, _, path_len = data
-                tx = self.font.render(f'{path_len:.2f}', True, color)
+                text = f'{path_len:.2f}'
+                if self._survival is not None:
+                    text += f' ({self._survival[i]:.0%})'
+                tx = self.font.render(text, True, color)
                 rect = Rectangle.from_pygame(tx.get_rect())
                 rect.top_left = Point(
                     lbl_rect.right + 10, lbl_rect.top + i*(rect.height+10))
@@ -145,4 +255,127 @@ class Simulator:
         self.LOG.info(f'Deleting self.')
         self.LOG.info(f'Unbinding from window.')
         self._unbind()
+        self._unbind_redraw()
         self.LOG.info(f'Goodbye.')
+
+
+@dataclass
+class Match:
+    '''
+    A single simulation shown as one tile of a MultiMatchView.
+    '''
+    environment: Environment
+    # Top-left of the tile in the window
+    offset: Point
+    goal_paths: list = field(default_factory=list)
+
+
+@dataclass(repr=True)
+class MultiMatchView:
+    '''
+    Tiles several concurrent simulations into one window.
+    The field background of every tile is cached in a single surface and all
+    player sprites are drawn with one batched `Surface.blits` call per tick.
+    '''
+    context: Context
+    # No. of players per team
+    player_counts: Mapping[Team, int]
+    # The kicking team
+    kick_team: Team
+    # No. of simulations to show
+    match_count: int
+    # Scaling of every tile relative to the field
+    tile_scale: float = 0.25
+    # Tiles per row, defaults to a square grid
+    columns: Optional[int] = None
+
+    def __post_init__(self):
+        self.LOG = LOG.bind(tag='MultiMatchView')
+        self.columns = self.columns or math.ceil(math.sqrt(self.match_count))
+        rows = math.ceil(self.match_count / self.columns)
+        field_rect = self.context.field.rect
+        self.tile_size = Point(round(field_rect.width*self.tile_scale),
+                               round(field_rect.height*self.tile_scale))
+        self.LOG.info(
+            f'Tiling <y>{self.match_count}</> matches in <y>{self.columns}x{rows}</> grid.')
+        self._unbind = self.context.window.register_tick_listener(self._render)
+        self._unbind_redraw = self.context.window.register_redraw_check(
+            lambda: self._changed)
+        self.context.window.set_mode(
+            [self.tile_size.x*self.columns, self.tile_size.y*rows])
+        # Every match gets its own players and environment
+        self.matches: List[Match] = []
+        for i in range(self.match_count):
+            row, col = divmod(i, self.columns)
+            env = Environment(
+                red_players=[self.context.red_player_model.copy()
+                             for _ in range(self.player_counts[Team.RED])],
+                blue_players=[self.context.blue_player_model.copy()
+                              for _ in range(self.player_counts[Team.BLUE])],
+                kick_team=self.kick_team,
+                field=self.context.field,
+            )
+            self.matches.append(Match(environment=env, offset=Point(
+                col*self.tile_size.x, row*self.tile_size.y)))
+        # Shared tile images
+        self.images = {
+            Team.RED: self.context.red_player_model.scaled_image(self.tile_scale),
+            Team.BLUE: self.context.blue_player_model.scaled_image(self.tile_scale),
+        }
+        self.background = self._render_background()
+        self._blit_sequence = []
+        self._paths = []
+        self._changed = True
+        self.invalidate()
+
+    def _render_background(self) -> pygame.Surface:
+        '''
+        Renders the static field of every tile once.
+        '''
+        tile = self.context.field.scaled_image(self.tile_scale)
+        bg = pygame.Surface(self.context.window.window.get_size()).convert()
+        bg.blits([(tile, (*m.offset,)) for m in self.matches], doreturn=False)
+        return bg
+
+    def invalidate(self):
+        '''
+        Rebuilds the cached sprite blits and paths after players moved.
+        '''
+        s = self.tile_scale
+        self._blit_sequence = [
+            (self.images[team], (m.offset.x + p.rect.x*s, m.offset.y + p.rect.y*s))
+            for m in self.matches
+            for team, players in ((Team.RED, m.environment.red_players),
+                                  (Team.BLUE, m.environment.blue_players))
+            for p in players
+        ]
+        self._paths = [
+            (color, [(m.offset.x + x*s, m.offset.y + y*s) for x, y in path])
+            for m in self.matches
+            for color, path, _ in reversed(m.goal_paths)
+        ]
+        self._changed = True
+
+    def relocate_players(self, policy: Policy, top_path_colors: List[pygame.Color]):
+        '''
+        Relocates the players of every match and solves its goal paths.
+        '''
+        for m in self.matches:
+            m.environment = policy.relocate_players(environment=m.environment)
+            m.goal_paths = policy.goal_path(
+                m.environment, top_path_colors=top_path_colors)
+        self.invalidate()
+
+    def _render(self, window: PyGame_Window):
+        '''
+        Renders every tile with one background blit and one batched sprite blit.
+        '''
+        window.window.blit(self.background, (0, 0))
+        window.window.blits(self._blit_sequence, doreturn=False)
+        for color, path in self._paths:
+            pygame.draw.aalines(window.window, color, closed=False, points=path)
+        self._changed = False
+
+    def __del__(self):
+        self._unbind()
+        self._unbind_redraw()
@@ -0,0 +1,16 @@
+import os
+import pathlib
+
+import pytest
+
+# Run pygame without a real display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+ASSETS = pathlib.Path(__file__).parent / '../soccer_agent/assets'
+
+
+@pytest.fixture
+def display():
+    import pygame
+    pygame.display.init()
+    yield pygame.display.set_mode((1, 1))
+    pygame.display.quit()
@@ -0,0 +1,19 @@
+from soccer_agent.Sprites.atlas import ATLAS
+from soccer_agent.Sprites.player import Player
+
+from .conftest import ASSETS
+
+
+def test_players_share_surfaces(display):
+    ATLAS.clear()
+    a = Player(ASSETS / 'red.png').scale(0.5)
+    b = Player(ASSETS / 'red.png').scale(0.5)
+    c = a.copy()
+    assert a.image is b.image is c.image
+    assert a.rect.size == (64, 64)
+    for p in (a, b, c):
+        p.render_bb = True
+    assert a.image is b.image is c.image
+    assert a.image is not a._image
+    c.bb_color = (0, 255, 0)
+    assert c.image is not a.image
@@ -0,0 +1,128 @@
+import dataclasses
+import os
+
+import pygame
+import pytest
+
+from soccer_agent.Config.config import Config
+from soccer_agent.Config.loader import SCHEMA, ConfigWatcher, config_diff, load_config, parse_config
+
+
+class FakeWindow:
+    def __init__(self):
+        self.checks, self.listeners = [], []
+
+    def register_redraw_check(self, check):
+        self.checks.append(check)
+        return lambda: self.checks.remove(check)
+
+    def register_tick_listener(self, listener, stage='tick_end'):
+        self.listeners.append(listener)
+        return lambda: self.listeners.remove(listener)
+
+    def tick(self):
+        changed = any(c() for c in self.checks)
+        for l in self.listeners:
+            l(self)
+        return changed
+
+
+def test_schema_covers_config():
+    assert set(SCHEMA) == {f.name for f in dataclasses.fields(Config)}
+
+
+def test_parse_config():
+    config = parse_config({
+        'top_path_colors': ['red', '#00ff00', [0, 0, 255]],
+        'solve_budget_ms': False,
+        'window_size': [640, 480],
+    })
+    assert config.top_path_colors == [pygame.Color(255, 0, 0), pygame.Color(0, 255, 0), pygame.Color(0, 0, 255)]
+    assert config.solve_budget_ms is None
+    assert config.window_size == (640, 480)
+    assert config_diff(Config(), config) == {
+        'top_path_colors', 'solve_budget_ms', 'window_size'}
+    # Keys left out get the same defaults as running without a config file
+    assert parse_config({}) == Config()
+
+
+def test_parse_config_lists_every_error():
+    with pytest.raises(Exception) as e:
+        parse_config({'tick_rate': 0, 'blue_players': True,
+                     'field_bb_color': 'nope', 'k': 3})
+    for key in ('tick_rate', 'blue_players', 'field_bb_color', 'k'):
+        assert f'`{key}`' in str(e.value)
+    # relocate_players needs a red goal box player, and a kicker and goal box player in blue
+    with pytest.raises(Exception) as e:
+        parse_config({'red_players': 0, 'blue_players': 1})
+    assert '`red_players`' in str(e.value) and '`blue_players`' in str(e.value)
+    assert parse_config({'red_players': 1, 'blue_players': 2}).blue_players == 2
+
+
+def test_watcher_reloads_on_change(tmp_path):
+    path = tmp_path / 'config.toml'
+    path.write_text('tick_rate = 30\n')
+    assert load_config(path).tick_rate == 30
+    window, loaded = FakeWindow(), []
+    watcher = ConfigWatcher(path, window, loaded.append, poll_ms=0)
+    assert not window.tick()
+    path.write_text('tick_rate = 60\n')
+    os.utime(path, ns=(0, 1))
+    # The change wakes an idle window and is loaded on its tick
+    assert window.tick()
+    assert [c.tick_rate for c in loaded] == [60]
+    # An invalid file keeps the current config
+    path.write_text('tick_rate = "fast"\n')
+    os.utime(path, ns=(0, 2))
+    window.tick()
+    assert len(loaded) == 1
+    # A config that fails to apply does not stop the window
+    def fail(config):
+        raise Exception('players do not fit')
+    watcher.on_change = fail
+    path.write_text('tick_rate = 20\n')
+    os.utime(path, ns=(0, 3))
+    assert window.tick()
+    watcher.close()
+    assert window.checks == [] and window.listeners == []
+
+
+def test_apply_config_warns_without_simulator():
+    from types import SimpleNamespace
+    from soccer_agent.__init__ import LOG
+    from soccer_agent.main import apply_config
+    context = SimpleNamespace(config=Config(), window=SimpleNamespace())
+    warnings = []
+    sink = LOG.add(lambda m: warnings.append(str(m)), level='WARNING')
+    try:
+        # Multiple matches have no simulator, so players and colors stay as they are
+        apply_config(context, dataclasses.replace(
+            Config(), tick_rate=30, red_players=5, field_bb_color=pygame.Color(1, 2, 3)))
+    finally:
+        LOG.remove(sink)
+    assert context.config.tick_rate == context.window.tick_rate == 30
+    assert len(warnings) == 1
+    assert 'red_players' in warnings[0] and 'field_bb_color' in warnings[0]
+    assert 'tick_rate' not in warnings[0]
+
+
+def test_apply_config_restores_config_that_fails():
+    from types import SimpleNamespace
+    from soccer_agent.main import apply_config
+    from soccer_agent.Sprites.player import Team
+    context = SimpleNamespace(config=Config(), window=SimpleNamespace())
+    counts = []
+    simulator = SimpleNamespace(
+        environment=None, set_player_counts=lambda c: counts.append(c[Team.RED]))
+
+    def relocate_players(environment):
+        if counts[-1] > 10:
+            raise Exception('players do not fit')
+        return SimpleNamespace(kicker=None)
+    policy = SimpleNamespace(relocate_players=relocate_players)
+    with pytest.raises(Exception):
+        apply_config(context, dataclasses.replace(Config(), red_players=50, tick_rate=30),
+                     simulator=simulator, policy=policy)
+    # The players are rebuilt with the running config
+    assert counts == [50, Config().red_players]
+    assert context.config == Config() and context.window.tick_rate == Config().tick_rate
@@ -0,0 +1,27 @@
+import pygame
+
+from soccer_agent.Sprites.field import SoccerField
+
+# tobytes is pygame 2.1.3+, tostring is deprecated from then on
+tobytes = getattr(pygame.image, 'tobytes', None) or pygame.image.tostring
+
+
+def test_bb_strips_cover_bb_lines(display):
+    field = SoccerField()
+    clean = field.image.copy()
+    field.dirty = 0
+    field.render_bb = True
+    with_bb = field.image
+    assert not field.dirty
+    for strip in field.bb_strips:
+        clean.blit(with_bb, strip, strip)
+    assert tobytes(clean, 'RGB') == tobytes(with_bb, 'RGB')
+
+
+def test_lower_boxes_mirror_upper_boxes(display):
+    field = SoccerField()
+    height = field.rect.height
+    for upper, lower in ((field.bb_upper_small, field.bb_lower_small),
+                         (field.bb_upper_goal, field.bb_lower_goal)):
+        assert (lower.left, lower.right) == (upper.left, upper.right)
+        assert (lower.top, lower.bottom) == (height - upper.bottom, height - upper.top)
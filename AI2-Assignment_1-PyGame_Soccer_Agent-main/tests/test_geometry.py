@@ -0,0 +1,37 @@
+from soccer_agent.Math.geometry import Point, Rectangle
+
+
+def test_rectangle_edges():
+    rect = Rectangle(Point(10, 20), Point(50, 80))
+    assert (rect.left, rect.top, rect.right, rect.bottom) == (10, 20, 50, 80)
+    assert rect.to_pygame().right == rect.right
+    assert rect.width == rect.right - rect.left
+
+
+def test_rectangle_substract_stays_inside():
+    outer = Rectangle(Point(10, 10), Point(110, 60))
+    inner = Rectangle(Point(40, 10), Point(80, 30))
+    parts = outer.substract(inner)
+    assert sum(p.area for p in parts) == outer.area - inner.area
+    for p in parts:
+        assert outer.left <= p.left and p.right <= outer.right
+        assert outer.intersect(p).area == p.area
+
+
+def test_rectangle_intersect_uses_right_edges():
+    a = Rectangle(Point(10, 10), Point(60, 60))
+    b = Rectangle(Point(40, 30), Point(100, 90))
+    assert a.intersect(b) == Rectangle(Point(40, 30), Point(60, 60))
+    # Touching edges do not intersect
+    assert a.intersect(Rectangle(Point(60, 10), Point(80, 60))) is None
+
+
+def test_field_zones_stay_inside_field(display):
+    from soccer_agent.Sprites.field import SoccerField
+    field = SoccerField()
+    upper = field.bb_upper
+    zones = upper.substract(field.bb_upper_small)
+    assert sum(z.area for z in zones) == upper.area - field.bb_upper_small.area
+    for z in zones:
+        assert upper.left <= z.left < z.right <= upper.right <= field.rect.width
+        assert upper.top <= z.top < z.bottom <= upper.bottom
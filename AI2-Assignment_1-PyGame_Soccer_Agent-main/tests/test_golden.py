@@ -0,0 +1,31 @@
+import json
+import pathlib
+
+import pytest
+
+from soccer_agent.Bench.golden import diff_result, verify
+
+CORPUS = pathlib.Path(__file__).parent / 'golden/goal_paths.json'
+
+
+@pytest.mark.parametrize('solver', ['reference', 'dfs', 'dp', 'anytime'])
+def test_solvers_match_golden_corpus(solver):
+    report = verify(json.loads(CORPUS.read_text()), solver=solver, workers=2)
+    assert report['layouts'] == 200
+    assert report['failures'] == []
+
+
+def test_diff_result_compares_the_last_paths():
+    def paths(*nodes, cost=(1.0, 2.0)):
+        return [{'path': list(n), 'cost': c, 'length': c} for n, c in zip(nodes, cost)]
+    expected = paths((0, 1, 3), (0, 2, 3))
+    swapped_last = paths((0, 1, 3), (0, 1, 2, 3))
+    # Fewer than k paths, or a k-th path that is not tied, must match
+    assert diff_result(expected, swapped_last, 1e-6) is not None
+    assert diff_result(expected, swapped_last, 1e-6, next_cost=3.0) is not None
+    # A k-th path tied with the next one may be either of them
+    assert diff_result(expected, swapped_last, 1e-6, next_cost=2.0) is None
+    # Tied paths before the last group may come in any order
+    tied = paths((0, 1, 3), (0, 2, 3), (0, 1, 2, 3), cost=(1.0, 1.0, 2.0))
+    assert diff_result(tied, [tied[1], tied[0], tied[2]], 1e-6) is None
+    assert diff_result(tied, [tied[0], tied[0], tied[2]], 1e-6) is not None
@@ -0,0 +1,46 @@
+import pygame
+
+from soccer_agent.IO.pygame_io import KeybindAction_Callable, KeybindHost, KeybindKey
+
+
+def key_event(key, mod=pygame.KMOD_NONE, type=pygame.KEYUP):
+    return pygame.event.Event(type, key=key, mod=mod)
+
+
+def test_dispatch_with_modifiers():
+    host = KeybindHost()
+    calls = []
+    for name in ('plain', 'ctrl_shift'):
+        host.register_action(name, KeybindAction_Callable(
+            callable=lambda n=name: calls.append(n), description=name))
+    host.register_keybind(KeybindKey(key_code=pygame.K_p), 'plain')
+    host.register_keybind(KeybindKey(
+        key_code=pygame.K_p, mod=pygame.KMOD_LCTRL | pygame.KMOD_SHIFT), 'ctrl_shift')
+    host.handle_key_event(key_event(pygame.K_p, mod=pygame.KMOD_CAPS))
+    host.handle_key_event(key_event(
+        pygame.K_p, mod=pygame.KMOD_RCTRL | pygame.KMOD_LSHIFT))
+    # No binding for these modifiers, falls back to the plain one
+    host.handle_key_event(key_event(pygame.K_p, mod=pygame.KMOD_ALT))
+    host.handle_key_event(key_event(pygame.K_p, mod=pygame.KMOD_LSHIFT))
+    host.handle_key_event(key_event(pygame.K_p, type=pygame.KEYDOWN))
+    host.handle_key_event(pygame.event.Event(pygame.MOUSEMOTION, pos=(0, 0)))
+    assert calls == ['plain', 'ctrl_shift', 'plain', 'plain']
+    assert host.bound_event_types == {pygame.KEYUP}
+
+
+def test_is_active():
+    key = KeybindKey(key_code=pygame.K_x, mod=pygame.KMOD_LSHIFT)
+    assert key.is_active(key_event(pygame.K_x, mod=pygame.KMOD_RSHIFT))
+    assert not key.is_active(key_event(pygame.K_x))
+    assert not key.is_active(key_event(pygame.K_x, type=pygame.KEYDOWN))
+    plain = KeybindKey(key_code=pygame.K_x)
+    assert plain.is_active(key_event(pygame.K_x, mod=pygame.KMOD_CTRL))
+
+
+def test_window_lets_window_and_key_events_through():
+    from soccer_agent.GUI.window import PyGame_Window
+    window = PyGame_Window('test', 10, 10)
+    for kind in (pygame.KEYDOWN, pygame.KEYUP, pygame.WINDOWRESIZED, pygame.WINDOWFOCUSLOST, pygame.QUIT):
+        assert not pygame.event.get_blocked(kind)
+    assert pygame.event.get_blocked(pygame.MOUSEMOTION)
+    pygame.display.quit()
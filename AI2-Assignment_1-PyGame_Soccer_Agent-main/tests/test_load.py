@@ -0,0 +1,18 @@
+import asyncio
+
+from soccer_agent.Bench.load import load_test, percentiles
+
+
+def test_percentiles():
+    stats = percentiles(list(range(1, 101)))
+    assert stats == {'p50': 51, 'p90': 91, 'p99': 100, 'max': 100}
+
+
+def test_load_test_relocates_without_leaks():
+    report = asyncio.run(load_test(
+        rates={'x': 20, 'b': 10}, duration=0.5, warmup=0.1, memory_every=0.1))
+    assert report['posted']['x'] >= 5 and report['solves'] >= 5
+    assert report['ticks'] > 0 and report['frame_ms']['max'] > 0
+    assert report['tick_listeners'] == {'tick_start': 0, 'tick_end': 0, 'frame_end': 0}
+    assert report['redraw_checks'] == 0
+    assert report['memory_kib']
@@ -0,0 +1,288 @@
+import dataclasses
+
+from soccer_agent.Math.corridors import CorridorCache
+from soccer_agent.Math.geometry import Point
+from soccer_agent.Math.pass_graph import InterceptionModel, Layout, PassGraph, ReceiverHeatmap, path_survival
+
+
+def make_graph(defenders, interception=None):
+    passers = [Point(100, 300), Point(100, 100)]
+    return PassGraph(
+        passers=passers,
+        blockers=passers + defenders,
+        defenders=defenders,
+        goal=Point(300, 0),
+        radius=10,
+        kicker=0,
+        interception=interception,
+    )
+
+
+def test_static_blocking():
+    graph = make_graph([Point(100, 200)])
+    assert not graph.connects(0, 1)
+    assert not graph.connects(1, 0)
+    assert graph.connects(1, graph.goal)
+
+
+def test_interception_lowers_success():
+    model = InterceptionModel()
+    far = make_graph([Point(500, 500)], interception=model)
+    near = make_graph([Point(130, 200)], interception=model)
+    assert far.connects(0, 1) and near.connects(0, 1)
+    assert near.success[0][1] < far.success[0][1]
+    assert near.cost[0][1] > near.length[0][1]
+    assert far.length[0][1] == 200
+
+
+def random_graph(seed, passers=7, defenders=4, interception=None):
+    import random
+    rng = random.Random(seed)
+    pts = [Point(rng.randint(0, 500), rng.randint(50, 350))
+           for _ in range(passers+defenders)]
+    return PassGraph(
+        passers=pts[:passers],
+        blockers=pts,
+        defenders=pts[passers:],
+        goal=Point(250, 0),
+        radius=16,
+        kicker=0,
+        interception=interception,
+    )
+
+
+def brute_force_paths(graph):
+    paths = []
+
+    def explore(trace):
+        i = trace[-1]
+        if len(trace) > 1 and graph.connects(i, graph.goal):
+            paths.append(tuple(trace) + (graph.goal,))
+        for j in graph.neighbours[i]:
+            if j != graph.goal and j not in trace:
+                explore(trace + [j])
+    explore([graph.kicker])
+    return sorted(paths, key=graph.path_cost)
+
+
+def test_top_paths_matches_brute_force():
+    for seed in range(20):
+        graph = random_graph(seed, interception=InterceptionModel())
+        expected = brute_force_paths(graph)[:4]
+        found = graph.top_paths(k=4)
+        assert [round(c, 6) for c, _ in found] == [
+            round(graph.path_cost(p), 6) for p in expected]
+        for c, p in found:
+            assert abs(graph.path_cost(p) - c) < 1e-6
+
+
+def test_subset_dp_matches_dfs():
+    for seed in range(20):
+        graph = random_graph(seed, interception=InterceptionModel())
+        dfs = graph.top_paths(k=4)
+        dp = graph.top_paths_subset_dp(k=4)
+        assert [round(c, 6) for c, _ in dp] == [round(c, 6) for c, _ in dfs]
+        for c, p in dp:
+            assert abs(graph.path_cost(p) - c) < 1e-6
+
+
+def test_all_sources_match_per_kicker_search():
+    for seed in range(10):
+        graph = random_graph(seed, passers=8, interception=InterceptionModel())
+        for min_passes in (1, 2):
+            found = graph.top_paths_all_sources(k=4, min_passes=min_passes)
+            assert len(found) == graph.n
+            for kicker in range(graph.n):
+                graph.kicker = kicker
+                expected = graph.top_paths(k=4, min_passes=min_passes)
+                assert [round(c, 6) for c, _ in found[kicker]] == [
+                    round(c, 6) for c, _ in expected]
+                for c, p in found[kicker]:
+                    assert p[0] == kicker and p[-1] == graph.goal
+                    assert len(set(p)) == len(p) > min_passes + 1
+                    assert abs(graph.path_cost(p) - c) < 1e-6
+
+
+def test_goal_paths_by_kicker(display):
+    import random
+    from soccer_agent.policy import BasicPolicy, Environment
+    from soccer_agent.Sprites.field import SoccerField
+    from soccer_agent.Sprites.player import Player, Team
+    from .conftest import ASSETS
+    red = Player(ASSETS / 'red.png').scale(0.5)
+    blue = Player(ASSETS / 'blue.png').scale(0.5)
+    env = Environment(
+        red_players=[red.copy() for _ in range(3)],
+        blue_players=[blue.copy() for _ in range(4)],
+        kick_team=Team.BLUE,
+        field=SoccerField(),
+        rng=random.Random(0),
+    )
+    policy = BasicPolicy(interception=InterceptionModel())
+    env = policy.relocate_players(env)
+    # No kicker is needed, every player of the kicking team gets its own paths
+    env.kicker = None
+    by_kicker = policy.goal_paths_by_kicker(env)
+    assert list(by_kicker) == env.blue_players
+    assert any(len(p) for p in by_kicker.values())
+    for i, player in enumerate(env.blue_players):
+        env.kicker = player
+        expected = policy.goal_path(env)
+        found = by_kicker[player]
+        assert [round(l, 6) for _, _, l in found] == [round(l, 6) for _, _, l in expected]
+        for _, path, _ in found.encoded:
+            assert path[0] == i
+
+
+def test_corridor_cache_reuses_unmoved_pairs():
+    model = InterceptionModel()
+    layout = Layout(
+        passers=(Point(100, 300), Point(100, 100), Point(400, 250), Point(250, 200)),
+        defenders=(Point(100, 200), Point(300, 150)),
+        goal=Point(300, 0), radius=10, kicker=0)
+    moved = dataclasses.replace(layout, passers=(Point(200, 320),) + layout.passers[1:])
+    cache = CorridorCache()
+    marked = dataclasses.replace(moved, defenders=(Point(150, 310), Point(300, 150)))
+    # Every pair, nothing, the pairs of the moved passer, nothing as only a
+    # defender moved, every pair again for a new radius. Only the passes of
+    # the moved passer, or near the moved defender, are tested again.
+    for step, computed, tested in ((layout, 10, 10), (layout, 0, 0), (moved, 4, 4), (marked, 0, 3),
+                                   (dataclasses.replace(marked, radius=12), 10, 10)):
+        before = cache.computed, cache.tested
+        graph = PassGraph.from_layout(step, model, corridors=cache)
+        expected = PassGraph.from_layout(step, model)
+        assert (cache.computed - before[0], cache.tested - before[1]) == (computed, tested)
+        assert graph.visible == expected.visible
+        assert graph.cost == expected.cost and graph.success == expected.success
+
+
+def test_corridor_cache_matches_uncached_builds():
+    import random
+    for model in (None, InterceptionModel()):
+        rng = random.Random(0)
+        cache = CorridorCache()
+        pts = [Point(rng.randint(0, 400), rng.randint(0, 400)) for _ in range(10)]
+        layout = Layout(passers=tuple(pts[:6]), defenders=tuple(pts[6:]),
+                        goal=Point(200, 0), radius=16)
+        for _ in range(30):
+            # Move a few players, at times onto the corridors of others
+            passers, defenders = list(layout.passers), list(layout.defenders)
+            for _ in range(rng.randint(0, 2)):
+                team = rng.choice((passers, defenders))
+                team[rng.randrange(len(team))] = Point(
+                    rng.randint(0, 400), rng.randint(0, 400))
+            layout = dataclasses.replace(
+                layout, passers=tuple(passers), defenders=tuple(defenders))
+            graph = PassGraph.from_layout(layout, model, corridors=cache)
+            expected = PassGraph.from_layout(layout, model)
+            assert graph.visible == expected.visible
+            assert graph.cost == expected.cost and graph.neighbours == expected.neighbours
+
+def test_match_graph_views_match_pass_graphs():
+    import random
+    from soccer_agent.Math.pass_graph import MatchGraph
+    model = InterceptionModel()
+    for seed in range(10):
+        rng = random.Random(seed)
+        teams = [[Point(rng.randint(0, 500), rng.randint(50, 650))
+                  for _ in range(5)] for _ in range(2)]
+        goals = [Point(250, 0), Point(250, 700)]
+        match = MatchGraph(teams, goals, radius=16, interception=model)
+        for t in range(2):
+            for g in range(2):
+                graph = PassGraph(
+                    passers=teams[t],
+                    blockers=teams[0] + teams[1],
+                    defenders=teams[1 - t],
+                    goal=goals[g],
+                    radius=16,
+                    kicker=1,
+                    interception=model,
+                )
+                view = match.view(team=t, goal=g, kicker=1)
+                assert view.neighbours == graph.neighbours
+                assert view.cost == graph.cost
+                assert view.top_paths(k=3) == graph.top_paths(k=3)
+
+
+def test_anytime_search():
+    from soccer_agent.Math.pass_graph import AnytimeSearch
+    for seed in range(20):
+        graph = random_graph(seed, passers=9, interception=InterceptionModel())
+        search = AnytimeSearch(graph, k=4)
+        provisional, _ = search.run(budget_ms=0)
+        for c, p in provisional:
+            assert abs(graph.path_cost(p) - c) < 1e-6
+        paths, optimal = search.run()
+        assert optimal
+        assert [round(c, 6) for c, _ in paths] == [
+            round(c, 6) for c, _ in graph.top_paths(k=4)]
+
+
+def test_receiver_heatmap_matches_resolving_each_cell():
+    import math
+    from soccer_agent.Bench.solvers import random_layout
+    model = InterceptionModel()
+    for seed in range(3):
+        layout = random_layout(seed, passers=4, defenders=3)
+        heatmap = ReceiverHeatmap(layout, (26, 34, 544, 390), 40, model)
+        for idx in range(heatmap.cols * heatmap.rows):
+            if math.isnan(heatmap.costs[idx]):
+                continue
+            with_receiver = Layout(
+                passers=layout.passers + (heatmap.center(idx),),
+                defenders=layout.defenders,
+                goal=layout.goal,
+                radius=layout.radius,
+                kicker=layout.kicker,
+            )
+            best = PassGraph.from_layout(with_receiver, model).top_paths(k=1)
+            assert math.isclose(heatmap.costs[idx], best[0][0] if best else math.inf)
+
+
+def test_receiver_heatmap_covers_upper_half(display):
+    import random
+    from soccer_agent.policy import BasicPolicy, Environment
+    from soccer_agent.Sprites.field import SoccerField
+    from soccer_agent.Sprites.player import Player, Team
+    from .conftest import ASSETS
+    field = SoccerField()
+    red = Player(ASSETS / 'red.png').scale(0.5)
+    blue = Player(ASSETS / 'blue.png').scale(0.5)
+    env = Environment(
+        red_players=[red.copy() for _ in range(3)],
+        blue_players=[blue.copy() for _ in range(4)],
+        kick_team=Team.BLUE,
+        field=field,
+        rng=random.Random(0),
+    )
+    policy = BasicPolicy()
+    env = policy.relocate_players(env)
+    heatmap = policy.receiver_heatmap(env, cell=16)
+    left, top, right, bottom = heatmap.area
+    upper = field.bb_upper.to_pygame()
+    for edge, expected in zip(heatmap.area, (upper.left, upper.top, upper.right, upper.bottom)):
+        assert abs(edge - expected) < 2
+    assert 0 <= left < right <= field.rect.width
+    assert heatmap.cols == int((right - left) // 16)
+    # A snapshot layout gives the same heatmap without the environment cache
+    snapshot = policy.receiver_heatmap(env, cell=16, layout=Layout.from_environment(env))
+    assert snapshot.costs.tobytes() == heatmap.costs.tobytes()
+
+
+def test_path_survival_under_jitter():
+    import random
+    layout = Layout(
+        passers=(Point(100, 300), Point(100, 100)),
+        defenders=(Point(111, 200),),
+        goal=Point(300, 0),
+        radius=10,
+    )
+    assert PassGraph.from_layout(layout).connects(0, 1)
+    paths = [(0, 1, 2), (0, 2)]
+    still = path_survival(layout, paths, samples=10, jitter=0)
+    assert still == [1.0, 1.0]
+    marginal, direct = path_survival(
+        layout, paths, samples=200, jitter=3, rng=random.Random(0))
+    assert 0 < marginal < 1
+    assert direct == 1.0
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from soccer_agent.pipeline import Pipeline, Stage
+
+
+def test_pipeline_runs_all_items():
+    out = []
+    in_flight = {'now': 0, 'max': 0}
+
+    def take(x):
+        in_flight['now'] += 1
+        in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        return x
+
+    def slow_square(x):
+        time.sleep(0.001)
+        return x * x
+
+    def drop_odd(x):
+        in_flight['now'] -= 1
+        return x if x % 2 == 0 else None
+
+    stages = [
+        Stage('take', take, blocking=False),
+        Stage('square', slow_square, workers=4),
+        Stage('drop_odd', drop_odd, blocking=False),
+        Stage('write', out.append, blocking=False),
+    ]
+    stats = Pipeline(stages, queue_size=4).run_sync(range(200))
+    assert sorted(out) == [x * x for x in range(200) if x % 2 == 0]
+    assert stats['square'].items == 200
+    assert stats['write'].items == 100
+    # Items in flight are bounded by queues and workers, not the stream length
+    assert in_flight['max'] <= 4 + 4 + 4 + 2
+
+
+def test_pipeline_propagates_errors():
+    def fail(x):
+        if x == 10:
+            raise ValueError('boom')
+        return x
+    with pytest.raises(ValueError):
+        Pipeline([Stage('fail', fail)], queue_size=2).run_sync(range(100))
+
+
+def test_scenarios_are_reproducible(display):
+    import io
+    import random
+    import json
+    from soccer_agent.Math.pass_graph import InterceptionModel
+    from soccer_agent.pipeline import scenario_stages
+    from soccer_agent.policy import BasicPolicy, Environment
+    from soccer_agent.Sprites.field import SoccerField
+    from soccer_agent.Sprites.player import Player, Team
+    from .conftest import ASSETS
+    field = SoccerField()
+    red = Player(ASSETS / 'red.png').scale(0.5)
+    blue = Player(ASSETS / 'blue.png').scale(0.5)
+
+    def make_environment(seed):
+        return Environment(
+            red_players=[red.copy() for _ in range(3)],
+            blue_players=[blue.copy() for _ in range(4)],
+            kick_team=Team.BLUE,
+            field=field,
+            rng=random.Random(seed),
+        )
+
+    def run():
+        out = io.StringIO()
+        policy = BasicPolicy(interception=InterceptionModel())
+        stages = scenario_stages(policy, make_environment, out, [None]*2)
+        Pipeline(stages, queue_size=2).run_sync(range(5))
+        return out.getvalue().splitlines()
+    first = run()
+    # Global random state does not leak into seeded scenarios
+    random.random()
+    assert run() == first
+    assert len(set(first)) == 5
+    # Every path is scored by its success under the policy's interception model
+    for row in map(json.loads, first):
+        assert len(row['success']) == len(row['paths'])
+        assert all(0 < s < 1 for s in row['success'])
+        assert row['best_success'] == row['success'][0]
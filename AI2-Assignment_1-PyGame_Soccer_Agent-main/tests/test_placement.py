@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from soccer_agent.Math.geometry import Point, Rectangle
+from soccer_agent.Math.placement import PlacementSampler
+
+from .conftest import ASSETS
+
+
+def assert_valid(points, zones, radius):
+    for i, p in enumerate(points):
+        assert any(z.left + radius <= p.x <= z.right - radius and
+                   z.top + radius <= p.y <= z.bottom - radius for z in zones)
+        for q in points[:i]:
+            assert (p - q).magnitude >= 2*radius
+
+
+def inside(zone, rect):
+    return (zone.left <= rect.left and rect.right <= zone.right and
+            zone.top <= rect.top and rect.bottom <= zone.bottom)
+
+
+def test_sampler_places_non_overlapping_discs():
+    zones = [Rectangle(Point(0, 0), Point(400, 200)),
+             Rectangle(Point(0, 200), Point(100, 600))]
+    for seed in range(20):
+        sampler = PlacementSampler(radius=16, rng=random.Random(seed))
+        points = sampler.place(zones, 40)
+        assert len(points) == 40
+        assert_valid(points, zones, 16)
+
+
+def test_sampler_visits_cells_lazily():
+    zones = [Rectangle(Point(0, 0), Point(200, 100)),
+             Rectangle(Point(0, 100), Point(60, 300))]
+    sampler = PlacementSampler(radius=8, rng=random.Random(0))
+    # Every cell exactly once, in an order that depends on the seed
+    cells = list(sampler._cells(zones))
+    assert len(cells) == len(set(cells))
+    other = list(PlacementSampler(radius=8, rng=random.Random(1))._cells(zones))
+    assert cells != other and sorted(cells) == sorted(other)
+    # A zone of ~10^11 cells places a few players without listing its cells
+    huge = [Rectangle(Point(0, 0), Point(2e6, 2e6))]
+    assert_valid(PlacementSampler(radius=4, rng=random.Random(0)).place(huge, 50), huge, 4)
+
+def test_sampler_raises_when_zone_is_full():
+    sampler = PlacementSampler(radius=10, rng=random.Random(0))
+    with pytest.raises(Exception):
+        sampler.place([Rectangle(Point(0, 0), Point(40, 40))], 5)
+
+
+def test_relocate_players_keeps_players_apart(display):
+    from soccer_agent.policy import BasicPolicy, Environment
+    from soccer_agent.Sprites.field import SoccerField
+    from soccer_agent.Sprites.player import Player, Team
+    field = SoccerField()
+    red = Player(ASSETS / 'red.png').scale(0.5)
+    blue = Player(ASSETS / 'blue.png').scale(0.5)
+    env = Environment(
+        red_players=[red.copy() for _ in range(3)],
+        blue_players=[blue.copy() for _ in range(4)],
+        kick_team=Team.BLUE,
+        field=field,
+    )
+    random.seed(0)
+    for _ in range(50):
+        env = BasicPolicy().relocate_players(env)
+        players = env.red_players + env.blue_players
+        centers = [Point(*p.rect.center) for p in players]
+        for i, p in enumerate(centers):
+            for q in centers[:i]:
+                assert (p - q).magnitude >= 2*red.radius
+        boxed = [p for p in players if inside(field.bb_upper_small, p.rect)]
+        assert len(boxed) == 2
+        assert all(inside(field.bb_upper, p.rect)
+                   for p in players if p is not env.kicker)
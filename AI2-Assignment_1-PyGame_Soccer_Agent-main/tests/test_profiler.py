@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+import pygame
+
+from soccer_agent.Debug.profiler import Profiler
+from soccer_agent.GUI.window import PyGame_Window
+
+
+def test_frames_include_later_render_listeners(tmp_path):
+    window = PyGame_Window('test', 10, 10, tick_rate=1000)
+    profiler = Profiler(window, output_dir=tmp_path, ticks=3)
+    draws = []
+
+    def render(w):
+        # Registered after the profiler, like the simulator
+        time.sleep(0.01)
+        draws.append(1)
+    window.register_tick_listener(render)
+    profiler.add_counter('draws', lambda: len(draws))
+    profiler.arm()
+
+    async def quit_later():
+        while profiler.mode is not None:
+            await asyncio.sleep(0.01)
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    async def run():
+        await asyncio.gather(window.event_loop(), quit_later())
+    asyncio.run(run())
+    frames = profiler._frames
+    assert len(frames) == 3
+    assert all(f['frame_ms'] >= 10 for f in frames)
+    # Counters see the draw of their own tick
+    assert [f['draws'] for f in frames] == [1, 2, 3]
+    assert list(tmp_path.glob('profile-ticks-*.txt'))
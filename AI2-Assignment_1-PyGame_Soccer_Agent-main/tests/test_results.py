@@ -0,0 +1,62 @@
+from soccer_agent.Bench.solvers import random_layout
+from soccer_agent.IO.results import ColumnarReader, ColumnarWriter, decode_paths
+from soccer_agent.Math.pass_graph import InterceptionModel, PassGraph
+
+
+def solve(layout, colors):
+    graph = PassGraph.from_layout(layout, InterceptionModel())
+    return [(colors[i], [(x.x, x.y) for x in graph.path_points(p)], graph.path_length(p))
+            for i, (_, p) in enumerate(graph.top_paths(k=len(colors)))]
+
+
+def test_columnar_roundtrip_and_projection(tmp_path):
+    colors = [(219, 42, 54, 255), (232, 232, 37, 255)]
+    layouts = [random_layout(seed, passers=5, defenders=3) for seed in range(25)]
+    solves = [solve(l, colors) for l in layouts]
+    path = tmp_path / 'sweep.cols'
+    # Small chunks so offsets get rebased across chunks
+    with ColumnarWriter(path, chunk_rows=4) as writer:
+        for i, (layout, paths) in enumerate(zip(layouts, solves)):
+            writer.append(layout, paths, success=[0.5]*len(paths) if i % 2 else None)
+
+    table = ColumnarReader(path).read()
+    assert len(table['kicker']) == len(layouts)
+    for row, paths in enumerate(solves):
+        decoded = decode_paths(table, row)
+        assert [c for c, _, _ in decoded] == [c for c, _, _ in paths]
+        assert [l for _, _, l in decoded] == [l for _, _, l in paths]
+        assert [pts for _, pts, _ in decoded] == [pts for _, pts, _ in paths]
+        success = table['path_success'][table['path_offsets'][row]:table['path_offsets'][row+1]]
+        assert all(s == 0.5 if row % 2 else s != s for s in success)
+    offsets = table['passer_offsets']
+    assert offsets[-1] == 5 * len(layouts)
+
+    lengths = ColumnarReader(path).read(columns=['path_length'])
+    assert list(lengths) == ['path_length']
+    assert list(lengths['path_length']) == [l for p in solves for _, _, l in p]
+
+
+def test_columns_have_fixed_widths(tmp_path):
+    import dataclasses
+    import struct
+    from soccer_agent.IO.results import CHUNK_HEADER, COLUMN_HEADER, FILE_HEADER, SCHEMA
+    from soccer_agent.Math.geometry import Point
+    layout = random_layout(0, passers=5, defenders=3)
+    # Coordinates that float32 would round
+    layout = dataclasses.replace(layout, passers=tuple(
+        Point(p.x + 0.1234567891, p.y + 1/3) for p in layout.passers))
+    paths = solve(layout, [(0, 0, 0, 255)])
+    path = tmp_path / 'fixed.cols'
+    with ColumnarWriter(path) as writer:
+        writer.append(layout, paths)
+
+    table = ColumnarReader(path).read()
+    xy = table['passer_xy']
+    assert [Point(xy[2*i], xy[2*i+1]) for i in range(5)] == list(layout.passers)
+    assert decode_paths(table, 0) == paths
+    with open(path, 'rb') as f:
+        f.seek(FILE_HEADER.size + CHUNK_HEADER.size)
+        for name, code in SCHEMA:
+            col, col_code, itemsize, _ = COLUMN_HEADER.unpack(f.read(COLUMN_HEADER.size))
+            assert (col.rstrip(b'\0').decode(), col_code.decode()) == (name, code)
+            assert itemsize == struct.calcsize('<' + code)
@@ -0,0 +1,19 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from soccer_agent.Bench.solvers import random_layout
+from soccer_agent.IO.shared_layouts import SharedLayouts, solve_shared
+from soccer_agent.Math.pass_graph import PassGraph
+
+
+def test_workers_read_shared_layouts():
+    layouts = [random_layout(seed, passers=4 + seed % 3, defenders=3)
+               for seed in range(40)]
+    zones = {'upper': (29.5, 34.0, 544.5, 363.0)}
+    with SharedLayouts.create(layouts, zones) as shared:
+        assert [shared.layout(i) for i in range(len(shared))] == layouts
+        assert shared.zones() == zones
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            parts = pool.map(solve_shared, [shared.handle]*4,
+                             range(0, 40, 10), range(10, 50, 10), [3]*4)
+            results = [r for part in parts for r in part]
+    assert results == [PassGraph.from_layout(l).top_paths(k=3) for l in layouts]
@@ -0,0 +1,22 @@
+import pygame
+
+from soccer_agent.main import create_app
+from soccer_agent.policy import GoalPaths
+
+
+def test_survival_survives_unchanged_refines():
+    app = create_app([])
+    simulator = app.simulator
+    positions = ((0, 0), (10, 0), (10, 10))
+    paths = GoalPaths(positions, [(0, bytes((0, 1, 2)), 20.0)], colors=[pygame.Color(255, 0, 0)])
+    simulator.goal_paths = paths
+    simulator.survival = [0.5]
+    # A refine that found the same paths, e.g. once proven optimal
+    simulator.goal_paths = GoalPaths(positions, list(paths.encoded), colors=paths.colors)
+    assert simulator.survival == [0.5]
+    simulator.goal_paths = GoalPaths(positions, [(0, bytes((0, 2)), 14.1)], colors=paths.colors)
+    assert simulator.survival is None
+    simulator.survival = [1.0]
+    simulator.goal_paths = []
+    assert simulator.survival is None
+    pygame.display.quit()
@@ -0,0 +1,83 @@
+import asyncio
+
+from soccer_agent.Bench.solvers import random_layout
+from soccer_agent.IO.solve_server import SolveClient, SolveServer
+from soccer_agent.Math.pass_graph import InterceptionModel, PassGraph
+
+
+def test_solve_server_matches_local_solve():
+    model = InterceptionModel()
+    layouts = [random_layout(seed, passers=6, defenders=3)
+               for seed in range(50)]
+
+    async def run():
+        server = await SolveServer(interception=model).start()
+        client = await SolveClient.connect(*server.address)
+        results = await asyncio.gather(*(client.solve(l, 4) for l in layouts))
+        health = await client.health()
+        await client.close()
+        await server.close()
+        return results, health
+
+    results, health = asyncio.run(run())
+    assert health['status'] == 'ok'
+    assert health['requests'] == len(layouts)
+    assert health['batches'] < len(layouts)
+    for layout, paths in zip(layouts, results):
+        expected = PassGraph.from_layout(layout, model).top_paths(k=4)
+        assert [p for _, _, p in paths] == [p for _, p in expected]
+
+
+def test_invalid_requests_fail_alone():
+    import dataclasses
+    from soccer_agent.IO.solve_server import solve_batch
+    good = random_layout(0, passers=6, defenders=3)
+    bad_kicker = dataclasses.replace(good, kicker=6)
+    no_passers = dataclasses.replace(good, passers=(), kicker=0)
+    # A layout failing inside the solve does not fail the others
+    results = solve_batch([(good, 4), (bad_kicker, 4)], None)
+    assert isinstance(results[1], IndexError)
+    assert results[0] == solve_batch([(good, 4)], None)[0]
+
+    async def run():
+        server = await SolveServer().start()
+        client = await SolveClient.connect(*server.address)
+        results = await asyncio.gather(
+            client.solve(good, 4), client.solve(bad_kicker, 4),
+            client.solve(no_passers, 4), client.solve(good, 0),
+            client.solve(good, 2), return_exceptions=True)
+        health = await client.health()
+        await client.close()
+        await server.close()
+        return results, health
+
+    (first, *invalid, last), health = asyncio.run(run())
+    assert [p for _, _, p in first] == [
+        p for _, p in PassGraph.from_layout(good).top_paths(k=4)]
+    assert len(last) == 2
+    assert all(isinstance(e, RuntimeError) for e in invalid)
+    assert health['errors'] == 3
+
+
+def test_short_request_fails_alone():
+    import struct
+    from soccer_agent.IO.solve_server import (
+        STATUS_ERROR, STATUS_OK, RESULT_HEADER, encode_solve_request, read_frame, write_frame)
+    good = random_layout(0, passers=6, defenders=3)
+
+    async def run():
+        server = await SolveServer().start()
+        reader, writer = await asyncio.open_connection(*server.address)
+        # Truncated headers, with and without a request id
+        write_frame(writer, b'S' + struct.pack('!I', 7) + b'\x04')
+        write_frame(writer, b'S')
+        # The connection stays open for the next request
+        write_frame(writer, encode_solve_request(8, good, 2))
+        replies = [await read_frame(reader) for _ in range(3)]
+        writer.close()
+        await server.close()
+        return replies
+
+    replies = asyncio.run(run())
+    assert [RESULT_HEADER.unpack_from(r)[1:] for r in replies] == [
+        (7, STATUS_ERROR, 0), (0, STATUS_ERROR, 0), (8, STATUS_OK, 2)]
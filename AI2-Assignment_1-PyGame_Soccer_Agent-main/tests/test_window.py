@@ -0,0 +1,84 @@
+import asyncio
+import threading
+
+import pygame
+
+from soccer_agent.GUI.window import PyGame_Window
+from soccer_agent.IO.pygame_io import KeybindAction_Callable, KeybindKey
+
+
+def test_idle_window_skips_ticks():
+    window = PyGame_Window('test', 10, 10, tick_rate=1000, idle_timeout_ms=10)
+    ticks = []
+    window.register_tick_listener(lambda w: ticks.append(1))
+    # The scene changes over the first 3 ticks, then stays put
+    remove = window.register_redraw_check(lambda: len(ticks) < 3)
+
+    async def quit_later():
+        await asyncio.sleep(0.2)
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    async def run():
+        await asyncio.gather(window.event_loop(), quit_later())
+    asyncio.run(run())
+    # 3 ticks for the changes, 1 for the quit event, none while idle
+    assert len(ticks) == 4
+    assert window.idle_timeouts > 0
+    remove()
+    assert window.redraw_checks == []
+
+
+def test_idle_polls_back_off():
+    window = PyGame_Window('test', 10, 10, tick_rate=1000, idle_timeout_ms=64)
+    beats = []
+
+    async def other_task():
+        # The loop stays free while the window idles
+        for _ in range(30):
+            beats.append(1)
+            await asyncio.sleep(0.01)
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    async def run():
+        await asyncio.gather(window.event_loop(), other_task())
+    asyncio.run(run())
+    assert len(beats) == 30
+    # 1, 2, 4, ... 64 ms sleeps, then one poll per 64 ms, rather than one per tick
+    assert 0 < window.idle_timeouts < 20
+
+
+def test_window_shares_the_running_loop():
+    window = PyGame_Window('test', 10, 10, tick_rate=50, max_workers=1)
+    threads = []
+    window.register_action('work', KeybindAction_Callable(
+        callable=lambda: threads.append(threading.current_thread().name),
+        description='work', is_async=True))
+    window.register_keybind(KeybindKey(key_code=pygame.K_w), 'work')
+    beats = []
+
+    async def other_task():
+        # Keeps running while the window ticks
+        for _ in range(10):
+            beats.append(1)
+            await asyncio.sleep(0.01)
+        pygame.event.post(pygame.event.Event(
+            pygame.KEYUP, key=pygame.K_w, mod=pygame.KMOD_NONE))
+        await asyncio.sleep(0.1)
+        assert await window.run_in_executor(sum, (1, 2)) == 3
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    async def run():
+        await asyncio.gather(window.event_loop(), other_task())
+    asyncio.run(run())
+    assert len(beats) == 10
+    assert threads and threads[0].startswith('window')
+
+
+def test_removed_listeners_stop_ticking():
+    window = PyGame_Window('test', 10, 10)
+    ticks = []
+    remove = window.register_tick_listener(ticks.append, stage='tick_start')
+    remove()
+    remove()
+    assert window.tick_listeners['tick_start'] == []
+    pygame.display.quit()